@@ -0,0 +1,226 @@
+"""
+Times the hot paths of footmav on seeded synthetic data, and stores the results for comparison between versions.
+
+    python -m benchmarks.run --scales 10 50 --output benchmarks/results/current.json
+    python -m benchmarks.run --scales 10 50 --compare benchmarks/results/baseline.json
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from footmav.version import __version__
+
+Setup = Callable[[], Tuple[Callable[..., Any], tuple]]
+
+_FBREF_BENCHMARKS = {"aggregate_by", "per_90", "possession_adjust"}
+
+
+def _event_benchmarks(events: pd.DataFrame) -> Dict[str, Setup]:
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+    from footmav.utils import whoscored_funcs as WF
+    from footmav.utils.xthreat import net_pass_xt
+
+    # every repeat gets a new (shallow) frame, so nothing is served from the per-frame caches of a previous repeat
+    def _fresh(f):
+        return lambda: (f, (events.copy(deep=False),))
+
+    return {
+        "generate_aggregate_dataframe": _fresh(generate_aggregate_dataframe),
+        "minutes_per_position": _fresh(WF.minutes_per_position),
+        "is_progressive": _fresh(WF.is_progressive),
+        "net_pass_xt": _fresh(net_pass_xt),
+    }
+
+
+def _fbref_benchmarks(player_matches: pd.DataFrame) -> Dict[str, Setup]:
+    from footmav.data_definitions.fbref import fbref_columns as fc
+    from footmav.odm.fbref_data import FbRefData
+    from footmav.operations.aggregations import aggregate_by
+    from footmav.operations.normalize import per_90
+    from footmav.operations.possession_adjust import possession_adjust
+
+    data = FbRefData(player_matches.copy())
+    aggregated = aggregate_by(data, [fc.PLAYER_ID, fc.PLAYER, fc.YEAR])
+    return {
+        "aggregate_by": lambda: (
+            aggregate_by,
+            (data, [fc.PLAYER_ID, fc.PLAYER, fc.YEAR]),
+        ),
+        "per_90": lambda: (per_90, (aggregated,)),
+        "possession_adjust": lambda: (possession_adjust, (data,)),
+    }
+
+
+def time_benchmark(setup: Setup, repeat: int) -> List[float]:
+    """
+    Times a benchmark, excluding its setup
+
+    Args:
+        setup (Setup): Returns the function to time and its arguments
+        repeat (int): The number of timed runs
+
+    Returns:
+        List[float]: The wall time of every run, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        f, args = setup()
+        start = time.perf_counter()
+        f(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(
+    scales: List[int],
+    repeat: int = 3,
+    seed: int = 0,
+    only: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs every benchmark at every scale
+
+    Args:
+        scales (List[int]): The numbers of matches to generate
+        repeat (int): The number of timed runs per benchmark and scale
+        seed (int): The seed of the synthetic data
+        only (Optional[List[str]]): If provided, only these benchmarks are run
+
+    Returns:
+        Dict[str, Any]: The environment the benchmarks ran in, and one result per benchmark and scale
+    """
+    with _offline_xthreat_grid(seed):
+        results = _run(scales, repeat, seed, only)
+    return {"environment": _environment(seed), "results": results}
+
+
+def _run(
+    scales: List[int], repeat: int, seed: int, only: Optional[List[str]]
+) -> List[Dict[str, Any]]:
+    results = []
+    for n_matches in scales:
+        events = synthetic.whoscored_events(n_matches, seed=seed)
+        player_matches = synthetic.fbref_player_matches(n_matches, seed=seed)
+        benchmarks = {
+            **_event_benchmarks(events),
+            **_fbref_benchmarks(player_matches),
+        }
+        for name, setup in benchmarks.items():
+            if only and name not in only:
+                continue
+            rows = len(player_matches) if name in _FBREF_BENCHMARKS else len(events)
+            timings = time_benchmark(setup, repeat)
+            results.append(
+                {
+                    "benchmark": name,
+                    "matches": n_matches,
+                    "rows": rows,
+                    "repeat": repeat,
+                    "best": min(timings),
+                    "median": statistics.median(timings),
+                }
+            )
+            print(
+                f"{name:<30} {n_matches:>6} matches {rows:>9} rows "
+                f"best {min(timings):8.4f}s  median {statistics.median(timings):8.4f}s",
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Compares the best times of two benchmark runs
+
+    Args:
+        baseline (Dict[str, Any]): The stored results of the reference run
+        current (Dict[str, Any]): The results of the run being compared
+
+    Returns:
+        pd.DataFrame: One row per benchmark and scale present in both runs, with both best times and their ratio
+            (above 1 means the current run is slower)
+    """
+    keys = ["benchmark", "matches"]
+    merged = pd.merge(
+        pd.DataFrame(baseline["results"])[keys + ["best"]],
+        pd.DataFrame(current["results"])[keys + ["best"]],
+        on=keys,
+        suffixes=("_baseline", "_current"),
+    )
+    merged["ratio"] = merged["best_current"] / merged["best_baseline"]
+    return merged
+
+
+def _environment(seed: int) -> Dict[str, Any]:
+    return {
+        "footmav": __version__,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+
+
+@contextmanager
+def _offline_xthreat_grid(seed: int) -> Iterator[None]:
+    from footmav.utils.whoscored_funcs import XTHREAT_GRID_ENV, get_xthreat_grid
+
+    previous = os.environ.get(XTHREAT_GRID_ENV)
+    if previous:
+        yield
+        return
+    # a fixed synthetic grid keeps the benchmarks offline and independent of the downloaded grid
+    with tempfile.TemporaryDirectory(prefix="footmav_bench_") as directory:
+        path = os.path.join(directory, "xt_grid.json")
+        with open(path, "w") as fp:
+            json.dump(synthetic.xthreat_grid(seed), fp)
+        os.environ[XTHREAT_GRID_ENV] = path
+        get_xthreat_grid.cache_clear()
+        try:
+            yield
+        finally:
+            if previous is None:
+                del os.environ[XTHREAT_GRID_ENV]
+            else:
+                os.environ[XTHREAT_GRID_ENV] = previous
+            get_xthreat_grid.cache_clear()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="only run these benchmarks")
+    parser.add_argument("--output", help="store the results as json in this file")
+    parser.add_argument("--compare", help="compare with results stored in this file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scales, args.repeat, args.seed, args.only)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        print(compare(baseline, results).to_string(index=False))
+    else:
+        print(pd.DataFrame(results["results"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
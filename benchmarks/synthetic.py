@@ -0,0 +1,367 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from footmav.data_definitions.base import (
+    NativeDataAttribute,
+    NumericDataAttribute,
+    RegisteredAttributeStore,
+    StrDataAttribute,
+)
+from footmav.data_definitions.data_sources import DataSource
+from footmav.data_definitions.fbref import fbref_columns as fc
+from footmav.data_definitions.whoscored.constants import EventType
+
+FORMATION = ["GK", "DR", "DC", "DC", "DL", "DMC", "MC", "MC", "AMR", "AML", "FW"]
+SUB_POSITIONS = {"DC": "DC", "MC": "MC", "FW": "FW"}
+
+# (event type, share of on-ball events, outcome probability)
+EVENT_MIX: List[Tuple[EventType, float, float]] = [
+    (EventType.Pass, 0.52, 0.8),
+    (EventType.BallRecovery, 0.05, 1.0),
+    (EventType.TakeOn, 0.03, 0.5),
+    (EventType.Foul, 0.04, 0.5),
+    (EventType.Tackle, 0.03, 0.7),
+    (EventType.Interception, 0.02, 1.0),
+    (EventType.Clearance, 0.04, 0.8),
+    (EventType.Aerial, 0.05, 0.5),
+    (EventType.Challenge, 0.01, 0.0),
+    (EventType.Dispossessed, 0.02, 0.0),
+    (EventType.BallTouch, 0.06, 0.6),
+    (EventType.Save, 0.01, 1.0),
+    (EventType.Claim, 0.01, 0.9),
+    (EventType.KeeperPickup, 0.01, 1.0),
+    (EventType.Smother, 0.005, 0.5),
+    (EventType.MissedShots, 0.009, 1.0),
+    (EventType.SavedShot, 0.007, 1.0),
+    (EventType.ShotOnPost, 0.001, 1.0),
+    (EventType.Goal, 0.003, 1.0),
+    (EventType.Card, 0.003, 1.0),
+    (EventType.CornerAwarded, 0.03, 1.0),
+    (EventType.OffsideProvoked, 0.002, 1.0),
+    (EventType.Error, 0.002, 1.0),
+]
+
+# (code, display name, probability on a pass, probability on a shot, probability on other events)
+QUALIFIER_MIX: List[Tuple[int, str, float, float, float]] = [
+    (1, "Longball", 0.12, 0.0, 0.0),
+    (2, "Cross", 0.04, 0.0, 0.0),
+    (4, "ThroughBall", 0.01, 0.0, 0.0),
+    (5, "FreekickTaken", 0.03, 0.03, 0.0),
+    (6, "CornerTaken", 0.015, 0.0, 0.0),
+    (9, "Penalty", 0.0, 0.02, 0.0),
+    (15, "Head", 0.05, 0.2, 0.1),
+    (22, "RegularPlay", 0.0, 0.7, 0.0),
+    (28, "OwnGoal", 0.0, 0.01, 0.0),
+    (31, "Yellow", 0.0, 0.0, 0.003),
+    (82, "Blocked", 0.0, 0.25, 0.0),
+    (94, "OtherBodyPart", 0.0, 0.0, 0.01),
+    (107, "ThrowIn", 0.04, 0.0, 0.0),
+    (123, "KeeperThrow", 0.005, 0.0, 0.0),
+    (155, "Chipped", 0.05, 0.05, 0.0),
+    (214, "BigChance", 0.0, 0.15, 0.0),
+    (264, "AerialFoul", 0.0, 0.0, 0.02),
+]
+
+SHOT_TYPES = [
+    EventType.MissedShots,
+    EventType.SavedShot,
+    EventType.ShotOnPost,
+    EventType.Goal,
+]
+
+
+def whoscored_events(
+    n_matches: int, seed: int = 0, events_per_match: int = 1600
+) -> pd.DataFrame:
+    """
+    Generates a seeded, whoscored-style event dataframe with the columns `generate_aggregate_dataframe` expects.
+
+    Every match has two teams of eleven starters in a fixed formation, three second-half substitutions per team
+    (each with a formation change event), qualifiers drawn per event type, assisted shots linked to a preceding
+    pass through qualifier 55, and xG on shots.  The same arguments always produce the same frame.
+
+    Args:
+        n_matches (int): The number of matches
+        seed (int): The random seed
+        events_per_match (int): The approximate number of on-ball events per match
+
+    Returns:
+        pd.DataFrame: The events
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = max(2, int(np.ceil(np.sqrt(n_matches))) + 1)
+    teams = [f"team_{i:02d}" for i in range(n_teams)]
+    frames = [
+        _match_events(rng, match, teams, events_per_match) for match in range(n_matches)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _match_events(
+    rng: np.random.Generator, match: int, teams: List[str], events_per_match: int
+) -> pd.DataFrame:
+    home, away = rng.choice(len(teams), size=2, replace=False)
+    sides = [
+        (home, teams[home], teams[away], True),
+        (away, teams[away], teams[home], False),
+    ]
+    rows: List[Dict[str, Any]] = []
+
+    for team_id, team, opponent, is_home in sides:
+        lineup = {f"{team}_p{i:02d}": position for i, position in enumerate(FORMATION)}
+        players = list(lineup)
+        sub_minutes = np.sort(rng.integers(55, 86, size=3))
+        subbed_off = rng.choice(np.arange(1, 11), size=3, replace=False)
+        n_events = int(events_per_match / 2)
+        minutes = np.sort(rng.integers(0, 94, size=n_events))
+        periods = np.where(minutes < 45, 1, 2)
+        event_players = rng.integers(0, len(players), size=n_events)
+        names = np.asarray(players, dtype=object)[event_players]
+        positions = np.asarray([lineup[p] for p in names], dtype=object)
+
+        for k, (minute, off) in enumerate(zip(sub_minutes, subbed_off)):
+            off_name = players[off]
+            on_name = f"{team}_s{k}"
+            on_position = SUB_POSITIONS.get(FORMATION[off], FORMATION[off])
+            after = (minutes > minute) & (names == off_name)
+            names[after] = on_name
+            positions[after] = on_position
+            second = int(rng.integers(0, 60))
+            rows.append(
+                _row(
+                    team_id,
+                    team,
+                    opponent,
+                    is_home,
+                    2,
+                    minute,
+                    second,
+                    None,
+                    0,
+                    EventType.FormationChange,
+                )
+            )
+            rows.append(
+                _row(
+                    team_id,
+                    team,
+                    opponent,
+                    is_home,
+                    2,
+                    minute,
+                    second,
+                    off_name,
+                    "Sub",
+                    EventType.SubstitutionOff,
+                )
+            )
+            rows.append(
+                _row(
+                    team_id,
+                    team,
+                    opponent,
+                    is_home,
+                    2,
+                    minute,
+                    second,
+                    on_name,
+                    "Sub",
+                    EventType.SubstitutionOn,
+                )
+            )
+
+        shares = np.asarray([share for _, share, _ in EVENT_MIX])
+        type_ids = rng.choice(len(EVENT_MIX), size=n_events, p=shares / shares.sum())
+        seconds = rng.integers(0, 60, size=n_events)
+        outcomes = (
+            rng.random(n_events) < np.asarray([p for _, _, p in EVENT_MIX])[type_ids]
+        )
+        for i in range(n_events):
+            event_type = EVENT_MIX[type_ids[i]][0]
+            rows.append(
+                _row(
+                    team_id,
+                    team,
+                    opponent,
+                    is_home,
+                    int(periods[i]),
+                    int(minutes[i]),
+                    int(seconds[i]),
+                    names[i],
+                    positions[i],
+                    event_type,
+                    int(outcomes[i]),
+                    _qualifiers(rng, event_type),
+                )
+            )
+
+    events = pd.DataFrame(rows)
+    events = events.sort_values(["period", "minute", "second"], kind="mergesort")
+    events = events.reset_index(drop=True)
+    n = len(events)
+    events["eventId"] = np.arange(1, n + 1)
+    events["matchId"] = 1000000 + match
+    events["match_date"] = pd.Timestamp("2022-08-05") + pd.Timedelta(days=3 * match)
+    events["competition"] = "synthetic_league"
+    events["season"] = 2023
+
+    is_pass = (events["event_type"] == EventType.Pass).to_numpy()
+    attacking = rng.random(n) < 0.45
+    events["x"] = np.where(
+        attacking, rng.uniform(50, 100, n), rng.uniform(0, 50, n)
+    ).round(1)
+    events["y"] = rng.uniform(0, 100, n).round(1)
+    events["endX"] = np.where(
+        is_pass, np.clip(events["x"] + rng.normal(8, 18, n), 0, 100), 0
+    ).round(1)
+    events["endY"] = np.where(
+        is_pass, np.clip(events["y"] + rng.normal(0, 20, n), 0, 100), 0
+    ).round(1)
+
+    is_shot = events["event_type"].isin(SHOT_TYPES).to_numpy()
+    events.loc[is_shot, "x"] = rng.uniform(72, 99, int(is_shot.sum())).round(1)
+    events["xG"] = np.where(is_shot, rng.beta(1.2, 8, n), 0.0)
+    _link_assists(rng, events, is_pass, is_shot)
+    return events
+
+
+def _row(
+    team_id,
+    team,
+    opponent,
+    is_home,
+    period,
+    minute,
+    second,
+    player_name,
+    position,
+    event_type,
+    outcome=1,
+    qualifiers=None,
+) -> Dict[str, Any]:
+    return {
+        "teamId": team_id,
+        "team": team,
+        "opponent": opponent,
+        "is_home_team": is_home,
+        "period": period,
+        "minute": minute,
+        "second": second,
+        "player_name": player_name,
+        "position": position,
+        "event_type": event_type,
+        "outcomeType": outcome,
+        "qualifiers": qualifiers or [],
+    }
+
+
+def _qualifiers(
+    rng: np.random.Generator, event_type: EventType
+) -> List[Dict[str, Any]]:
+    column = 2 if event_type == EventType.Pass else 3 if event_type in SHOT_TYPES else 4
+    draws = rng.random(len(QUALIFIER_MIX))
+    return [
+        {"type": {"value": q[0], "displayName": q[1]}}
+        for q, draw in zip(QUALIFIER_MIX, draws)
+        if draw < q[column]
+    ]
+
+
+def _link_assists(
+    rng: np.random.Generator,
+    events: pd.DataFrame,
+    is_pass: np.ndarray,
+    is_shot: np.ndarray,
+) -> None:
+    is_pass = is_pass.copy()
+    team_ids = events["teamId"].to_numpy()
+    event_ids = events["eventId"].to_numpy()
+    for row in np.flatnonzero(is_shot & (rng.random(len(events)) < 0.6)):
+        # the assist is the closest preceding pass of the same team
+        candidates = np.flatnonzero(is_pass[:row] & (team_ids[:row] == team_ids[row]))
+        if len(candidates):
+            events.at[row, "qualifiers"] = events.at[row, "qualifiers"] + [
+                {
+                    "type": {"value": 55, "displayName": "RelatedEventId"},
+                    "value": str(event_ids[candidates[-1]]),
+                }
+            ]
+            is_pass[candidates[-1]] = False
+
+
+def fbref_player_matches(n_matches: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a seeded, fbref-style player match dataframe with every registered native fbref attribute.
+
+    Teams play a double round robin, so `possession_adjust` sees a complete league.  Counting stats are poisson
+    draws scaled by minutes played, and touches scale with a per-team possession share.
+
+    Args:
+        n_matches (int): The approximate number of matches
+        seed (int): The random seed
+
+    Returns:
+        pd.DataFrame: The player match rows, ready to be passed to `FbRefData`
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = 2
+    while n_teams * (n_teams - 1) < n_matches:
+        n_teams += 2
+    teams = [f"team_{i:02d}" for i in range(n_teams)]
+    possession = rng.uniform(0.35, 0.65, n_teams)
+
+    fixtures = [(h, a) for h in range(n_teams) for a in range(n_teams) if h != a]
+    rows = []
+    for match, (home, away) in enumerate(fixtures):
+        date = pd.Timestamp("2022-08-05") + pd.Timedelta(days=match)
+        for team, opponent in [(home, away), (away, home)]:
+            share = possession[team] / (possession[team] + possession[opponent])
+            for p in range(14):
+                minutes = 90.0 if p < 8 else float(rng.integers(1, 91))
+                rows.append(
+                    {
+                        fc.PLAYER_ID.N: f"{teams[team]}_p{p:02d}",
+                        fc.PLAYER.N: f"Player {team}-{p}",
+                        fc.TEAM.N: teams[team],
+                        fc.OPPONENT.N: teams[opponent],
+                        fc.DATE.N: date,
+                        fc.MINUTES.N: minutes,
+                        "_touch_rate": share * 1.3,
+                    }
+                )
+    players = pd.DataFrame(rows)
+    scale = players[fc.MINUTES.N].to_numpy() / 90
+    touch_rate = players.pop("_touch_rate").to_numpy()
+
+    stats = {}
+    for attribute in RegisteredAttributeStore.get_registered_attributes():
+        if (
+            not isinstance(attribute, NativeDataAttribute)
+            or attribute.source != DataSource.FBREF
+            or attribute.N in players.columns
+        ):
+            continue
+        if isinstance(attribute, NumericDataAttribute):
+            stats[attribute.N] = rng.poisson(2.0 * scale).astype(attribute.data_type)
+        elif isinstance(attribute, StrDataAttribute):
+            stats[attribute.N] = np.full(len(players), "synthetic", dtype=object)
+    stats[fc.TOUCHES.N] = rng.poisson(60 * scale * touch_rate).astype(float)
+    stats[fc.YEAR.N] = np.full(len(players), 2023)
+    stats[fc.COMPETITION.N] = np.full(len(players), "synthetic_league", dtype=object)
+    players = pd.concat([players, pd.DataFrame(stats, index=players.index)], axis=1)
+    return players
+
+
+def xthreat_grid(seed: int = 0) -> List[List[float]]:
+    """
+    Generates a seeded 8x12 xthreat grid that increases towards the opponent's goal
+
+    Args:
+        seed (int): The random seed
+
+    Returns:
+        List[List[float]]: The grid, as 8 rows of 12 values
+    """
+    rng = np.random.default_rng(seed)
+    base = np.linspace(0.005, 0.25, 12) ** 1.5
+    return (base[np.newaxis, :] * rng.uniform(0.8, 1.2, (8, 12))).tolist()
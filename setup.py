@@ -29,6 +29,7 @@ setup(
         "tqdm",
         "scipy",
     ],
+    extras_require={"parquet": ["pyarrow"]},
     classifiers=[
         "Development Status :: 1 - Planning",
         "Programming Language :: Python :: 3.0",
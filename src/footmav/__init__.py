@@ -13,3 +13,4 @@ from footmav.data_definitions.understat import understat_columns as us
 from footmav.odm.fbref_data import FbRefData
 from footmav.odm.understat_data import UnderstatData
 from footmav.odm.data import Data
+from footmav.odm.store import MatchStore
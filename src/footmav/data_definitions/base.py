@@ -11,6 +11,10 @@ class RegisteredAttributeStore:
     def get_registered_attributes(cls) -> List["DataAttribute"]:
         return list(cls._registered_attributes.values())
 
+    @classmethod
+    def get_registered_attribute(cls, name: str) -> Optional["DataAttribute"]:
+        return cls._registered_attributes.get(name)
+
     @classmethod
     def register_attribute(cls, attribute: "DataAttribute"):
         if attribute.N in cls._registered_attributes and isinstance(
@@ -1,4 +1,4 @@
-from typing import Callable, Optional, Union
+from typing import Callable, List, Optional, Union
 from footmav.data_definitions.base import DataAttribute
 from footmav.data_definitions.data_sources import DataSource
 from footmav.data_definitions.function_builder import FunctionBuilder
@@ -38,6 +38,16 @@ class DerivedDataAttribute(DataAttribute, abc.ABC):
         """
         return self._recalculate_on_aggregation
 
+    @property
+    def inputs(self) -> Optional[List[DataAttribute]]:
+        """
+        The data attributes the derived data attribute is calculated from, if they are known.
+
+        Returns:
+            Optional[List[DataAttribute]]: The input attributes, or None if they are not known
+        """
+        return None
+
     @abc.abstractmethod
     def apply(self, data: pd.DataFrame) -> pd.Series:
         """
@@ -78,6 +88,10 @@ class FunctionDerivedDataAttribute(DerivedDataAttribute):
             name, data_type, agg_function, source, recalculate_on_aggregation
         )
 
+    @property
+    def inputs(self) -> Optional[List[DataAttribute]]:
+        return self.function.attributes()
+
     def apply(self, data: pd.DataFrame) -> pd.Series:
         """Calculate the data attribute from the baseline data.
 
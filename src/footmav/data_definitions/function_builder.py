@@ -1,6 +1,6 @@
 import abc
 import pandas as pd
-from typing import Any
+from typing import Any, List
 
 
 class DataAttributeOperator(abc.ABC):
@@ -100,6 +100,23 @@ class FunctionBuilder:
         """
         return self._apply(data)
 
+    def attributes(self) -> List[Any]:
+        """
+        Returns the data attributes the function reads, ie. the operands of its `Col` operators
+
+        Returns:
+            List[DataAttribute]: The attributes, in the order they first appear in the function
+        """
+        if self._operator.__name__ == "Col":
+            return [self._operands[0]]
+        attributes = []
+        for operand in self._operands:
+            if isinstance(operand, FunctionBuilder):
+                attributes.extend(
+                    a for a in operand.attributes() if a not in attributes
+                )
+        return attributes
+
     def _apply(self, df: pd.DataFrame) -> pd.Series:
         """
         Inner implementation of apply, used by recursion and not publicly visible.
@@ -1,7 +1,7 @@
 from footmav.data_definitions.whoscored.constants import EventType
 from footmav.event_aggregation.event_aggregator_processor import event_aggregator
 from footmav.utils import whoscored_funcs as WF
-import pandas as pd
+from footmav.utils import possession_chains as PC
 
 
 @event_aggregator(success="completed", vertical_areas=5, group="passing")
@@ -124,51 +124,53 @@ def passes_into_area(dataframe):
 
 @event_aggregator
 def tackles(dataframe):
-    return (dataframe["event_type"] == EventType.Tackle) | (
-        dataframe["event_type"] == EventType.Challenge
-    )
+    return WF.col_is_event_type(dataframe, EventType.Tackle, EventType.Challenge)
 
 
 @event_aggregator
 def tackles_successful(dataframe):
-    return dataframe["event_type"] == EventType.Tackle
+    return WF.col_is_event_type(dataframe, EventType.Tackle)
 
 
 @event_aggregator
 def interceptions(dataframe):
-    return dataframe["event_type"] == EventType.Interception
+    return WF.col_is_event_type(dataframe, EventType.Interception)
 
 
 @event_aggregator
 def fouls_won(dataframe):
-    return (dataframe["event_type"] == EventType.Foul) & (dataframe["outcomeType"] == 1)
+    return WF.col_is_event_type(dataframe, EventType.Foul) & (
+        dataframe["outcomeType"] == 1
+    )
 
 
 @event_aggregator
 def fouls_conceded(dataframe):
-    return (dataframe["event_type"] == EventType.Foul) & (dataframe["outcomeType"] == 0)
+    return WF.col_is_event_type(dataframe, EventType.Foul) & (
+        dataframe["outcomeType"] == 0
+    )
 
 
 @event_aggregator(success="won")
 def aerials(dataframe):
-    return (dataframe["event_type"] == EventType.Aerial) | (
-        (dataframe["event_type"] == EventType.Foul)
+    return WF.col_is_event_type(dataframe, EventType.Aerial) | (
+        WF.col_is_event_type(dataframe, EventType.Foul)
         & WF.col_has_qualifier(dataframe, qualifier_code=264)
     )
 
 
 @event_aggregator
 def ground_duels(dataframe):
-    return (
-        (dataframe["event_type"] == EventType.TakeOn)
-        | (
-            (dataframe["event_type"] == EventType.Foul)
-            & (~WF.col_has_qualifier(dataframe, qualifier_code=264))
-        )
-        | (dataframe["event_type"] == EventType.Tackle)
-        | (dataframe["event_type"] == EventType.Challenge)
-        | (dataframe["event_type"] == EventType.Smother)
-        | (dataframe["event_type"] == EventType.Dispossessed)
+    return WF.col_is_event_type(
+        dataframe,
+        EventType.TakeOn,
+        EventType.Tackle,
+        EventType.Challenge,
+        EventType.Smother,
+        EventType.Dispossessed,
+    ) | (
+        WF.col_is_event_type(dataframe, EventType.Foul)
+        & (~WF.col_has_qualifier(dataframe, qualifier_code=264))
     )
 
 
@@ -176,59 +178,41 @@ def ground_duels(dataframe):
 def ground_duels_won(dataframe):
     return (
         (
-            (dataframe["event_type"] == EventType.TakeOn)
+            WF.col_is_event_type(dataframe, EventType.TakeOn, EventType.Smother)
             | (
-                (dataframe["event_type"] == EventType.Foul)
+                WF.col_is_event_type(dataframe, EventType.Foul)
                 & (~WF.col_has_qualifier(dataframe, qualifier_code=264))
             )
-            | (dataframe["event_type"] == EventType.Smother)
         )
         & (dataframe["outcomeType"] == 1)
-    ) | (dataframe["event_type"] == EventType.Tackle)
+    ) | WF.col_is_event_type(dataframe, EventType.Tackle)
 
 
 @event_aggregator(suffix="")
 def ground_duels_lost(dataframe):
     return (
         (
-            (dataframe["event_type"] == EventType.TakeOn)
+            WF.col_is_event_type(
+                dataframe, EventType.TakeOn, EventType.Challenge, EventType.Smother
+            )
             | (
-                (dataframe["event_type"] == EventType.Foul)
+                WF.col_is_event_type(dataframe, EventType.Foul)
                 & (~WF.col_has_qualifier(dataframe, qualifier_code=264))
             )
-            | (dataframe["event_type"] == EventType.Challenge)
-            | (dataframe["event_type"] == EventType.Smother)
         )
         & (dataframe["outcomeType"] == 0)
-    ) | (dataframe["event_type"] == EventType.Dispossessed)
+    ) | WF.col_is_event_type(dataframe, EventType.Dispossessed)
 
 
 @event_aggregator(suffix="")
 def xa(dataframe):
-    temp = dataframe.copy()
-    temp["assist_id"] = (
-        WF.col_get_qualifier_value(dataframe, qualifier_code=55)
-        .fillna(-978)
-        .astype(int)
-    )
-    return (
-        pd.merge(
-            temp,
-            temp[["matchId", "teamId", "assist_id", "xG"]],
-            left_on=["matchId", "teamId", "eventId"],
-            right_on=["matchId", "teamId", "assist_id"],
-            suffixes=("", "_assisted"),
-            how="left",
-        )["xG_assisted"]
-        .fillna(0)
-        .tolist()
-    )
+    return WF.assisted_xg(dataframe)
 
 
 @event_aggregator(success="completed")
 def open_play_balls_into_box(dataframe):
     return (
-        (dataframe["event_type"] == EventType.Pass)
+        WF.col_is_event_type(dataframe, EventType.Pass)
         & WF.in_attacking_box(dataframe, False).astype(int)
         & (~WF.col_has_qualifier(dataframe, qualifier_code=5))
         & (~WF.col_has_qualifier(dataframe, qualifier_code=6))
@@ -256,14 +240,14 @@ def big_chances_missed(data):
 
 @event_aggregator(suffix="")
 def yellow_cards(data):
-    return (data["event_type"] == EventType.Card) & WF.col_has_qualifier(
+    return WF.col_is_event_type(data, EventType.Card) & WF.col_has_qualifier(
         data, qualifier_code=31
     )
 
 
 @event_aggregator(suffix="")
 def red_cards(data):
-    return (data["event_type"] == EventType.Card) & (
+    return WF.col_is_event_type(data, EventType.Card) & (
         WF.col_has_qualifier(data, qualifier_code=32)
         | WF.col_has_qualifier(data, qualifier_code=33)
     )
@@ -272,7 +256,7 @@ def red_cards(data):
 @event_aggregator(suffix="")
 def keeper_saves(dataframe):
     return (
-        (dataframe["event_type"] == EventType.Save)
+        WF.col_is_event_type(dataframe, EventType.Save)
         & (dataframe["outcomeType"] == 1)
         & (~WF.col_has_qualifier(dataframe, qualifier_code=94))
     )
@@ -281,3 +265,23 @@ def keeper_saves(dataframe):
 @event_aggregator(suffix="", group="shooting")
 def npxgot(dataframe):
     return npxg(dataframe) * shots_on_target(dataframe).astype(int)
+
+
+@event_aggregator(
+    suffix="",
+    group="possession",
+    persistent=False,
+    team=lambda dataframe: PC.chain_xg(dataframe, per_chain=True),
+)
+def xg_chain(dataframe):
+    return PC.chain_xg(dataframe)
+
+
+@event_aggregator(
+    suffix="",
+    group="possession",
+    persistent=False,
+    team=lambda dataframe: PC.chain_xg(dataframe, buildup=True, per_chain=True),
+)
+def xg_buildup(dataframe):
+    return PC.chain_xg(dataframe, buildup=True)
@@ -1,37 +1,188 @@
-from types import MethodType
+from types import CodeType, MethodType
 from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import numpy as np
+import pandas as pd
+from footmav.event_aggregation.profiling import profiled_call
 from footmav.utils import whoscored_funcs as WF
+from footmav.utils.frame_cache import frame_cached
+
+
+class AggregationCache:
+    """
+    Per-dataframe memo of aggregator outputs.  Aggregators freely call each other (eg. `goals` calls `shots`),
+    so without it shared sub-expressions would be recomputed on every reference.
+
+    Attributes:
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that had to compute the aggregator
+    """
+
+    def __init__(self):
+        self._values: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if key in self._values:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._values[key] = compute()
+        return self._values[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit and miss counts of the cache
+
+        Returns:
+            Dict[str, int]: The number of hits, misses and distinct cached entries
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._values)}
+
+
+def get_aggregation_cache(dataframe: pd.DataFrame) -> AggregationCache:
+    """
+    Returns the aggregation cache of a dataframe, creating it on first use
+
+    Args:
+        dataframe (pd.DataFrame): The event dataframe
+
+    Returns:
+        AggregationCache: The aggregation cache of the dataframe
+    """
+    return frame_cached(dataframe, "aggregation_cache", AggregationCache)
 
 
 class EventAggregationProcessor:
     aggregators = {}
 
-    def __init__(self, name, f, suffix, persistent, group):
+    def __init__(
+        self,
+        name,
+        f,
+        suffix,
+        persistent,
+        group,
+        depends_on=None,
+        columns=None,
+        team=None,
+    ):
         self._name = name
         self._suffix = suffix
         self._f = f
         self._extra_functions = dict()
         self._persistent = persistent
         self._group = group
+        self._depends_on = depends_on
+        self._columns = list(columns or [])
+        self._team = team
 
     def __call__(self, dataframe):
-        if self.group:
-            name = f"{self.group}_{self.col_name}"
-        else:
-            name = self.col_name
-        if self.col_name not in dataframe.columns:
-            
-            dataframe[name] = self._f(dataframe)
-        return dataframe[name]
+        return profiled_call(
+            self.col_name,
+            "aggregator",
+            lambda: get_aggregation_cache(dataframe).get(
+                (self.name, self.col_name), lambda: self._f(dataframe)
+            ),
+        )
+
+    def area_split(self, name, f, dataframe, end_coordinate=False):
+        """
+        Splits the output of the aggregator (or one of its extra functions) by vertical area, with one vectorized
+        cross of its mask and the vertical area of every event.  The split is computed once per dataframe, and every
+        area function of the aggregator reads its own column from it.
+
+        Args:
+            name (str): The name of the function being split
+            f (Callable[[pd.DataFrame], pd.Series]): The function being split
+            dataframe (pd.DataFrame): The event dataframe
+            end_coordinate (bool): If True, events are split by their end coordinates
+
+        Returns:
+            np.ndarray: Boolean array with one column per `VerticalAreas` member, in definition order
+        """
+        return get_aggregation_cache(dataframe).get(
+            (self.name, f"{name}_by_area", end_coordinate),
+            lambda: np.asarray(f(dataframe), dtype=bool)[:, np.newaxis]
+            & vertical_area_masks(dataframe, end_coordinate),
+        )
+
+    def memoize(self, name, f):
+        """
+        Wraps one of the aggregator's extra functions so it's computed at most once per dataframe
+
+        Args:
+            name (str): The name of the extra function
+            f (Callable[[pd.DataFrame], pd.Series]): The extra function
+
+        Returns:
+            Callable[[pd.DataFrame], pd.Series]: The memoized function
+        """
+
+        def _memoized(dataframe):
+            return profiled_call(
+                name,
+                "extra",
+                lambda: get_aggregation_cache(dataframe).get(
+                    (self.name, name), lambda: f(dataframe)
+                ),
+            )
+
+        return _memoized
 
     @property
     def name(self):
         return self._name
 
+    @property
+    def depends_on(self) -> List[str]:
+        """
+        Returns the names of the aggregators this aggregator reads.  These are either declared through the
+        `depends_on` argument of `event_aggregator`, or detected from the global and closure names the aggregator function uses.
+
+        Returns:
+            List[str]: The names of the aggregators this aggregator depends on
+        """
+        if self._depends_on is not None:
+            return [d if isinstance(d, str) else d.name for d in self._depends_on]
+        return [
+            name
+            for name in _referenced_names(self._f.__code__)
+            if name in EventAggregationProcessor.aggregators and name != self.name
+        ]
+
     @property
     def group(self):
         return self._group
 
+    @property
+    def columns(self) -> List[str]:
+        """
+        Returns the event columns the aggregator reads on top of the working set columns (see
+        `footmav.event_aggregation.generator.WORKING_COLUMNS`), as declared through the `columns` argument of
+        `event_aggregator`
+
+        Returns:
+            List[str]: The extra columns
+        """
+        return self._columns
+
+    @property
+    def team_function(self) -> Optional[Callable[[pd.DataFrame], pd.Series]]:
+        """
+        Returns the function the team level output of the aggregator is computed with, as declared through the
+        `team` argument of `event_aggregator`.  Without one, the team level output is the sum of the player level
+        one, which is wrong for metrics that credit the same event to several players (eg. xG chain).
+
+        Returns:
+            Optional[Callable[[pd.DataFrame], pd.Series]]: The team level function, or None
+        """
+        return self._team
+
     @property
     def col_name(self):
         return (
@@ -49,6 +200,14 @@ class EventAggregationProcessor:
         return self._persistent
 
 
+def _referenced_names(code: CodeType) -> List[str]:
+    names = list(code.co_names) + list(code.co_freevars)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names.extend(n for n in _referenced_names(const) if n not in names)
+    return names
+
+
 class VerticalAreas(Enum):
     DefBox = "def_pen_area"
     Def = "def_3rd"
@@ -57,45 +216,57 @@ class VerticalAreas(Enum):
     AttBox = "att_pen_area"
 
 
-def vertical_area_function_maker(
-    instance, area: VerticalAreas, end_coordinate: bool = False, success: str = ""
-):
-    name = f"{instance.name}_{area.value}"
-    x = "endX" if end_coordinate else "x"
-    y = "endY" if end_coordinate else "y"
-    if area == VerticalAreas.DefBox:
-
-        def _f(self, dataframe):
-            return self(dataframe) & (WF.in_defensive_box(dataframe, ~end_coordinate))
-
-    if area == VerticalAreas.Def:
+def vertical_area_masks(dataframe, end_coordinate: bool = False) -> np.ndarray:
+    """
+    Returns which vertical area every event is located in, computed once per dataframe
 
-        def _f(self, dataframe):
-            return self(dataframe) & (dataframe[x] <= 33.0)
+    Args:
+        dataframe (pd.DataFrame): The event dataframe
+        end_coordinate (bool): If True, the end coordinates of the events are used, otherwise the start coordinates
 
-    if area == VerticalAreas.Mid:
+    Returns:
+        np.ndarray: Boolean array with one column per `VerticalAreas` member, in definition order
+    """
 
-        def _f(self, dataframe):
-            return self(dataframe) & (dataframe[x] > 33.0) & (dataframe[x] <= 66.0)
+    def _masks():
+        third, box = WF.col_vertical_zones(dataframe, end_coordinate)
+        return np.stack(
+            [box == 0, third == 0, third == 1, third == 2, box == 1], axis=1
+        )
 
-    if area == VerticalAreas.Att:
+    return frame_cached(
+        dataframe,
+        "vertical_area_masks_end" if end_coordinate else "vertical_area_masks",
+        _masks,
+    )
 
-        def _f(self, dataframe):
-            return self(dataframe) & (dataframe[x] > 66.0)
 
-    if area == VerticalAreas.AttBox:
+def vertical_area_function_maker(
+    instance, area: VerticalAreas, end_coordinate: bool = False, success: str = ""
+):
+    name = f"{instance.name}_{area.value}"
+    column = list(VerticalAreas).index(area)
 
-        def _f(self, dataframe):
-            return self(dataframe) & (WF.in_attacking_box(dataframe, ~end_coordinate))
+    def _f(self, dataframe):
+        split = self.area_split(self.name, self, dataframe, end_coordinate)
+        return pd.Series(split[:, column], index=dataframe.index)
 
-    setattr(instance, area.value, MethodType(_f, instance))
+    setattr(instance, area.value, instance.memoize(name, MethodType(_f, instance)))
     if success:
 
         def _f_success(self, dataframe):
-            return self(dataframe) & WF.success(dataframe)
-
-        setattr(instance, f"{area.value}_{success}", MethodType(_f_success, instance))
-        instance.extra_functions[f"{instance.name}_{area.value}_{success}"] = getattr(
+            split = self.area_split(
+                f"{self.name}_{success}", self.success, dataframe, end_coordinate
+            )
+            return pd.Series(split[:, column], index=dataframe.index)
+
+        success_name = f"{instance.name}_{area.value}_{success}"
+        setattr(
+            instance,
+            f"{area.value}_{success}",
+            instance.memoize(success_name, MethodType(_f_success, instance)),
+        )
+        instance.extra_functions[success_name] = getattr(
             instance, f"{area.value}_{success}"
         )
     instance.extra_functions[name] = getattr(instance, area.value)
@@ -108,13 +279,23 @@ def event_aggregator(
     vertical_areas=0,
     persistent=True,
     group="",
+    depends_on=None,
+    columns=None,
+    team=None,
 ):
     assert callable(f_cal) or f_cal is None
 
     def _decorator(f):
 
         EventAggregationProcessor.aggregators[f.__name__] = EventAggregationProcessor(
-            f.__name__, f, suffix, persistent, group=group
+            f.__name__,
+            f,
+            suffix,
+            persistent,
+            group=group,
+            depends_on=depends_on,
+            columns=columns,
+            team=team,
         )
         instance = EventAggregationProcessor.aggregators[f.__name__]
         if success:
@@ -122,7 +303,9 @@ def event_aggregator(
             def _success(self, dataframe):
                 return self(dataframe) & WF.success(dataframe)
 
-            instance.success = MethodType(_success, instance)
+            instance.success = instance.memoize(
+                f"{instance.name}_{success}", MethodType(_success, instance)
+            )
             instance.extra_functions[f"{instance.name}_{success}"] = instance.success
         if vertical_areas == 3 or vertical_areas == 5:
             vertical_area_function_maker(instance, VerticalAreas.Def, False, success)
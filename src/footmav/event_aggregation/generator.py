@@ -1,54 +1,452 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import numpy as np
 import pandas as pd
-from footmav.event_aggregation.event_aggregator_processor import (
-    EventAggregationProcessor,
+from footmav.event_aggregation.event_aggregator_processor import get_aggregation_cache
+from footmav.event_aggregation.planner import ExecutionPlan, build_execution_plan
+from footmav.event_aggregation.profiling import (
+    AggregationProfiler,
+    combine_reports,
+    profiled,
+    profiled_call,
 )
+from footmav.event_aggregation.rollup import sum_by_keys
 from footmav.utils import whoscored_funcs as WF
+from footmav.utils.frame_cache import frame_cached
+from footmav.utils.qualifier_index import get_qualifier_index
+
+GROUP_KEYS = [
+    "matchId",
+    "match_date",
+    "competition",
+    "season",
+    "player_name",
+    "team",
+    "opponent",
+    "position",
+    "is_home_team",
+]
+
+# the raw event columns aggregators are evaluated on. Everything else (notably the raw qualifier lists, which are
+# replaced by the qualifier index) is left out of the working set; custom aggregators that read other columns
+# declare them with the `columns` argument of `event_aggregator`
+WORKING_COLUMNS = [
+    "matchId",
+    "teamId",
+    "eventId",
+    "period",
+    "minute",
+    "second",
+    "player_name",
+    "position",
+    "event_type",
+    "outcomeType",
+    "x",
+    "y",
+    "endX",
+    "endY",
+    "xG",
+]
+
+
+TEAM_KEYS = [
+    "matchId",
+    "match_date",
+    "competition",
+    "season",
+    "team",
+    "opponent",
+    "is_home_team",
+]
+
+LEVELS = ("player", "team")
+
+OUTPUT_RENAMES = {
+    "matchId": "match_id",
+    "is_home_team": "is_home",
+    "competition": "comp",
+}
 
 
 def generate_aggregate_dataframe(
-    dataframe: pd.DataFrame, persistent_only=True, groups=None
+    dataframe: pd.DataFrame,
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    n_workers: int = 1,
+    matches_per_shard: Optional[int] = None,
+    profile: bool = False,
 ) -> pd.DataFrame:
-    agg_data = dataframe.copy()
-    aggregated_cols = []
-    for aggregator in EventAggregationProcessor.aggregators.values():
-        if (persistent_only and not aggregator.persistent) or (
-            groups and aggregator.group not in groups
-        ):
-            continue
-        aggregator(agg_data)
-        aggregated_cols.append((aggregator.group, aggregator.col_name))
-        for name, f in aggregator.extra_functions.items():
-            aggregated_cols.append((aggregator.group, name))
-            agg_data[(aggregator.group, name)] = f(agg_data)
-
-    collected = agg_data.groupby(
-        [
-            "matchId",
-            "match_date",
-            "competition",
-            "season",
-            "player_name",
-            "team",
-            "opponent",
-            "position",
-            "is_home_team",
-        ]
-    ).sum()[
-        aggregated_cols
-    ]  # agg({k: "sum" for k in aggregated_cols})
-    minutes_df = WF.minutes_per_position(dataframe)
+    """
+    Aggregates whoscored events to one row per match, player and position, with a column for every selected aggregator.
+
+    Every aggregator, the minutes played and the rollup are independent per match, so with `n_workers` > 1 the events
+    are sharded by `matchId` into batches of `matches_per_shard` matches, which are aggregated in a process pool.
+    Shards are built from the sorted match ids and their results concatenated in that order, so the output is
+    identical to a single-process run.  Worker processes import the built-in aggregators; custom aggregators have
+    to be importable by the workers as well on platforms that spawn rather than fork processes.
+
+    Args:
+        dataframe (pd.DataFrame): The events
+        persistent_only (bool): If True, only persistent aggregators are output
+        groups (Optional[List[str]]): If provided, only aggregators of these groups are output
+        columns (Optional[List[str]]): If provided, only these aggregated columns are output
+        n_workers (int): The number of worker processes. 1 aggregates in the current process
+        matches_per_shard (Optional[int]): The number of matches per shard. Defaults to 4 shards per worker
+        profile (bool): If True, the calls, wall time and memory of every aggregator, helper and stage are profiled
+            (see `AggregationProfiler`), and the report is stored in the `profile` attribute of the result as a
+            list of records
+
+    Returns:
+        pd.DataFrame: The aggregated data
+    """
+    return generate_aggregate_levels(
+        dataframe,
+        ("player",),
+        persistent_only,
+        groups,
+        columns,
+        n_workers,
+        matches_per_shard,
+        profile,
+    )["player"]
+
+
+def generate_aggregate_levels(
+    dataframe: pd.DataFrame,
+    levels: Sequence[str] = LEVELS,
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    n_workers: int = 1,
+    matches_per_shard: Optional[int] = None,
+    profile: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Aggregates whoscored events to several levels in a single pass: the aggregators are evaluated once, and their
+    outputs rolled up to every requested level.
+
+    - "player": one row per match, player and position, as returned by `generate_aggregate_dataframe`
+    - "team": one row per match and team, with the team's totals of every aggregated column, and the opponent's
+      totals of the same match in matching `<name>_against` columns.  Team totals include the events that have no
+      player attached, which a rollup of the player level would drop.
+
+    Args:
+        dataframe (pd.DataFrame): The events
+        levels (Sequence[str]): The levels to aggregate to
+        persistent_only (bool): If True, only persistent aggregators are output
+        groups (Optional[List[str]]): If provided, only aggregators of these groups are output
+        columns (Optional[List[str]]): If provided, only these aggregated columns are output
+        n_workers (int): The number of worker processes. 1 aggregates in the current process
+        matches_per_shard (Optional[int]): The number of matches per shard. Defaults to 4 shards per worker
+        profile (bool): If True, the aggregation is profiled (see `generate_aggregate_dataframe`)
+
+    Returns:
+        Dict[str, pd.DataFrame]: The aggregated data of every level
+    """
+    unknown = set(levels) - set(LEVELS)
+    if unknown:
+        raise ValueError(f"Unknown aggregation levels: {sorted(unknown)}")
+    if n_workers > 1:
+        return _generate_sharded(
+            dataframe,
+            persistent_only,
+            groups,
+            columns,
+            n_workers,
+            matches_per_shard,
+            profile,
+            tuple(levels),
+        )
+    return _generate_levels(
+        dataframe, persistent_only, groups, columns, profile, tuple(levels)
+    )
+
+
+OUTPUT_KEYS = [
+    ("match_id", ""),
+    ("match_date", ""),
+    ("comp", ""),
+    ("season", ""),
+    ("player_name", ""),
+    ("team", ""),
+    ("opponent", ""),
+    ("position", ""),
+    ("is_home", ""),
+]
+
+
+def update_aggregate_dataframe(
+    aggregated: pd.DataFrame,
+    new_events: pd.DataFrame,
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    n_workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Upserts newly arrived matches into an existing output of `generate_aggregate_dataframe`.
+
+    Only the matches present in `new_events` are aggregated; their rows replace any existing rows for the same match,
+    and every other match is kept as is.  `new_events` therefore has to contain all the events of each match it
+    touches.  The result is ordered like a full run, so it is identical to aggregating all the events from scratch.
+
+    Args:
+        aggregated (pd.DataFrame): The existing aggregated data
+        new_events (pd.DataFrame): The events of the new (or re-delivered) matches
+        persistent_only (bool): Must match the value the existing data was generated with
+        groups (Optional[List[str]]): Must match the value the existing data was generated with
+        columns (Optional[List[str]]): Must match the value the existing data was generated with
+        n_workers (int): The number of worker processes used to aggregate the new matches
+
+    Returns:
+        pd.DataFrame: The updated aggregated data
+    """
+    fresh = generate_aggregate_dataframe(
+        new_events, persistent_only, groups, columns, n_workers=n_workers
+    )
+    if len(aggregated.columns) and list(fresh.columns) != list(aggregated.columns):
+        raise ValueError(
+            "The aggregated columns of the new events do not match the existing data. "
+            "Use the same persistent_only, groups and columns arguments as the original run."
+        )
+    if aggregated.empty:
+        # nothing to keep; an empty frame may not even have the key columns
+        return fresh
+
+    kept = aggregated.loc[
+        ~aggregated[("match_id", "")].isin(new_events["matchId"].unique())
+    ]
+    updated = pd.concat([kept, fresh], ignore_index=True)
+    updated = updated.sort_values(OUTPUT_KEYS, kind="mergesort").reset_index(drop=True)
+    updated.attrs = fresh.attrs
+    return updated
+
+
+def working_set(
+    dataframe: pd.DataFrame, extra_columns: Sequence[str] = ()
+) -> pd.DataFrame:
+    """
+    Builds the narrow frame aggregators are evaluated on: the group keys, `WORKING_COLUMNS` and the extra columns
+    the aggregators declare, with integer outcomes as int8.
+
+    The event type column is kept as it is, so aggregators comparing it against `EventType` members keep working.
+    Its integer ids are computed once and attached to the working set, which is what the vectorised event type
+    helpers (eg. `col_is_event_type`) compare on.
+
+    The raw qualifiers are not part of the working set.  Their index is built (or fetched) from the input frame
+    and attached to the working set, so qualifier lookups work on it as they would on the input.  The input frame
+    is never modified.
+
+    Args:
+        dataframe (pd.DataFrame): The events
+        extra_columns (Sequence[str]): Columns to keep on top of the group keys and `WORKING_COLUMNS`
+
+    Returns:
+        pd.DataFrame: The working set, with the same index as the events
+    """
+    columns = [
+        c
+        for c in dict.fromkeys(GROUP_KEYS + WORKING_COLUMNS + list(extra_columns))
+        if c in dataframe.columns
+    ]
+    working = pd.DataFrame(
+        {c: dataframe[c].array for c in columns}, index=dataframe.index
+    )
+    if "event_type" in working.columns:
+        event_type_codes = WF.encode_event_types(working["event_type"])
+        frame_cached(working, "event_type_codes", lambda: event_type_codes)
+    if "outcomeType" in working.columns and working["outcomeType"].dtype.kind in "iu":
+        working["outcomeType"] = working["outcomeType"].astype(np.int8)
+    if "qualifiers" in dataframe.columns:
+        qualifier_index = get_qualifier_index(dataframe)
+        frame_cached(working, "qualifier_index", lambda: qualifier_index)
+    return working
+
+
+def _match_shards(
+    dataframe: pd.DataFrame, n_workers: int, matches_per_shard: Optional[int]
+) -> List[pd.DataFrame]:
+    match_ids = np.sort(dataframe["matchId"].dropna().unique())
+    if matches_per_shard is None:
+        matches_per_shard = max(1, math.ceil(len(match_ids) / (n_workers * 4)))
+    shard_of_match = pd.Series(
+        np.arange(len(match_ids)) // matches_per_shard, index=match_ids
+    )
+    shard_ids = dataframe["matchId"].map(shard_of_match)
+    return [shard for _, shard in dataframe.groupby(shard_ids, sort=True)]
+
+
+def _generate_shard(args) -> Dict[str, pd.DataFrame]:
+    from footmav.event_aggregation import aggregators  # noqa: F401
+
+    return _generate_levels(*args)
+
+
+def _generate_sharded(
+    dataframe: pd.DataFrame,
+    persistent_only,
+    groups,
+    columns,
+    n_workers: int,
+    matches_per_shard: Optional[int],
+    profile: bool = False,
+    levels: Tuple[str, ...] = ("player",),
+) -> Dict[str, pd.DataFrame]:
+    shards = _match_shards(dataframe, n_workers, matches_per_shard)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        results = list(
+            executor.map(
+                _generate_shard,
+                [
+                    (shard, persistent_only, groups, columns, profile, levels)
+                    for shard in shards
+                ],
+            )
+        )
+    if not results:
+        return _generate_levels(
+            dataframe, persistent_only, groups, columns, profile, levels
+        )
+
+    first = results[0][levels[0]]
+    attrs = {
+        "aggregation_cache": {
+            k: sum(r[levels[0]].attrs["aggregation_cache"][k] for r in results)
+            for k in first.attrs["aggregation_cache"]
+        },
+        "execution_plan": first.attrs["execution_plan"],
+        "shards": len(results),
+    }
+    if profile:
+        attrs["profile"] = combine_reports(
+            [r[levels[0]].attrs["profile"] for r in results]
+        )
+
+    collected = {}
+    for level in levels:
+        collected[level] = pd.concat([r[level] for r in results], ignore_index=True)
+        collected[level].attrs = dict(attrs)
+    return collected
+
+
+def _generate(
+    dataframe: pd.DataFrame,
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    profile: bool = False,
+) -> pd.DataFrame:
+    return _generate_levels(
+        dataframe, persistent_only, groups, columns, profile, ("player",)
+    )["player"]
+
+
+def _generate_levels(
+    dataframe: pd.DataFrame,
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    profile: bool = False,
+    levels: Tuple[str, ...] = ("player",),
+) -> Dict[str, pd.DataFrame]:
+    if profile:
+        with AggregationProfiler() as profiler:
+            results = _generate_levels(
+                dataframe, persistent_only, groups, columns, False, levels
+            )
+        report = profiler.report().to_dict("records")
+        for result in results.values():
+            result.attrs["profile"] = report
+        return results
+
+    plan = build_execution_plan(persistent_only, groups, columns)
+    with profiled("working_set", "stage"):
+        working = working_set(dataframe, plan.columns)
+    outputs = {}
+    for step in plan:
+        if step.output:
+            outputs[step.column] = np.asarray(step.function(working))
+        else:
+            step.function(working)
+    outputs = {col: outputs[col] for col in plan.output_columns}
+
+    results = {}
+    if "player" in levels:
+        results["player"] = _player_rollup(working, outputs)
+    if "team" in levels:
+        results["team"] = _team_rollup(working, _team_outputs(plan, working, outputs))
+
+    attrs = {
+        "aggregation_cache": get_aggregation_cache(working).stats(),
+        "execution_plan": plan.to_frame().to_dict("records"),
+    }
+    for result in results.values():
+        result.attrs.update(attrs)
+    return results
+
+
+def _player_rollup(
+    working: pd.DataFrame, outputs: Dict[Tuple[str, str], np.ndarray]
+) -> pd.DataFrame:
+    with profiled("rollup", "stage"):
+        collected = sum_by_keys(working[GROUP_KEYS], outputs)
+    with profiled("minutes_per_position", "stage"):
+        minutes_df = WF.minutes_per_position(working)
     _merge = pd.merge(
         collected, minutes_df, on=["matchId", "player_name", "position"], how="left"
     )
 
     collected[("minutes", "minutes")] = _merge["minutes"].tolist()
     collected.columns = pd.MultiIndex.from_tuples(collected.columns)
-    dataframe = collected.reset_index().rename(
-        columns={
-            "matchId": "match_id",
-            "is_home_team": "is_home",
-            "competition": "comp",
-        }
-    )
+    return collected.reset_index().rename(columns=OUTPUT_RENAMES)
 
-    return dataframe
+
+def _team_outputs(
+    plan: ExecutionPlan,
+    working: pd.DataFrame,
+    outputs: Dict[Tuple[str, str], np.ndarray],
+) -> Dict[Tuple[str, str], np.ndarray]:
+    # aggregators whose player level outputs do not add up to the team's (see `team_function`) are evaluated again
+    team_outputs = dict(outputs)
+    for step in plan:
+        team_function = step.aggregator.team_function
+        if (
+            step.output
+            and team_function is not None
+            and step.name == step.aggregator.col_name
+        ):
+            team_outputs[step.column] = np.asarray(
+                profiled_call(step.name, "team", lambda: team_function(working))
+            )
+    return team_outputs
+
+
+def _team_rollup(
+    working: pd.DataFrame, outputs: Dict[Tuple[str, str], np.ndarray]
+) -> pd.DataFrame:
+    with profiled("team_rollup", "stage"):
+        team_for = sum_by_keys(working[TEAM_KEYS], outputs)
+
+        # the opponent's totals of the same match are the team's totals against
+        keys = team_for.index.to_frame(index=False)
+        team_index = pd.MultiIndex.from_frame(keys[["matchId", "team"]])
+        opponent_rows = team_index.get_indexer(
+            pd.MultiIndex.from_frame(
+                keys[["matchId", "opponent"]].rename(columns={"opponent": "team"})
+            )
+        )
+        has_opponent = opponent_rows >= 0
+        against = {}
+        for (group, name), values in team_for.items():
+            values = values.to_numpy()
+            against[(group, f"{name}_against")] = np.where(
+                has_opponent, values[np.maximum(opponent_rows, 0)], 0
+            ).astype(values.dtype)
+
+        collected = pd.concat(
+            [team_for, pd.DataFrame(against, index=team_for.index)], axis=1
+        )
+    collected.columns = pd.MultiIndex.from_tuples(collected.columns)
+    return collected.reset_index().rename(columns=OUTPUT_RENAMES)
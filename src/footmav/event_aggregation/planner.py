@@ -0,0 +1,161 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from footmav.event_aggregation.event_aggregator_processor import (
+    EventAggregationProcessor,
+)
+
+
+class PlanStep:
+    """
+    A single node of an execution plan: one output of one aggregator.
+
+    Attributes:
+        aggregator (EventAggregationProcessor): The aggregator the output belongs to
+        name (str): The name of the output, ie. the aggregated column name
+        function (Callable[[pd.DataFrame], pd.Series]): The (memoized) function computing the output
+        depends_on (List[str]): The names of the steps that have to be evaluated before this one
+        output (bool): Whether the step is one of the requested output columns, or only a dependency of one
+    """
+
+    def __init__(
+        self,
+        aggregator: EventAggregationProcessor,
+        name: str,
+        function: Callable[[pd.DataFrame], pd.Series],
+        depends_on: List[str],
+    ):
+        self.aggregator = aggregator
+        self.name = name
+        self.function = function
+        self.depends_on = depends_on
+        self.output = False
+
+    @property
+    def group(self) -> str:
+        return self.aggregator.group
+
+    @property
+    def column(self) -> Tuple[str, str]:
+        return (self.group, self.name)
+
+    def __repr__(self) -> str:
+        return f"<PlanStep({self.name})>"
+
+
+class ExecutionPlan:
+    """
+    Topologically ordered list of the aggregator outputs needed to produce a set of aggregated columns.
+
+    Attributes:
+        steps (List[PlanStep]): The steps, in evaluation order
+        output_columns (List[Tuple[str, str]]): The requested (group, name) columns, in registration order
+    """
+
+    def __init__(self, steps: List[PlanStep], output_columns: List[Tuple[str, str]]):
+        self.steps = steps
+        self.output_columns = output_columns
+
+    def __iter__(self) -> Iterator[PlanStep]:
+        return iter(self.steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        The event columns the aggregators of the plan read on top of the working set columns
+        """
+        return list(
+            dict.fromkeys(c for step in self.steps for c in step.aggregator.columns)
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the plan as a dataframe, one row per step in evaluation order
+
+        Returns:
+            pd.DataFrame: The plan, with the aggregator, group, output name, dependencies and output flag of every step
+        """
+        return pd.DataFrame(
+            [
+                {
+                    "aggregator": step.aggregator.name,
+                    "group": step.group,
+                    "name": step.name,
+                    "depends_on": step.depends_on,
+                    "output": step.output,
+                }
+                for step in self.steps
+            ]
+        )
+
+
+def _graph() -> Dict[str, PlanStep]:
+    steps: Dict[str, PlanStep] = {}
+    for aggregator in EventAggregationProcessor.aggregators.values():
+        steps[aggregator.col_name] = PlanStep(
+            aggregator,
+            aggregator.col_name,
+            aggregator,
+            [
+                EventAggregationProcessor.aggregators[d].col_name
+                for d in aggregator.depends_on
+            ],
+        )
+        for name, f in aggregator.extra_functions.items():
+            steps[name] = PlanStep(aggregator, name, f, [aggregator.col_name])
+    return steps
+
+
+def build_execution_plan(
+    persistent_only: bool = True,
+    groups: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> ExecutionPlan:
+    """
+    Builds the execution plan for a set of aggregated columns.  Only the requested columns and the aggregators
+    they depend on are part of the plan, ordered so that every step comes after its dependencies.
+
+    Args:
+        persistent_only (bool): If True, only persistent aggregators are output
+        groups (Optional[List[str]]): If provided, only aggregators of these groups are output
+        columns (Optional[List[str]]): If provided, only these aggregated columns are output
+
+    Returns:
+        ExecutionPlan: The execution plan
+    """
+    graph = _graph()
+    output_names = [
+        name
+        for name, step in graph.items()
+        if not (persistent_only and not step.aggregator.persistent)
+        and not (groups and step.group not in groups)
+        and not (columns and name not in columns)
+    ]
+    if columns:
+        missing = set(columns) - set(graph)
+        if missing:
+            raise ValueError(f"Unknown aggregated columns: {sorted(missing)}")
+
+    ordered: List[PlanStep] = []
+    state: Dict[str, str] = {}
+
+    def _visit(name: str, path: List[str]):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(
+                f"Circular aggregator dependency: {' -> '.join(path + [name])}"
+            )
+        state[name] = "visiting"
+        for dependency in graph[name].depends_on:
+            _visit(dependency, path + [name])
+        state[name] = "done"
+        ordered.append(graph[name])
+
+    for name in output_names:
+        graph[name].output = True
+        _visit(name, [])
+
+    return ExecutionPlan(ordered, [graph[name].column for name in output_names])
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import inspect
+import time
+import tracemalloc
+import pandas as pd
+from footmav.utils import whoscored_funcs as WF
+
+PROFILE_COLUMNS = [
+    "name",
+    "kind",
+    "calls",
+    "total_time",
+    "self_time",
+    "memory_delta",
+]
+
+_ACTIVE: List["AggregationProfiler"] = []
+
+
+class AggregationProfiler:
+    """
+    Opt-in profiler for event aggregation.  While active (as a context manager), it records the number of calls,
+    the wall time and the net memory allocated by every aggregator, extra function, `whoscored_funcs` helper and
+    generator stage.
+
+    `total_time` includes the time spent in nested calls (eg. `goals` calling `shots`), while `self_time` excludes
+    it, so the `self_time` of all the entries adds up to the profiled time.  Memoized aggregators are counted on
+    every call, but only pay for the computation on the first one.  Tracing memory slows everything down, so
+    times measured with `track_memory` are best compared with each other rather than with unprofiled runs.
+
+    Helpers are profiled by replacing the functions of the `whoscored_funcs` module for as long as the profiler is
+    active, and the active profilers are shared by the whole process.  The functions are restored when the
+    profiler exits, including through an exception.  The profiler is therefore not thread-safe: calls made by other
+    threads while it is active are recorded as well, and profiling from several threads at once mixes up their
+    reports.
+
+    Attributes:
+        track_memory (bool): Whether memory deltas are traced (with `tracemalloc`)
+        helpers (bool): Whether the public functions of `whoscored_funcs` are profiled as well
+    """
+
+    def __init__(self, track_memory: bool = True, helpers: bool = True):
+        self.track_memory = track_memory
+        self.helpers = helpers
+        self._stats: Dict[Tuple[str, str], List[float]] = {}
+        self._children: List[float] = []
+        self._patched: Dict[str, Callable] = {}
+        self._started_tracing = False
+
+    def __enter__(self) -> "AggregationProfiler":
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        try:
+            if self.helpers and not _ACTIVE:
+                self._patch_helpers()
+        except BaseException:
+            self.__exit__()
+            raise
+        _ACTIVE.append(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            if self in _ACTIVE:
+                _ACTIVE.remove(self)
+        finally:
+            self._restore_helpers()
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    @contextmanager
+    def measure(self, name: str, kind: str) -> Iterator[None]:
+        """
+        Records a call of a profiled function
+
+        Args:
+            name (str): The name of the function
+            kind (str): The kind of function (eg. "aggregator", "helper" or "stage")
+        """
+        memory_before = self._traced_memory()
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            stats = self._stats.setdefault((name, kind), [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += elapsed - children
+            stats[3] += self._traced_memory() - memory_before
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns the recorded statistics, most expensive first
+
+        Returns:
+            pd.DataFrame: One row per profiled function, with its name, kind, number of calls, total time and self time
+                (in seconds) and net memory allocated (in bytes, 0 if memory is not traced)
+        """
+        return _sort_report(
+            pd.DataFrame(
+                [[name, kind, *stats] for (name, kind), stats in self._stats.items()],
+                columns=PROFILE_COLUMNS,
+            )
+        )
+
+    def _traced_memory(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def _patch_helpers(self) -> None:
+        for name, f in list(vars(WF).items()):
+            if (
+                not name.startswith("_")
+                and inspect.isfunction(f)
+                and f.__module__ == WF.__name__
+            ):
+                self._patched[name] = f
+                setattr(WF, name, _profiled_function(name, "helper", f))
+
+    def _restore_helpers(self) -> None:
+        for name, f in self._patched.items():
+            setattr(WF, name, f)
+        self._patched.clear()
+
+
+def active_profiler() -> Optional[AggregationProfiler]:
+    """
+    Returns the innermost active profiler, if any
+
+    Returns:
+        Optional[AggregationProfiler]: The active profiler, or None if nothing is being profiled
+    """
+    return _ACTIVE[-1] if _ACTIVE else None
+
+
+@contextmanager
+def profiled(name: str, kind: str) -> Iterator[None]:
+    """
+    Records the enclosed block with the active profiler, and does nothing if profiling is off
+
+    Args:
+        name (str): The name of the profiled block
+        kind (str): The kind of block
+    """
+    profiler = active_profiler()
+    if profiler is None:
+        yield
+    else:
+        with profiler.measure(name, kind):
+            yield
+
+
+def profiled_call(name: str, kind: str, f: Callable[[], Any]) -> Any:
+    """
+    Calls a function, recording it with the active profiler if there is one
+
+    Args:
+        name (str): The name to record the call under
+        kind (str): The kind of function
+        f (Callable[[], Any]): The function
+
+    Returns:
+        Any: The return value of the function
+    """
+    profiler = active_profiler()
+    if profiler is None:
+        return f()
+    with profiler.measure(name, kind):
+        return f()
+
+
+def combine_reports(reports: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Adds up profile reports (as lists of records), eg. from the shards of a sharded run
+
+    Args:
+        reports (List[List[Dict[str, Any]]]): The reports
+
+    Returns:
+        List[Dict[str, Any]]: The combined report, as a list of records
+    """
+    combined = pd.DataFrame(
+        [record for report in reports for record in report], columns=PROFILE_COLUMNS
+    )
+    combined = combined.groupby(["name", "kind"], as_index=False, sort=False).sum()
+    return _sort_report(combined).to_dict("records")
+
+
+def _sort_report(report: pd.DataFrame) -> pd.DataFrame:
+    return report.sort_values(
+        ["self_time", "name"], ascending=[False, True], kind="mergesort"
+    ).reset_index(drop=True)
+
+
+def _profiled_function(name: str, kind: str, f: Callable) -> Callable:
+    @wraps(f)
+    def _wrapper(*args, **kwargs):
+        return profiled_call(name, kind, lambda: f(*args, **kwargs))
+
+    return _wrapper
@@ -0,0 +1,67 @@
+from typing import Dict, Hashable, Tuple
+import numpy as np
+import pandas as pd
+
+
+def factorize_keys(keys: pd.DataFrame) -> Tuple[np.ndarray, int]:
+    """
+    Maps every row of a frame of group keys to a dense integer group id, in one pass per key column.
+
+    The ids follow the lexicographic order of the keys (like `groupby(sort=True)`), and rows with a missing value in
+    any key get id -1 (like `groupby(dropna=True)`).  Key codes are combined one column at a time and re-compressed
+    after every step, so the combined id never overflows however many keys or distinct values there are.
+
+    Args:
+        keys (pd.DataFrame): The group key columns
+
+    Returns:
+        Tuple[np.ndarray, int]: The group id of every row, and the number of groups
+    """
+    valid = ~keys.isna().any(axis=1).to_numpy()
+    ids = np.zeros(int(valid.sum()), dtype=np.int64)
+    for column in keys.columns:
+        codes, uniques = pd.factorize(keys[column].to_numpy()[valid], sort=True)
+        ids, _ = pd.factorize(ids * len(uniques) + codes, sort=True)
+    n_groups = int(ids.max()) + 1 if len(ids) else 0
+
+    group_ids = np.full(len(keys), -1, dtype=np.int64)
+    group_ids[valid] = ids
+    return group_ids, n_groups
+
+
+def sum_by_keys(keys: pd.DataFrame, values: Dict[Hashable, np.ndarray]) -> pd.DataFrame:
+    """
+    Sums value columns per group of keys.  Equivalent to `pd.concat([keys, values]).groupby(keys).sum()[values]`,
+    but the keys are factorized once into a dense id, every column is summed with a single `np.bincount`, and the
+    descriptive key values are only joined back onto the (much smaller) result at the end.
+
+    Boolean and integer columns are summed to integer counts, everything else to floats, with missing values counting as 0.
+
+    Args:
+        keys (pd.DataFrame): The group key columns
+        values (Dict[Hashable, np.ndarray]): The columns to sum, by output column name
+
+    Returns:
+        pd.DataFrame: The sums, one row per group, indexed by the group keys
+    """
+    group_ids, n_groups = factorize_keys(keys)
+    grouped = group_ids >= 0
+    ids = group_ids[grouped]
+
+    sums: Dict[Hashable, np.ndarray] = {}
+    for name, column in values.items():
+        column = np.asarray(column)[grouped]
+        if column.dtype.kind in "biu":
+            sums[name] = np.bincount(
+                ids, weights=column.astype(float), minlength=n_groups
+            ).astype(np.int64)
+        else:
+            sums[name] = np.bincount(
+                ids,
+                weights=np.nan_to_num(column.astype(float)),
+                minlength=n_groups,
+            )
+
+    _, first_rows = np.unique(ids, return_index=True)
+    index = pd.MultiIndex.from_frame(keys.loc[grouped].iloc[first_rows])
+    return pd.DataFrame(sums, index=index, columns=list(values))
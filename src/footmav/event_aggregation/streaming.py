@@ -0,0 +1,70 @@
+from typing import Callable, Iterable, Iterator, Optional, Set, Union
+import os
+import pandas as pd
+from footmav.event_aggregation.generator import _generate
+from footmav.utils.whoscored_funcs import encode_event_types
+
+EventSource = Union[pd.DataFrame, str, os.PathLike]
+
+
+def read_match_events(path: Union[str, os.PathLike]) -> pd.DataFrame:
+    """
+    Reads the events of a match from a json file of event records, as written by `DataFrame.to_json(orient="records")`.
+
+    Event types stored as their integer ids are kept as compact integer ids (see `encode_event_type_column`), which
+    every event helper handles the same as `EventType` members.
+
+    Args:
+        path (Union[str, os.PathLike]): Path to the json file
+
+    Returns:
+        pd.DataFrame: The events
+    """
+    events = pd.read_json(path, orient="records", convert_dates=["match_date"])
+    if "event_type" in events.columns and events["event_type"].dtype.kind in "iu":
+        events["event_type"] = encode_event_types(events["event_type"])
+    return events
+
+
+def stream_aggregate_dataframe(
+    sources: Iterable[EventSource],
+    persistent_only=True,
+    groups=None,
+    columns=None,
+    loader: Optional[Callable[[Union[str, os.PathLike]], pd.DataFrame]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Aggregates whoscored events one chunk at a time, yielding the match-level rows of every chunk as soon as it is done.
+
+    Each source is either a dataframe of events or a path to a file of events, and must hold every event of the
+    matches it contains (typically one file per match).  Sources are consumed lazily, so only one chunk is ever
+    held in memory and peak memory is bounded by the largest chunk rather than the whole history.  Dataframes
+    passed in are left untouched.  Concatenating the yielded frames gives the same rows as
+    `generate_aggregate_dataframe` on all the events, ordered by source.
+
+    Args:
+        sources (Iterable[EventSource]): The event chunks, as dataframes or file paths
+        persistent_only (bool): If True, only persistent aggregators are output
+        groups (Optional[List[str]]): If provided, only aggregators of these groups are output
+        columns (Optional[List[str]]): If provided, only these aggregated columns are output
+        loader (Optional[Callable]): Reads a file path into an event dataframe. Defaults to `read_match_events`
+
+    Yields:
+        pd.DataFrame: The aggregated data of each chunk
+    """
+    loader = loader or read_match_events
+    seen_matches: Set = set()
+    for source in sources:
+        events = source if isinstance(source, pd.DataFrame) else loader(source)
+        if events.empty:
+            continue
+
+        match_ids = set(events["matchId"].dropna().unique())
+        repeated = match_ids & seen_matches
+        if repeated:
+            raise ValueError(
+                f"Events of matches {sorted(repeated)} are split across several sources"
+            )
+        seen_matches |= match_ids
+
+        yield _generate(events, persistent_only, groups, columns)
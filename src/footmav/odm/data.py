@@ -1,10 +1,15 @@
-from typing import Callable, Iterable, List, Union
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional, Union
 import pandas as pd
 from footmav.data_definitions.base import DataAttribute
 import inspect
 
 from footmav.data_definitions.derived import DerivedDataAttribute
 
+if TYPE_CHECKING:
+    from footmav.data_definitions.data_sources import DataSource
+    from footmav.odm.lazy import LazyData
+    from footmav.odm.store import MatchStore
+
 
 class Data:
     """
@@ -16,17 +21,33 @@ class Data:
 
     Because dataframe indexes are evil, the Data class also stores a list of unique keys that can be used
     to figure out how the dataframe is currently aggregated, for purposes of validation and merges.
+
+    Data objects are copy-on-write: neither a Data object nor an operation on it ever modifies a dataframe in
+    place.  A new Data object gets a new dataframe, which shares the buffers of the columns it leaves unchanged
+    with its input and replaces (rather than overwrites) the columns it writes.  Derived Data objects, and the
+    original data, are therefore isolated from each other without copying the whole dataframe at every step.
+
+    Derived attributes can be deferred: they are only calculated (materialized) the first time they are needed,
+    ie. when their column is accessed with `data[attribute]`, when the whole dataframe is accessed with `df`, or
+    when a pipeable operation reads them (see `PlanHint.materializes`).  Materialized attributes are cached on the
+    Data object.  Operations that do not read a deferred attribute which is recalculated on aggregation pass it on,
+    still deferred, to the Data object they return, which calculates it from its own data.
     """
 
     def __init__(
         self,
         data: pd.DataFrame,
-        original_data: pd.DataFrame = None,
+        original_data: Union[pd.DataFrame, "Data"] = None,
         unique_keys: List[DataAttribute] = None,
+        deferred_attributes: Optional[Iterable[DerivedDataAttribute]] = None,
     ):
         self._data = data
+        self._deferred = [
+            c for c in deferred_attributes or [] if c.N not in data.columns
+        ]
         if original_data is None:
-            self._original_data = data
+            # with deferred attributes, the original data is the materialized data of this object
+            self._original_data = self if self._deferred else data
         else:
             self._original_data = original_data
         if unique_keys is None:
@@ -42,17 +63,86 @@ class Data:
         Returns:
             int: The number of records in the dataset
         """
-        return len(self.df)
+        return len(self._data)
 
     @property
     def df(self) -> pd.DataFrame:
         """
-        Returns the raw dataframe stored in the Data object
+        Returns the raw dataframe stored in the Data object, materializing every deferred attribute
 
         Returns:
             pd.DataFrame: The raw dataframe stored in the Data object
         """
-        return self._data
+        return self.materialize()
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Returns the columns of the Data object, including the deferred attributes, without materializing them
+
+        Returns:
+            List[str]: The columns of the Data object
+        """
+        return list(self._data.columns) + [c.N for c in self._deferred]
+
+    @property
+    def deferred_attributes(self) -> List[DerivedDataAttribute]:
+        """
+        Returns the derived attributes of the Data object that are not materialized yet
+
+        Returns:
+            List[DerivedDataAttribute]: The deferred attributes
+        """
+        return list(self._deferred)
+
+    def materialize(
+        self, attributes: Optional[Iterable[Union[DataAttribute, str]]] = None
+    ) -> pd.DataFrame:
+        """
+        Materializes deferred attributes, along with the deferred attributes they are calculated from.  The
+        results are cached on the Data object, in a new dataframe (the previous one is left unchanged).  Like
+        `FbRefData` used to on construction, an attribute that fails to calculate is reported and dropped.
+
+        Args:
+            attributes (Optional[Iterable[Union[DataAttribute, str]]]): The attributes (or column names) to
+                materialize. Attributes that are not deferred are ignored. Defaults to every deferred attribute
+
+        Returns:
+            pd.DataFrame: The dataframe of the Data object, holding at least the requested attributes
+        """
+        if not self._deferred:
+            return self._data
+        if attributes is None:
+            to_materialize = list(self._deferred)
+        else:
+            to_materialize = self._deferred_closure(
+                {a.N if isinstance(a, DataAttribute) else a for a in attributes}
+            )
+        if not to_materialize:
+            return self._data
+
+        df = self._data.copy(deep=False)
+        for c in to_materialize:
+            try:
+                df[c.N] = c.apply(df)
+            except Exception as e:
+                print(f"Error applying {c.N}: {e}")
+        self._data = df
+        self._deferred = [c for c in self._deferred if c not in to_materialize]
+        return df
+
+    def __getitem__(self, attribute: Union[DataAttribute, str]) -> pd.Series:
+        """
+        Returns the column of an attribute, materializing it if it is deferred
+
+        Args:
+            attribute (Union[DataAttribute, str]): The attribute, or the name of its column
+
+        Returns:
+            pd.Series: The column
+        """
+        name = attribute.N if isinstance(attribute, DataAttribute) else attribute
+        return self.materialize([name])[name]
 
     @property
     def unique_keys(self) -> List[DataAttribute]:
@@ -73,6 +163,19 @@ class Data:
         Returns:
             pd.DataFrame: The original dataframe stored in the Data object
         """
+        if isinstance(self._original_data, Data):
+            return self._original_data.df
+        return self._original_data
+
+    @property
+    def original_source(self) -> Union[pd.DataFrame, "Data"]:
+        """
+        Returns the original data as it should be passed on to derived Data objects: the original dataframe, or
+        the Data object it is materialized from, so that passing it on does not materialize it
+
+        Returns:
+            Union[pd.DataFrame, Data]: The original data
+        """
         return self._original_data
 
     def pipe(self, func: Callable[..., "Data"], *args, **kwargs) -> "Data":
@@ -93,21 +196,78 @@ class Data:
         else:
             return func(self, *args, **kwargs)
 
+    def lazy(self) -> "LazyData":
+        """
+        Starts a lazy plan on the Data object: functions piped to the plan are only recorded, and are optimized
+        and run together when the plan is collected
+
+        Returns:
+            LazyData: An empty lazy plan on the Data object
+        """
+        from footmav.odm.lazy import LazyData
+
+        return LazyData(self)
+
+    @staticmethod
+    def from_store(
+        store: "MatchStore",
+        source: Union["DataSource", str],
+        competitions: Optional[Iterable[str]] = None,
+        seasons: Optional[Iterable[Any]] = None,
+    ) -> "LazyData":
+        """
+        Opens a slice of a `MatchStore` lazily: nothing is read until the returned plan is collected, and then
+        only the columns and rows the plan needs (see `LazyData`)
+
+        Args:
+            store (MatchStore): The store
+            source (Union[DataSource, str]): The source of the data
+            competitions (Optional[Iterable[str]]): The competitions to open. Defaults to all of them
+            seasons (Optional[Iterable[Any]]): The seasons to open. Defaults to all of them
+
+        Returns:
+            LazyData: An empty lazy plan on the slice
+        """
+        from footmav.odm.lazy import LazyData
+
+        return LazyData(store.scan(source, competitions, seasons))
+
     def with_attributes(
         self, attributes: Union[Iterable[DerivedDataAttribute], DerivedDataAttribute]
     ) -> "Data":
         """
-        Add provided attributes to the Data object
+        Add provided attributes to the Data object.  The Data object itself is left unchanged.
 
         Args:
             attributes (Union[Iterable[DerivedDataAttribute], DerivedDataAttribute]): The attributes to add to the Data object
 
         Returns:
-            Data: The Data object with the provided attributes added
+            Data: A new Data object with the provided attributes added
 
         """
         if isinstance(attributes, DerivedDataAttribute):
             attributes = [attributes]
+        attributes = list(attributes)
+        inputs = [a.inputs for a in attributes]
+        if any(i is None for i in inputs):
+            df = self.materialize()
+        else:
+            df = self.materialize([a for i in inputs for a in i])
+        df = df.copy(deep=False)
         for attr in attributes:
-            self.df[attr.N] = attr.apply(self.df)
-        return self
+            df[attr.N] = attr.apply(df)
+        return Data(df, self.original_source, self.unique_keys, self._deferred)
+
+    def _deferred_closure(self, names: set) -> List[DerivedDataAttribute]:
+        # derived attributes are calculated from attributes registered before them, so walking the deferred
+        # attributes backwards adds every input before reaching it
+        names = set(names)
+        for i in reversed(range(len(self._deferred))):
+            c = self._deferred[i]
+            if c.N not in names:
+                continue
+            if c.inputs is None:
+                names.update(d.N for d in self._deferred[:i])
+            else:
+                names.update(d.N for d in c.inputs)
+        return [c for c in self._deferred if c.N in names]
@@ -1,21 +1,48 @@
 from footmav.utils.cleanup import remove_non_top_5_teams
 from footmav.odm.data import Data
 from footmav.data_definitions.fbref import fbref_columns as fc
-from footmav.data_definitions.base import RegisteredAttributeStore
+from footmav.data_definitions.base import DataAttribute, RegisteredAttributeStore
 from footmav.data_definitions.derived import DerivedDataAttribute
 from footmav.data_definitions.data_sources import DataSource
+from footmav.odm.parquet import ParquetSource, projected_columns, scan_parquet
+from footmav.operations.filter import filter
+from footmav.operations.filter_objects import Filter
+from typing import List, Optional
 import pandas as pd
 
+# attributes of the match, which the duplicate rows of a player and date share. Filters on them give the same
+# result before and after the deduplication of the data, so they can be evaluated while reading
+MATCH_ATTRIBUTES = [
+    fc.PLAYER_ID,
+    fc.PLAYER,
+    fc.DATE,
+    fc.DAY_OF_WEEK,
+    fc.YEAR,
+    fc.COMPETITION,
+    fc.ROUND,
+    fc.VENUE,
+    fc.RESULT,
+    fc.TEAM,
+    fc.OPPONENT,
+]
+
 
 class FbRefData(Data):
     """
-    FbRef Data Object.  This object is used to access the data from the fbref data.
+    FbRef Data Object.  This object is used to access the data from the fbref data.  The fbref derived attributes
+    are deferred (see `Data`): they are only calculated when they are first needed.
 
     Attributes:
         data (pd.DataFrame): The dataframe containing the data.
+        derived_attributes (Optional[List[DerivedDataAttribute]]): The derived attributes to provide. Defaults to
+            every registered fbref derived attribute that is recalculated on aggregation.
     """
 
-    def __init__(self, data: pd.DataFrame):
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        derived_attributes: Optional[List[DerivedDataAttribute]] = None,
+    ):
         data = remove_non_top_5_teams(data).drop_duplicates([fc.PLAYER_ID.N, fc.DATE.N])
         derived_data_to_add = [
             c
@@ -23,10 +50,91 @@ class FbRefData(Data):
             if isinstance(c, DerivedDataAttribute)
             and c.source == DataSource.FBREF
             and c.recalculate_on_aggregation
+            and (derived_attributes is None or c in derived_attributes)
         ]
-        for c in derived_data_to_add:
-            try:
-                data[c.N] = c.apply(data)
-            except Exception as e:
-                print(f"Error applying {c.N} to fbref data: {e}")
-        super().__init__(data)
+        # derived attributes are only calculated once they are needed
+        super().__init__(data, deferred_attributes=derived_data_to_add)
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path: ParquetSource,
+        attributes: Optional[List[DataAttribute]] = None,
+        filters: Optional[List[Filter]] = None,
+    ) -> "FbRefData":
+        """
+        Loads fbref data from a parquet file, reading only the columns of the requested attributes and only the
+        row groups that can match the filters.  Requires pyarrow.
+
+        The result is the same as filtering `FbRefData(df)`, where the filters come after the removal of
+        duplicate rows and of the teams outside the top 5 leagues: only filters on `MATCH_ATTRIBUTES`, which these
+        steps do not depend on, are evaluated while reading, and the others are applied to the constructed data.
+
+        Args:
+            path (ParquetSource): The parquet file
+            attributes (Optional[List[DataAttribute]]): The attributes to load. Derived attributes are calculated
+                from their inputs, which are loaded as well. Defaults to every column and derived attribute
+            filters (Optional[List[Filter]]): Filters on the data to load
+
+        Returns:
+            FbRefData: The loaded data
+        """
+        return cls._from_parquet(path, attributes, filters)
+
+    @classmethod
+    def from_partitioned_parquet(
+        cls,
+        path: ParquetSource,
+        attributes: Optional[List[DataAttribute]] = None,
+        filters: Optional[List[Filter]] = None,
+        partitioning: str = "hive",
+    ) -> "FbRefData":
+        """
+        Loads fbref data from a partitioned parquet dataset (eg. one directory per competition and season), with
+        the same column projection and filter pushdown as `from_parquet`.  Filters on the partition keys skip
+        whole partitions without opening their files.  Requires pyarrow.
+
+        Args:
+            path (ParquetSource): The root directory of the dataset
+            attributes (Optional[List[DataAttribute]]): The attributes to load, see `from_parquet`
+            filters (Optional[List[Filter]]): Filters on the data to load
+            partitioning (str): The partitioning scheme of the dataset
+
+        Returns:
+            FbRefData: The loaded data
+        """
+        return cls._from_parquet(path, attributes, filters, partitioning)
+
+    @classmethod
+    def _from_parquet(
+        cls,
+        path: ParquetSource,
+        attributes: Optional[List[DataAttribute]],
+        filters: Optional[List[Filter]],
+        partitioning: Optional[str] = None,
+    ) -> "FbRefData":
+        filters = list(filters or [])
+        columns = None
+        if attributes is not None:
+            columns = projected_columns(
+                attributes, [fc.PLAYER_ID, fc.DATE, fc.TEAM], filters
+            )
+        match_columns = {a.N for a in MATCH_ATTRIBUTES}
+        df, residual = scan_parquet(
+            path,
+            columns,
+            [f for f in filters if f.attribute.N in match_columns],
+            partitioning,
+        )
+        residual += [f for f in filters if f.attribute.N not in match_columns]
+
+        derived_attributes = (
+            None
+            if attributes is None
+            else [a for a in attributes if isinstance(a, DerivedDataAttribute)]
+        )
+        data = cls(df, derived_attributes)
+        if residual:
+            # the remaining deferred attributes stay deferred
+            data = cls(data.pipe(filter, residual).materialize([]), derived_attributes)
+        return data
@@ -0,0 +1,366 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional, Set, Tuple
+from typing import Union
+import inspect
+from footmav.data_definitions.base import DataAttribute, RegisteredAttributeStore
+from footmav.data_definitions.derived import DerivedDataAttribute
+from footmav.odm.data import Data
+
+if TYPE_CHECKING:
+    from footmav.odm.store import StoreScan
+
+
+class PlanHint:
+    """
+    Describes how a pipeable operation can be rearranged in a lazy plan (see `LazyData`).  The base hint is a
+    barrier: filters are never moved across the operation, and it may read every column of its input.
+    """
+
+    def passes_filter(self, step: "LazyStep", filter_: Any) -> bool:
+        """
+        Whether a filter applied after the operation can be applied before it instead, with the same result
+
+        Args:
+            step (LazyStep): The recorded operation
+            filter_ (Filter): The filter
+
+        Returns:
+            bool: True if the filter can be moved before the operation
+        """
+        return False
+
+    def required_columns(
+        self, step: "LazyStep", downstream: Optional[Set[str]]
+    ) -> Optional[Set[str]]:
+        """
+        The columns the operation needs in its input, for the rest of the plan to read `downstream` from its output
+
+        Args:
+            step (LazyStep): The recorded operation
+            downstream (Optional[Set[str]]): The columns read from the output of the operation, None for all of them
+
+        Returns:
+            Optional[Set[str]]: The columns needed in the input, None for all of them
+        """
+        return None
+
+    def materializes(self, step: "LazyStep") -> Optional[List[DataAttribute]]:
+        """
+        The deferred derived attributes (see `Data`) the operation needs materialized in its input.  Operations
+        that return None need all of them.  Otherwise, the deferred attributes that are recalculated on aggregation
+        and that the operation does not need are passed on, still deferred, to its output: the operation has to
+        leave them valid, ie. calculating them from its output gives the same result as calculating them from its
+        input and applying the operation.
+
+        Args:
+            step (LazyStep): The operation and its arguments
+
+        Returns:
+            Optional[List[DataAttribute]]: The attributes to materialize, None for all of them
+        """
+        return None
+
+
+class Filtering(PlanHint):
+    """
+    Hint of an operation that only drops rows, according to a list of `Filter` objects.  Filters commute with
+    each other, and consecutive filtering steps are merged into one.
+
+    Attributes:
+        argument (str): The name of the argument holding the filters
+    """
+
+    def __init__(self, argument: str = "filters"):
+        self.argument = argument
+
+    def passes_filter(self, step: "LazyStep", filter_: Any) -> bool:
+        return True
+
+    def required_columns(
+        self, step: "LazyStep", downstream: Optional[Set[str]]
+    ) -> Optional[Set[str]]:
+        if downstream is None:
+            return None
+        return downstream | {f.attribute.N for f in self.filters(step)}
+
+    def materializes(self, step: "LazyStep") -> Optional[List[DataAttribute]]:
+        return [f.attribute for f in self.filters(step)]
+
+    def filters(self, step: "LazyStep") -> List[Any]:
+        return list(step.arguments[self.argument])
+
+    def with_filters(self, step: "LazyStep", filters: List[Any]) -> "LazyStep":
+        """
+        Returns a copy of a filtering step, applying other filters
+
+        Args:
+            step (LazyStep): The filtering step
+            filters (List[Any]): The filters of the copy
+
+        Returns:
+            LazyStep: The copy
+        """
+        return LazyStep(step.func, (), {self.argument: filters})
+
+
+class Aggregation(PlanHint):
+    """
+    Hint of an operation that groups rows by key attributes and aggregates every registered attribute that has an
+    aggregation function.  Filters on the keys can be applied before aggregating, and the columns that are neither
+    keys nor aggregated are dropped by the operation, so they are never needed in its input.
+
+    Attributes:
+        argument (str): The name of the argument holding the key attributes
+    """
+
+    def __init__(self, argument: str = "aggregate_cols"):
+        self.argument = argument
+
+    def passes_filter(self, step: "LazyStep", filter_: Any) -> bool:
+        return filter_.attribute.N in {c.N for c in step.arguments[self.argument]}
+
+    def required_columns(
+        self, step: "LazyStep", downstream: Optional[Set[str]]
+    ) -> Optional[Set[str]]:
+        return {c.N for c in step.arguments[self.argument]} | {
+            c.N
+            for c in RegisteredAttributeStore.get_registered_attributes()
+            if c.agg_function is not None
+            or (isinstance(c, DerivedDataAttribute) and c.recalculate_on_aggregation)
+        }
+
+    def materializes(self, step: "LazyStep") -> Optional[List[DataAttribute]]:
+        # the recalculated attributes are calculated after aggregating anyway
+        return list(step.arguments[self.argument])
+
+
+class RowWise(PlanHint):
+    """
+    Hint of an operation that transforms every row on its own, so that it commutes with filters on the columns it
+    leaves untouched.
+
+    Attributes:
+        keeps (Callable[[str], bool]): Whether the operation leaves a column unchanged
+        reads (Iterable[DataAttribute]): Attributes the operation reads on top of the ones it transforms
+        recalculates (bool): Whether the operation recalculates the derived attributes in its input
+    """
+
+    def __init__(
+        self,
+        keeps: Callable[[str], bool],
+        reads: Iterable[DataAttribute] = (),
+        recalculates: bool = False,
+    ):
+        self.keeps = keeps
+        self.reads = list(reads)
+        self.recalculates = recalculates
+
+    def passes_filter(self, step: "LazyStep", filter_: Any) -> bool:
+        return self.keeps(filter_.attribute.N)
+
+    def required_columns(
+        self, step: "LazyStep", downstream: Optional[Set[str]]
+    ) -> Optional[Set[str]]:
+        if downstream is None or (
+            self.recalculates and any(_recalculated(c) for c in downstream)
+        ):
+            # the inputs of recalculated derived attributes are not known
+            return None
+        return downstream | {c.N for c in self.reads}
+
+    def materializes(self, step: "LazyStep") -> Optional[List[DataAttribute]]:
+        # an operation that recalculates the derived attributes in its input leaves the deferred ones valid
+        return self.reads if self.recalculates else None
+
+
+class LazyStep:
+    """
+    A pipeable operation recorded in a lazy plan
+
+    Attributes:
+        func (Callable[..., Data]): The operation
+        args (tuple): The positional arguments of the operation, after the data
+        kwargs (dict): The keyword arguments of the operation
+    """
+
+    def __init__(self, func: Callable[..., Data], args: tuple, kwargs: dict):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def hint(self) -> PlanHint:
+        return getattr(self.func, "hint", None) or PlanHint()
+
+    @property
+    def name(self) -> str:
+        return getattr(getattr(self.func, "f", self.func), "__name__", repr(self.func))
+
+    @property
+    def arguments(self) -> dict:
+        function = getattr(self.func, "f", self.func)
+        return (
+            inspect.signature(function)
+            .bind_partial(None, *self.args, **self.kwargs)
+            .arguments
+        )
+
+    def __repr__(self) -> str:
+        arguments = ", ".join(
+            [repr(a) for a in self.args]
+            + [f"{k}={v!r}" for k, v in self.kwargs.items()]
+        )
+        return f"{self.name}({arguments})"
+
+
+class LazyData:
+    """
+    Lazy counterpart of a Data object: pipeable operations are recorded in a logical plan rather than run, and the
+    plan is optimized and run once on `collect`.  Created with `Data.lazy()`.
+
+    The optimizer relies on the `PlanHint` of every operation (operations without one are barriers):
+    - filters are pushed as early as possible, ie. before aggregations on their keys and before row-wise operations
+      that leave their columns untouched
+    - consecutive filters are merged into a single step, which copies the data once
+    - columns that no later step reads (eg. the columns an aggregation drops) are dropped from the source data
+      before the first step
+
+    The collected data matches the eager pipeline, up to the order of the columns.
+
+    The source can also be a slice of a store that has not been read yet (see `Data.from_store`), in which case
+    only the columns the plan reads are loaded, and the filters at the start of the plan are evaluated while
+    loading.
+
+    Attributes:
+        source (Union[Data, StoreScan]): The data the plan starts from
+        steps (List[LazyStep]): The recorded operations, in the order they were piped
+    """
+
+    def __init__(
+        self,
+        source: Union[Data, "StoreScan"],
+        steps: Optional[List[LazyStep]] = None,
+    ):
+        self.source = source
+        self.steps = steps or []
+
+    def pipe(self, func: Callable[..., Data], *args, **kwargs) -> "LazyData":
+        """
+        Records a function to pipe to the data, see `Data.pipe`
+
+        Args:
+            func (Callable[..., Data]): The function to pipe to the data
+            *args: Arguments to pass to the function
+            **kwargs: Keyword arguments to pass to the function
+
+        Returns:
+            LazyData: A new lazy plan, with the function recorded as its last step
+        """
+        return LazyData(self.source, self.steps + [LazyStep(func, args, kwargs)])
+
+    def optimize(self) -> Tuple[Optional[List[str]], List[LazyStep]]:
+        """
+        Optimizes the recorded plan
+
+        Returns:
+            Tuple[Optional[List[str]], List[LazyStep]]: The source columns the plan reads (None if it needs all of
+                them), and the operations to run on them
+        """
+        steps = _merge_filters(_push_down_filters(self.steps))
+        required: Optional[Set[str]] = None
+        for step in reversed(steps):
+            required = step.hint.required_columns(step, required)
+        if required is None:
+            return None, steps
+        return [c for c in self._source_columns() if c in required], steps
+
+    def explain(self) -> str:
+        """
+        Describes the optimized plan
+
+        Returns:
+            str: One line per operation, starting with the columns read from the source
+        """
+        columns, steps = self.optimize()
+        n_columns = len(self._source_columns())
+        scan = (
+            f"scan {n_columns} columns"
+            if columns is None
+            else f"scan {len(columns)} of {n_columns} columns"
+        )
+        return "\n".join([scan] + [repr(step) for step in steps])
+
+    def collect(self) -> Data:
+        """
+        Optimizes and runs the recorded plan
+
+        Returns:
+            Data: The data after every recorded function has been applied
+        """
+        columns, steps = self.optimize()
+        if isinstance(self.source, Data):
+            data = self.source
+            if columns is not None and len(columns) < len(data.columns):
+                data = Data(
+                    data.materialize(columns)[columns],
+                    data.original_source,
+                    data.unique_keys,
+                )
+        else:
+            filters = []
+            if steps and isinstance(steps[0].hint, Filtering):
+                filters, steps = steps[0].hint.filters(steps[0]), steps[1:]
+            data = Data(self.source.load(columns, filters))
+        for step in steps:
+            data = data.pipe(step.func, *step.args, **step.kwargs)
+        return data
+
+    def _source_columns(self) -> List[Any]:
+        return self.source.columns
+
+
+def _recalculated(column: str) -> bool:
+    attribute = RegisteredAttributeStore.get_registered_attribute(column)
+    return (
+        isinstance(attribute, DerivedDataAttribute)
+        and attribute.recalculate_on_aggregation
+    )
+
+
+def _push_down_filters(steps: List[LazyStep]) -> List[LazyStep]:
+    pushed: List[LazyStep] = []
+    for step in steps:
+        if not isinstance(step.hint, Filtering):
+            pushed.append(step)
+            continue
+        for filter_ in step.hint.filters(step):
+            position = len(pushed)
+            while position > 0 and pushed[position - 1].hint.passes_filter(
+                pushed[position - 1], filter_
+            ):
+                position -= 1
+            # land after the filters already there, to keep the filters in the order they were piped
+            while position < len(pushed) and isinstance(
+                pushed[position].hint, Filtering
+            ):
+                position += 1
+            pushed.insert(position, step.hint.with_filters(step, [filter_]))
+    return pushed
+
+
+def _merge_filters(steps: List[LazyStep]) -> List[LazyStep]:
+    merged: List[LazyStep] = []
+    for step in steps:
+        previous = merged[-1] if merged else None
+        hint = step.hint
+        if (
+            previous is not None
+            and isinstance(hint, Filtering)
+            and previous.func is step.func
+        ):
+            # the same operation, so the previous step has the same hint
+            merged[-1] = hint.with_filters(
+                previous, hint.filters(previous) + hint.filters(step)
+            )
+        else:
+            merged.append(step)
+    return merged
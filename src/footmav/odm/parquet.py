@@ -0,0 +1,219 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+import os
+import pandas as pd
+from footmav.data_definitions.base import DataAttribute
+from footmav.data_definitions.derived import DerivedDataAttribute
+from footmav.operations.filter_objects import (
+    EQ,
+    GT,
+    GTE,
+    LT,
+    LTE,
+    NEQ,
+    Filter,
+    IsIn,
+)
+
+ParquetSource = Union[str, os.PathLike, List[str]]
+
+# filter operations with an equivalent arrow expression, which can be evaluated against row group statistics.
+# Comparisons with a null are null in arrow, which drops the row: that matches pandas, where comparisons with NaN
+# are False, except for NEQ, where they are True
+PUSHDOWN_OPERATIONS: Dict[Any, Callable[[Any, Any], Any]] = {
+    GT: lambda field, value: field > value,
+    GTE: lambda field, value: field >= value,
+    LT: lambda field, value: field < value,
+    LTE: lambda field, value: field <= value,
+    EQ: lambda field, value: field == value,
+    NEQ: lambda field, value: (field != value) | field.is_null(),
+    IsIn: lambda field, values: field.isin(list(values)),
+}
+
+
+def _arrow_dataset():
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "Reading parquet data requires pyarrow, install it with `pip install footmav[parquet]`"
+        ) from e
+    return ds
+
+
+def split_filters(
+    filters: Iterable[Filter], columns: Optional[Iterable[str]] = None
+) -> Tuple[List[Filter], List[Filter]]:
+    """
+    Splits filters into the ones that can be pushed down to the parquet reader, and the ones that have to be applied
+    to the loaded data: string matches (which `Filter` evaluates as regular expressions), and filters on columns
+    the data does not store (eg. derived attributes)
+
+    Args:
+        filters (Iterable[Filter]): The filters
+        columns (Optional[Iterable[str]]): The columns stored in the data. Defaults to any column
+
+    Returns:
+        Tuple[List[Filter], List[Filter]]: The filters to push down, and the remaining ones
+    """
+    columns = None if columns is None else set(columns)
+    pushed, residual = [], []
+    for filter_ in filters:
+        if filter_.operation in PUSHDOWN_OPERATIONS and (
+            columns is None or filter_.attribute.N in columns
+        ):
+            pushed.append(filter_)
+        else:
+            residual.append(filter_)
+    return pushed, residual
+
+
+def projected_columns(
+    attributes: Iterable[DataAttribute],
+    required: Iterable[DataAttribute] = (),
+    filters: Iterable[Filter] = (),
+) -> Optional[Set[str]]:
+    """
+    Returns the columns to read to load a set of attributes.  Derived attributes are read if they are stored,
+    along with the attributes they are calculated from.
+
+    Args:
+        attributes (Iterable[DataAttribute]): The attributes to load
+        required (Iterable[DataAttribute]): Attributes that are always needed (eg. to deduplicate the data)
+        filters (Iterable[Filter]): Filters applied to the loaded data, whose attributes have to be read as well
+
+    Returns:
+        Optional[Set[str]]: The column names, or None if every column has to be read because a derived attribute
+            does not tell which attributes it is calculated from
+    """
+    columns: Set[str] = set()
+    pending = list(attributes) + list(required) + [f.attribute for f in filters]
+    while pending:
+        attribute = pending.pop()
+        if attribute.N in columns:
+            continue
+        columns.add(attribute.N)
+        if isinstance(attribute, DerivedDataAttribute):
+            if attribute.inputs is None:
+                return None
+            pending.extend(attribute.inputs)
+    return columns
+
+
+def filter_expression(filters: Iterable[Filter]) -> Any:
+    """
+    Translates filters to a single arrow dataset expression
+
+    Args:
+        filters (Iterable[Filter]): Filters whose operations are all in `PUSHDOWN_OPERATIONS`
+
+    Returns:
+        pyarrow.dataset.Expression: The conjunction of the filters, or None if there are none
+    """
+    ds = _arrow_dataset()
+    expression = None
+    for filter_ in filters:
+        condition = PUSHDOWN_OPERATIONS[filter_.operation](
+            ds.field(filter_.attribute.N), filter_.value
+        )
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_parquet(
+    source: ParquetSource,
+    attributes: Optional[Iterable[DataAttribute]] = None,
+    filters: Optional[Iterable[Filter]] = None,
+    partitioning: Optional[str] = None,
+    required: Iterable[DataAttribute] = (),
+) -> pd.DataFrame:
+    """
+    Reads a parquet file or dataset, only reading the columns of the requested attributes, and skipping the row
+    groups (and, for partitioned datasets, the partitions) that the filters rule out.
+
+    Filters with an arrow equivalent are evaluated by the reader, the others (see `split_filters`) on the loaded
+    data.  Filters on derived attributes that are not stored are evaluated on the attribute calculated from the
+    loaded data.  Requires pyarrow.
+
+    Args:
+        source (ParquetSource): A parquet file, a directory holding a parquet dataset, or a list of files
+        attributes (Optional[Iterable[DataAttribute]]): The attributes to load. Defaults to every column
+        filters (Optional[Iterable[Filter]]): The filters to apply
+        partitioning (Optional[str]): The partitioning scheme of a dataset directory, eg. "hive"
+        required (Iterable[DataAttribute]): Attributes to load on top of the requested ones
+
+    Returns:
+        pd.DataFrame: The loaded data
+    """
+    filters = list(filters or [])
+    columns = None
+    if attributes is not None:
+        columns = projected_columns(attributes, required, filters)
+    df, residual = scan_parquet(source, columns, filters, partitioning)
+    for filter_ in residual:
+        attribute = filter_.attribute
+        if attribute.N not in df.columns and isinstance(
+            attribute, DerivedDataAttribute
+        ):
+            df = filter_.apply(df.assign(**{attribute.N: attribute.apply(df)}))
+            df = df.drop(columns=attribute.N)
+        else:
+            df = filter_.apply(df)
+    return df
+
+
+def read_columns(
+    source: ParquetSource,
+    columns: Optional[Iterable[str]] = None,
+    filters: Optional[Iterable[Filter]] = None,
+    partitioning: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Reads columns of a parquet file or dataset by name, see `read_parquet`.  Requested columns that the data does
+    not have are ignored, and the columns of the filters are read as well.
+
+    Args:
+        source (ParquetSource): A parquet file, a directory holding a parquet dataset, or a list of files
+        columns (Optional[Iterable[str]]): The columns to load. Defaults to every column
+        filters (Optional[Iterable[Filter]]): The filters to apply, on columns the data stores
+        partitioning (Optional[str]): The partitioning scheme of a dataset directory, eg. "hive"
+
+    Returns:
+        pd.DataFrame: The loaded data
+    """
+    filters = list(filters or [])
+    if columns is not None:
+        columns = set(columns) | {f.attribute.N for f in filters}
+    df, residual = scan_parquet(source, columns, filters, partitioning)
+    for filter_ in residual:
+        df = filter_.apply(df)
+    return df
+
+
+def scan_parquet(
+    source: ParquetSource,
+    columns: Optional[Iterable[str]] = None,
+    filters: Optional[Iterable[Filter]] = None,
+    partitioning: Optional[str] = None,
+) -> Tuple[pd.DataFrame, List[Filter]]:
+    """
+    Reads columns of a parquet file or dataset by name, evaluating the filters that can be pushed down to the
+    reader (see `split_filters`) and returning the others, which the caller has to apply.  Requires pyarrow.
+
+    Args:
+        source (ParquetSource): A parquet file, a directory holding a parquet dataset, or a list of files
+        columns (Optional[Iterable[str]]): The columns to load. Defaults to every column
+        filters (Optional[Iterable[Filter]]): The filters
+        partitioning (Optional[str]): The partitioning scheme of a dataset directory, eg. "hive"
+
+    Returns:
+        Tuple[pd.DataFrame, List[Filter]]: The loaded data, and the filters that are left to apply
+    """
+    ds = _arrow_dataset()
+    dataset = ds.dataset(source, format="parquet", partitioning=partitioning)
+    pushed, residual = split_filters(filters or [], dataset.schema.names)
+    if columns is not None:
+        columns = set(columns)
+        columns = [c for c in dataset.schema.names if c in columns]
+
+    df = dataset.to_table(columns=columns, filter=filter_expression(pushed)).to_pandas()
+    return df, residual
@@ -0,0 +1,484 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote
+import hashlib
+import json
+import os
+import uuid
+import pandas as pd
+from footmav.data_definitions.base import RegisteredAttributeStore
+from footmav.data_definitions.data_sources import DataSource
+from footmav.odm.parquet import read_columns
+from footmav.operations.filter_objects import Filter
+
+METADATA_FILE = "_metadata.json"
+
+# dtypes of the registered attribute data types
+ATTRIBUTE_DTYPES = {
+    "float": "float64",
+    float: "float64",
+    "int": "int64",
+    int: "int64",
+    "str": "object",
+    str: "object",
+    pd.Timestamp: "datetime64[ns]",
+}
+
+
+def store_schema(df: pd.DataFrame, source: Union[DataSource, str]) -> Dict[str, str]:
+    """
+    Returns the typed schema of a flat dataframe for the store: the dtype of the registered attribute of the source
+    for every column that has one, and the dtype of the dataframe for the other columns (eg. the aggregated
+    columns of whoscored data).
+
+    Args:
+        df (pd.DataFrame): The dataframe, with flat column names
+        source (Union[DataSource, str]): The source of the data
+
+    Returns:
+        Dict[str, str]: The dtype name of every column, in the order of the columns
+    """
+    source = DataSource(source)
+    schema = {}
+    for column in df.columns:
+        attribute = RegisteredAttributeStore.get_registered_attribute(column)
+        if attribute is not None and attribute.source == source:
+            dtype = ATTRIBUTE_DTYPES.get(attribute.data_type)
+            if dtype is not None:
+                schema[column] = dtype
+                continue
+        schema[column] = df[column].dtype.name
+    return schema
+
+
+def schema_hash(schema: Dict[str, str]) -> str:
+    """
+    Returns a hash of a schema, which changes whenever a column is added, removed, renamed, retyped or moved
+
+    Args:
+        schema (Dict[str, str]): The schema, see `store_schema`
+
+    Returns:
+        str: The hex digest of the schema
+    """
+    return hashlib.sha256(json.dumps(list(schema.items())).encode("utf-8")).hexdigest()
+
+
+class StorePartition:
+    """
+    A partition of a `MatchStore`: the data of one source, competition and season, and its metadata.
+
+    Attributes:
+        path (str): The directory of the partition
+        metadata (dict): The metadata of the partition, as stored in its metadata file
+    """
+
+    def __init__(self, path: str, metadata: dict):
+        self.path = path
+        self.metadata = metadata
+
+    @property
+    def source(self) -> str:
+        return self.metadata["source"]
+
+    @property
+    def competition(self) -> str:
+        return self.metadata["competition"]
+
+    @property
+    def season(self) -> str:
+        return self.metadata["season"]
+
+    @property
+    def rows(self) -> int:
+        return self.metadata["rows"]
+
+    @property
+    def min_date(self) -> Optional[pd.Timestamp]:
+        return _timestamp(self.metadata["min_date"])
+
+    @property
+    def max_date(self) -> Optional[pd.Timestamp]:
+        return _timestamp(self.metadata["max_date"])
+
+    @property
+    def schema(self) -> Dict[str, str]:
+        return dict(self.metadata["schema"])
+
+    @property
+    def schema_hash(self) -> str:
+        return self.metadata["schema_hash"]
+
+    @property
+    def columns(self) -> List[Any]:
+        """
+        The columns of the stored dataframe, as they were written (tuples for multi-level columns)
+        """
+        return [
+            tuple(c) if isinstance(c, list) else c for c in self.metadata["columns"]
+        ]
+
+    @property
+    def file(self) -> str:
+        return os.path.join(self.path, self.metadata["file"])
+
+    def __repr__(self) -> str:
+        return (
+            f"StorePartition({self.source}, {self.competition}, {self.season}, "
+            f"rows={self.rows})"
+        )
+
+
+class MatchStore:
+    """
+    Local columnar store for match level data (eg. `FbRefData` frames, or the output of
+    `generate_aggregate_dataframe`), partitioned by source, competition and season.  Every partition is a parquet
+    file in a `source=<source>/comp=<competition>/season=<season>` directory, next to a metadata file holding its
+    row count, date range, typed schema (see `store_schema`) and schema hash.
+
+    Writes are atomic: a new version of a partition is written to a new file, and only becomes visible once the
+    metadata file pointing to it is replaced, which is a single rename.  Readers only read the files the metadata
+    points to, so they never see a partially written partition.  The files of superseded versions are kept, so
+    that scans opened before a write can still be loaded, until they are deleted by `vacuum`.  Requires pyarrow to
+    read and write data.
+
+    Attributes:
+        root (str): The root directory of the store
+    """
+
+    def __init__(self, root: Union[str, os.PathLike]):
+        self.root = os.fspath(root)
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        source: Union[DataSource, str],
+        competition_column: str = "comp",
+        season_column: str = "season",
+    ) -> List[StorePartition]:
+        """
+        Writes a dataframe to the store, replacing the partitions of the competitions and seasons it holds.  Other
+        partitions are left untouched.  Multi-level columns (eg. of whoscored aggregated data) are stored flat, and
+        restored on reading.
+
+        Args:
+            df (pd.DataFrame): The data
+            source (Union[DataSource, str]): The source of the data
+            competition_column (str): The column holding the competition
+            season_column (str): The column holding the season
+
+        Returns:
+            List[StorePartition]: The written partitions
+        """
+        source = DataSource(source).value
+        flat, labels = _flatten(df)
+        schema = store_schema(flat, source)
+        flat = _apply_schema(flat, schema)
+        digest = schema_hash(schema)
+        date_column = next(
+            (c for c, dtype in schema.items() if dtype.startswith("datetime64")), None
+        )
+
+        written = []
+        for (competition, season), partition in flat.groupby(
+            [competition_column, season_column], sort=True, dropna=False
+        ):
+            path = self._partition_path(source, competition, season)
+            metadata = {
+                "source": source,
+                "competition": str(competition),
+                "season": str(season),
+                "rows": len(partition),
+                "min_date": _isoformat(partition, date_column, "min"),
+                "max_date": _isoformat(partition, date_column, "max"),
+                "schema": schema,
+                "schema_hash": digest,
+                "columns": labels,
+            }
+            written.append(
+                self._commit(path, partition.reset_index(drop=True), metadata)
+            )
+        return written
+
+    def partitions(
+        self,
+        source: Optional[Union[DataSource, str]] = None,
+        competitions: Optional[Iterable[str]] = None,
+        seasons: Optional[Iterable[Any]] = None,
+    ) -> List[StorePartition]:
+        """
+        Lists the partitions of the store, without reading any data
+
+        Args:
+            source (Optional[Union[DataSource, str]]): If provided, only partitions of this source are listed
+            competitions (Optional[Iterable[str]]): If provided, only partitions of these competitions are listed
+            seasons (Optional[Iterable[Any]]): If provided, only partitions of these seasons are listed
+
+        Returns:
+            List[StorePartition]: The partitions, sorted by source, competition and season
+        """
+        sources = (
+            [DataSource(source).value]
+            if source is not None
+            else sorted(_partition_values(self.root, "source"))
+        )
+        competitions = None if competitions is None else {str(c) for c in competitions}
+        seasons = None if seasons is None else {str(s) for s in seasons}
+
+        partitions = []
+        for source_value in sources:
+            source_path = os.path.join(
+                self.root, _partition_name("source", source_value)
+            )
+            for competition in sorted(_partition_values(source_path, "comp")):
+                if competitions is not None and competition not in competitions:
+                    continue
+                competition_path = os.path.join(
+                    source_path, _partition_name("comp", competition)
+                )
+                for season in sorted(_partition_values(competition_path, "season")):
+                    if seasons is not None and season not in seasons:
+                        continue
+                    path = os.path.join(
+                        competition_path, _partition_name("season", season)
+                    )
+                    metadata_path = os.path.join(path, METADATA_FILE)
+                    if not os.path.exists(metadata_path):
+                        # a partition whose first write never completed
+                        continue
+                    with open(metadata_path) as f:
+                        partitions.append(StorePartition(path, json.load(f)))
+        return partitions
+
+    def read(
+        self,
+        source: Union[DataSource, str],
+        competitions: Optional[Iterable[str]] = None,
+        seasons: Optional[Iterable[Any]] = None,
+        columns: Optional[Iterable[Any]] = None,
+        filters: Optional[List[Filter]] = None,
+    ) -> pd.DataFrame:
+        """
+        Reads a slice of the store
+
+        Args:
+            source (Union[DataSource, str]): The source of the data
+            competitions (Optional[Iterable[str]]): The competitions to read. Defaults to all of them
+            seasons (Optional[Iterable[Any]]): The seasons to read. Defaults to all of them
+            columns (Optional[Iterable[Any]]): The columns to read. Defaults to all of them
+            filters (Optional[List[Filter]]): Filters on the data to read
+
+        Returns:
+            pd.DataFrame: The data
+        """
+        return self.scan(source, competitions, seasons).load(columns, filters)
+
+    def scan(
+        self,
+        source: Union[DataSource, str],
+        competitions: Optional[Iterable[str]] = None,
+        seasons: Optional[Iterable[Any]] = None,
+    ) -> "StoreScan":
+        """
+        Opens a slice of the store without reading it, see `Data.from_store`
+
+        Args:
+            source (Union[DataSource, str]): The source of the data
+            competitions (Optional[Iterable[str]]): The competitions to open. Defaults to all of them
+            seasons (Optional[Iterable[Any]]): The seasons to open. Defaults to all of them
+
+        Returns:
+            StoreScan: The slice
+        """
+        return StoreScan(self.partitions(source, competitions, seasons))
+
+    def vacuum(self, source: Optional[Union[DataSource, str]] = None) -> List[str]:
+        """
+        Deletes the files of superseded partition versions, which no metadata file points to anymore.  Scans opened
+        before the partitions were last written can no longer be loaded afterwards, so only call it when no such
+        scan is in use.
+
+        Args:
+            source (Optional[Union[DataSource, str]]): If provided, only partitions of this source are vacuumed
+
+        Returns:
+            List[str]: The deleted files
+        """
+        deleted = []
+        for partition in self.partitions(source):
+            for name in os.listdir(partition.path):
+                if name.startswith("part-") and name != partition.metadata["file"]:
+                    file = os.path.join(partition.path, name)
+                    os.remove(file)
+                    deleted.append(file)
+        return deleted
+
+    def _partition_path(self, source: str, competition: Any, season: Any) -> str:
+        return os.path.join(
+            self.root,
+            _partition_name("source", source),
+            _partition_name("comp", competition),
+            _partition_name("season", season),
+        )
+
+    def _commit(
+        self, path: str, partition: pd.DataFrame, metadata: dict
+    ) -> StorePartition:
+        os.makedirs(path, exist_ok=True)
+        file = f"part-{uuid.uuid4().hex}.parquet"
+        metadata["file"] = file
+
+        _write_atomic(path, file, lambda f: partition.to_parquet(f, index=False))
+        _write_atomic(
+            path,
+            METADATA_FILE,
+            lambda f: f.write(json.dumps(metadata, indent=2).encode("utf-8")),
+        )
+        return StorePartition(path, metadata)
+
+
+class StoreScan:
+    """
+    A slice of a `MatchStore` that is only read on demand.  Used as the source of a lazy plan (see
+    `Data.from_store`), it reads only the columns the plan needs, and evaluates the filters the plan pushes to its
+    start while reading.
+
+    Attributes:
+        partitions (List[StorePartition]): The partitions of the slice
+    """
+
+    def __init__(self, partitions: List[StorePartition]):
+        self.partitions = partitions
+
+    @property
+    def columns(self) -> List[Any]:
+        """
+        The columns of the slice, in the order they were written
+        """
+        columns = []
+        for partition in self.partitions:
+            columns.extend(c for c in partition.columns if c not in columns)
+        return columns
+
+    @property
+    def rows(self) -> int:
+        return sum(p.rows for p in self.partitions)
+
+    def load(
+        self,
+        columns: Optional[Iterable[Any]] = None,
+        filters: Optional[List[Filter]] = None,
+    ) -> pd.DataFrame:
+        """
+        Reads the slice
+
+        Args:
+            columns (Optional[Iterable[Any]]): The columns to read. Defaults to all of them
+            filters (Optional[List[Filter]]): Filters on the data to read
+
+        Returns:
+            pd.DataFrame: The data of every partition, concatenated
+        """
+        labels = self.columns
+        if columns is not None:
+            columns = set(columns)
+            labels = [c for c in labels if c in columns]
+        wanted = labels
+        names = [_flat_name(c) for c in wanted]
+        filters = list(filters or [])
+        filter_names = [f.attribute.N for f in filters]
+
+        frames = []
+        residual = []
+        for partition in self.partitions:
+            # filters on columns a partition does not have are applied once the partitions are concatenated, where
+            # the column is missing
+            stored = {_flat_name(c) for c in partition.columns}
+            pushed = [f for f in filters if f.attribute.N in stored]
+            residual.extend(f for f in filters if f not in pushed and f not in residual)
+            frames.append(read_columns(partition.file, names + filter_names, pushed))
+        if not frames:
+            return pd.DataFrame(columns=_restore_columns(names, wanted))
+        df = pd.concat(frames, ignore_index=True)
+        if residual:
+            df = df.reindex(columns=list(dict.fromkeys(names + filter_names)))
+            for filter_ in residual:
+                df = filter_.apply(df)
+        df = df.reset_index(drop=True).reindex(columns=names)
+        df.columns = _restore_columns(names, wanted)
+        return df
+
+
+def _flatten(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Any]]:
+    labels = list(df.columns)
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df, labels
+    flat = df.copy(deep=False)
+    flat.columns = [_flat_name(c) for c in labels]
+    return flat, [list(c) for c in labels]
+
+
+def _flat_name(label: Any) -> str:
+    # the keys of multi-level columns have an empty second level, eg. ("match_id", "")
+    if isinstance(label, (tuple, list)):
+        return "/".join(str(level) for level in label if level != "")
+    return label
+
+
+def _restore_columns(names: List[str], labels: List[Any]) -> pd.Index:
+    if any(isinstance(c, tuple) for c in labels):
+        return pd.MultiIndex.from_tuples(labels)
+    return pd.Index(names)
+
+
+def _apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    typed = df.copy(deep=False)
+    for column, dtype in schema.items():
+        if typed[column].dtype.name == dtype:
+            continue
+        try:
+            typed[column] = typed[column].astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                f"Column {column} does not match its {dtype} schema: {e}"
+            ) from e
+    return typed
+
+
+def _isoformat(df: pd.DataFrame, column: Optional[str], how: str) -> Optional[str]:
+    if column is None or df[column].isna().all():
+        return None
+    return getattr(df[column], how)().isoformat()
+
+
+def _timestamp(value: Optional[str]) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+def _partition_name(key: str, value: Any) -> str:
+    return f"{key}={quote(str(value), safe='')}"
+
+
+def _partition_values(path: str, key: str) -> List[str]:
+    if not os.path.isdir(path):
+        return []
+    prefix = f"{key}="
+    return [
+        unquote(name[len(prefix) :])
+        for name in os.listdir(path)
+        if name.startswith(prefix) and os.path.isdir(os.path.join(path, name))
+    ]
+
+
+def _write_atomic(directory: str, name: str, write) -> None:
+    # written next to the target, so that the rename stays on the same filesystem
+    temp = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
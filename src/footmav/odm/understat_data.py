@@ -7,7 +7,8 @@ import pandas as pd
 
 class UnderstatData(Data):
     """
-    Understat Data Object.  This object is used to access the data from the understat data.
+    Understat Data Object.  This object is used to access the data from the understat data.  The understat derived
+    attributes are deferred (see `Data`): they are only calculated when they are first needed.
 
     Attributes:
         data (pd.DataFrame): The dataframe containing the data.
@@ -27,7 +28,5 @@ class UnderstatData(Data):
             for c in RegisteredAttributeStore.get_registered_attributes()
             if isinstance(c, DerivedDataAttribute) and c.source == DataSource.UNDERSTAT
         ]
-        for c in derived_data_to_add:
-            data[c.N] = c.apply(data)
-
-        super().__init__(data)
+        # derived attributes are only calculated once they are needed
+        super().__init__(data, deferred_attributes=derived_data_to_add)
@@ -1,3 +1,4 @@
+from footmav.odm.lazy import Aggregation
 from footmav.operations.pipeable import pipeable
 from footmav.data_definitions.base import DataAttribute, RegisteredAttributeStore
 from footmav.data_definitions.derived import DerivedDataAttribute
@@ -5,7 +6,7 @@ import pandas as pd
 from typing import List
 
 
-@pipeable
+@pipeable(hint=Aggregation("aggregate_cols"))
 def aggregate_by(
     data: pd.DataFrame,
     aggregate_cols: List[DataAttribute],
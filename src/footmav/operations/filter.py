@@ -1,10 +1,11 @@
 import pandas as pd
 from typing import List
 from footmav.operations.filter_objects import Filter
+from footmav.odm.lazy import Filtering
 from footmav.operations.pipeable import pipeable
 
 
-@pipeable
+@pipeable(hint=Filtering("filters"))
 def filter(input_data: pd.DataFrame, filters: List[Filter]) -> pd.DataFrame:
     """Applies selected filters to data
 
@@ -15,7 +16,8 @@ def filter(input_data: pd.DataFrame, filters: List[Filter]) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Filtered data
     """
-    df = input_data.copy()
+    # every filter selects new rows, so the input is never copied upfront
+    df = input_data
     for filter_ in filters:
         df = filter_.apply(df)
     return df
@@ -257,5 +257,22 @@ class Filter:
         self._value = value
         self._operation = operation
 
+    @property
+    def attribute(self) -> DataAttribute:
+        return self._attribute
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def operation(self) -> FilterOperation:
+        return self._operation
+
+    def __repr__(self) -> str:
+        return (
+            f"Filter({self._attribute.N}, {self._operation.__name__}, {self._value!r})"
+        )
+
     def apply(self, df: pd.DataFrame) -> pd.DataFrame:
         return self._operation.apply(df, df[self._attribute.N], self._value)
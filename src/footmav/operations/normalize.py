@@ -1,14 +1,33 @@
 from footmav.data_definitions.derived import DerivedDataAttribute
+from footmav.odm.lazy import RowWise
 from footmav.operations.pipeable import pipeable
 import pandas as pd
-from footmav.data_definitions.base import RegisteredAttributeStore
+from footmav.data_definitions.base import (
+    DateDataAttribute,
+    RegisteredAttributeStore,
+    StrDataAttribute,
+)
 from pandas.api.types import is_numeric_dtype
 from footmav.data_definitions.fbref.fbref_columns import (
     MINUTES,
 )  # not elegant, but this is currently the only datasource that is not event based, and thus the only one that can be normalized.
 
 
-@pipeable
+def _kept_by_per_90(column: str) -> bool:
+    attribute = RegisteredAttributeStore.get_registered_attribute(column)
+    if attribute is None or isinstance(
+        attribute, (StrDataAttribute, DateDataAttribute)
+    ):
+        return True
+    if (
+        isinstance(attribute, DerivedDataAttribute)
+        and attribute.recalculate_on_aggregation
+    ):
+        return False
+    return not attribute.normalizable
+
+
+@pipeable(hint=RowWise(_kept_by_per_90, reads=[MINUTES], recalculates=True))
 def per_90(data: pd.DataFrame) -> pd.DataFrame:
     """
     Returns data normalized to per 90 minutes
@@ -17,7 +36,8 @@ def per_90(data: pd.DataFrame) -> pd.DataFrame:
     if MINUTES.N not in data.columns:
         raise ValueError(f"{MINUTES.N} not in data columns")
 
-    data = data.copy()
+    # only the normalized columns are replaced, the others are shared with the input
+    data = data.copy(deep=False)
     columns_to_normalize = [
         c
         for c in RegisteredAttributeStore.get_registered_attributes()
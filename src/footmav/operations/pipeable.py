@@ -1,6 +1,7 @@
 from typing import Any, Callable, List
 from footmav.data_definitions.base import DataAttribute
 from footmav.odm.data import Data
+from footmav.odm.lazy import LazyStep, PlanHint
 from functools import wraps
 import inspect
 
@@ -9,16 +10,23 @@ def pipeable(
     origin_function: Callable[..., "Data"] = None,
     *,
     required_unique_keys: List[DataAttribute] = None,
+    hint: PlanHint = None,
 ) -> Callable[..., "Data"]:
     """
-    Decorator to make a function pipeable to a Data object
+    Decorator to make a function pipeable to a Data object.  The optional `hint` tells lazy plans (see
+    `footmav.odm.lazy.LazyData`) how the function can be rearranged; without one, it is never reordered.  It also
+    tells which deferred derived attributes of the Data object the function needs (see `PlanHint.materializes`);
+    without one, every deferred attribute is materialized before the function runs.
     """
 
     def _inner_pipeable(func):
         class WrappedFunction:
-            def __init__(self, f: Callable, req_keys: List[DataAttribute]):
+            def __init__(
+                self, f: Callable, req_keys: List[DataAttribute], hint: PlanHint
+            ):
                 self.f = f
                 self.req_keys = req_keys
+                self.hint = hint
 
             @wraps(func)
             def __call__(self, data: Data, *args: Any, **kwds: Any) -> Any:
@@ -35,26 +43,53 @@ def pipeable(
                 for key, value in kwds.items():
                     if isinstance(value, Data):
                         kwds[key] = value.df
+                needs = None
+                if self.hint is not None and data.deferred_attributes:
+                    needs = self.hint.materializes(
+                        LazyStep(self, tuple(arg_list), kwds)
+                    )
+                if needs is None:
+                    input_df, deferred = data.df, []
+                else:
+                    # deferred attributes that are not recalculated cannot be passed on
+                    input_df = data.materialize(
+                        list(needs)
+                        + [
+                            c
+                            for c in data.deferred_attributes
+                            if not c.recalculate_on_aggregation
+                        ]
+                    )
+                    deferred = data.deferred_attributes
                 f_args = inspect.getfullargspec(self.f).args
                 if len(f_args) > 1 and f_args[1] == "full_data":
-                    df = self.f(data.df, data.original_data, *arg_list, **kwds)
+                    df = self.f(input_df, data.original_data, *arg_list, **kwds)
                 else:
-                    df = self.f(data.df, *arg_list, **kwds)
+                    df = self.f(input_df, *arg_list, **kwds)
+                if df is input_df:
+                    # keep the new Data object isolated from its input
+                    df = df.copy(deep=False)
                 if (
                     func.__name__ == "aggregate_by"
                 ):  # Not pretty, but will have to do for now
                     if "aggregate_cols" in kwds:
-                        return Data(df, data.original_data, kwds["aggregate_cols"])
+                        return Data(
+                            df,
+                            data.original_source,
+                            kwds["aggregate_cols"],
+                            deferred,
+                        )
                     else:
-                        return Data(df, data.original_data, arg_list[0])
+                        return Data(df, data.original_source, arg_list[0], deferred)
                 else:
                     return Data(
                         df,
-                        original_data=data.original_data,
+                        original_data=data.original_source,
                         unique_keys=data.unique_keys,
+                        deferred_attributes=deferred,
                     )
 
-        return WrappedFunction(func, required_unique_keys)
+        return WrappedFunction(func, required_unique_keys, hint)
 
     if origin_function:
         return _inner_pipeable(origin_function)
@@ -1,7 +1,13 @@
 import pandas as pd
+from footmav.data_definitions.base import (
+    DateDataAttribute,
+    RegisteredAttributeStore,
+    StrDataAttribute,
+)
 from footmav.data_definitions.fbref import fbref_columns as fc
 from pandas.api.types import is_numeric_dtype
 
+from footmav.odm.lazy import RowWise
 from footmav.operations.pipeable import pipeable
 
 OUT_OF_POSSESSION = [
@@ -77,7 +83,15 @@ def possession_factors(input_df: pd.DataFrame) -> pd.DataFrame:
     return df_all_touches.reset_index().rename(columns={"index": fc.TEAM.N})
 
 
-@pipeable
+def _kept_by_possession_adjust(column: str) -> bool:
+    # every numeric column but the minutes and the season is adjusted
+    return column in [fc.MINUTES.N, fc.YEAR.N] or isinstance(
+        RegisteredAttributeStore.get_registered_attribute(column),
+        (StrDataAttribute, DateDataAttribute),
+    )
+
+
+@pipeable(hint=RowWise(_kept_by_possession_adjust, reads=[fc.TEAM]))
 def possession_adjust(data: pd.DataFrame, full_data: pd.DataFrame) -> pd.DataFrame:
     pos_adj_factor_df = possession_factors(full_data)[
         ["squad", "pct_in_possession_factor", "pct_out_possession_factor"]
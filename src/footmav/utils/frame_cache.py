@@ -0,0 +1,52 @@
+from typing import Any, Callable, Dict, Tuple
+import weakref
+import pandas as pd
+
+
+_FRAME_CACHE: Dict[int, Tuple[weakref.ref, pd.Index, int, Dict[str, Any]]] = {}
+
+
+def frame_cached(df: pd.DataFrame, key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Returns a value derived from a dataframe, computing it on first use.
+
+    Values are cached against the dataframe object for as long as it is alive, so expensive derived structures
+    (eg. the qualifier index or the distances to goal) are only built once per frame no matter how many helpers
+    ask for them.  Frames derived through filtering or copying are new objects and get their own cache.  Adding
+    columns to a frame keeps its cache, since the cached values only depend on the rows and the raw event columns;
+    overwriting raw event columns in place requires a call to `clear_frame_cache`.
+
+    Args:
+        df (pd.DataFrame): The dataframe the value is derived from
+        key (str): The name of the cached value
+        compute (Callable[[], Any]): Function that computes the value if it is not cached
+
+    Returns:
+        Any: The cached or freshly computed value
+    """
+    frame_id = id(df)
+    entry = _FRAME_CACHE.get(frame_id)
+    if entry is not None:
+        ref, index, n_rows, values = entry
+        if ref() is df and df.index is index and n_rows == len(df):
+            if key not in values:
+                values[key] = compute()
+            return values[key]
+    else:
+        weakref.finalize(df, _FRAME_CACHE.pop, frame_id, None)
+
+    values = {key: compute()}
+    _FRAME_CACHE[frame_id] = (weakref.ref(df), df.index, len(df), values)
+    return values[key]
+
+
+def clear_frame_cache(df: pd.DataFrame) -> None:
+    """
+    Drops every cached value derived from a dataframe
+
+    Args:
+        df (pd.DataFrame): The dataframe
+    """
+    entry = _FRAME_CACHE.get(id(df))
+    if entry is not None:
+        entry[3].clear()
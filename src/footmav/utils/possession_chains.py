@@ -0,0 +1,291 @@
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from footmav.utils import whoscored_funcs as WF
+from footmav.utils.frame_cache import frame_cached
+from footmav.data_definitions.whoscored.constants import EventType
+
+# on-ball actions, which put (or keep) the team of the event in possession
+POSSESSION_EVENTS = [
+    EventType.Pass,
+    EventType.OffsidePass,
+    EventType.TakeOn,
+    EventType.Carry,
+    EventType.BallTouch,
+    EventType.BallRecovery,
+    EventType.Interception,
+    EventType.Clearance,
+    EventType.KeeperPickup,
+    EventType.Claim,
+    EventType.Dispossessed,
+    EventType.MissedShots,
+    EventType.ShotOnPost,
+    EventType.SavedShot,
+    EventType.Goal,
+]
+
+# events after which play is stopped, so that the next possession starts a new chain
+STOPPAGE_EVENTS = [
+    EventType.Foul,
+    EventType.Card,
+    EventType.OffsidePass,
+    EventType.OffsideGiven,
+    EventType.CornerAwarded,
+    EventType.SubstitutionOff,
+    EventType.SubstitutionOn,
+    EventType.FormationChange,
+    EventType.Goal,
+]
+
+# free kick, corner, penalty, throw in and goal kick: the event restarts play, and always starts a new chain
+SET_PIECE_QUALIFIERS = [5, 6, 9, 107, 124]
+
+CHAIN_SUMMARY_COLUMNS = [
+    "matchId",
+    "teamId",
+    "period",
+    "events",
+    "passes",
+    "shots",
+    "start",
+    "end",
+    "duration",
+    "xg",
+    "progression",
+]
+
+
+def possession_chains(whoscored_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits the events of a dataframe into possession chains: uninterrupted sequences of play in which one team has
+    the ball.  A chain ends when the other team makes an on-ball action, when play is stopped (fouls, offsides,
+    goals, substitutions...), at a set piece, and at the end of every period.
+
+    Events are ordered by match, period and time (keeping the order of the dataframe for events at the same time),
+    and the chains are found with a handful of array passes over that order, with no row by row loop.  Contested
+    and defensive events that are not on-ball actions (duels, tackles, saves...) belong to the chain in progress,
+    whichever team made them.  Events that happen while no chain is in progress (eg. a card after a foul) belong
+    to no chain.  The result is computed once per dataframe.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The chain of every event, as a positional array of ids which are unique
+            across the dataframe and increase with time within a match, -1 for events in no chain, and the team id
+            in possession during every chain, indexed by chain id
+    """
+
+    def _chains():
+        n = len(whoscored_df)
+        codes = WF.col_event_type_codes(whoscored_df)
+        match = pd.factorize(whoscored_df["matchId"].to_numpy())[0]
+        period = whoscored_df["period"].to_numpy()
+        order = np.lexsort(
+            (
+                np.arange(n),
+                _event_seconds(whoscored_df),
+                whoscored_df["minute"].to_numpy(),
+                period,
+                match,
+            )
+        )
+        match, period = match[order], period[order]
+        codes = codes[order]
+        team = whoscored_df["teamId"].to_numpy()[order]
+
+        # a segment is a stretch of live play, between two stoppages or period boundaries
+        stoppage = np.isin(codes, [e.value for e in STOPPAGE_EVENTS])
+        new_segment = np.ones(n, dtype=bool)
+        new_segment[1:] = (
+            (match[1:] != match[:-1]) | (period[1:] != period[:-1]) | stoppage[:-1]
+        )
+        segment = np.cumsum(new_segment)
+
+        on_ball = np.flatnonzero(np.isin(codes, [e.value for e in POSSESSION_EVENTS]))
+        set_piece = WF.col_has_any_qualifier(
+            whoscored_df, SET_PIECE_QUALIFIERS
+        ).to_numpy()[order][on_ball]
+        starts = np.ones(len(on_ball), dtype=bool)
+        starts[1:] = (
+            (team[on_ball][1:] != team[on_ball][:-1])
+            | (segment[on_ball][1:] != segment[on_ball][:-1])
+            | set_piece[1:]
+        )
+
+        start_rows = on_ball[starts]
+        is_start = np.zeros(n, dtype=bool)
+        is_start[start_rows] = True
+        chain = np.cumsum(is_start) - 1
+        # the chain in progress does not carry over to the events after a stoppage
+        in_chain = chain >= 0
+        in_chain[in_chain] = segment[start_rows][chain[in_chain]] == segment[in_chain]
+
+        chain_ids = np.full(n, -1, dtype=np.int64)
+        chain_ids[order] = np.where(in_chain, chain, -1)
+        return chain_ids, team[start_rows]
+
+    return frame_cached(whoscored_df, "possession_chains", _chains)
+
+
+def col_possession_chain(whoscored_df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the possession chain of every event of a dataframe (see `possession_chains`)
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+
+    Returns:
+        pd.Series: The chain id of every event, -1 for events in no chain
+    """
+    chain_ids, _ = possession_chains(whoscored_df)
+    return pd.Series(chain_ids, index=whoscored_df.index, name="chain")
+
+
+def chain_summary(whoscored_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates the events of a dataframe per possession chain
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+
+    Returns:
+        pd.DataFrame: One row per chain, indexed by chain id, with the match, team in possession and period of the
+            chain, its number of events, passes and shots, its start, end and duration (in seconds since the start
+            of the match clock), the xG of its shots and its progression: the net distance towards goal gained by its
+            successful passes and carries
+    """
+    chain_ids, teams = possession_chains(whoscored_df)
+    n_chains = len(teams)
+    in_chain = chain_ids >= 0
+    ids = chain_ids[in_chain]
+
+    def _count(mask):
+        return np.bincount(
+            ids, weights=np.asarray(mask, dtype=float)[in_chain], minlength=n_chains
+        ).astype(np.int64)
+
+    def _sum(values):
+        return np.bincount(
+            ids,
+            weights=np.nan_to_num(np.asarray(values, dtype=float))[in_chain],
+            minlength=n_chains,
+        )
+
+    own = _owning_team_events(whoscored_df, chain_ids, teams)
+    seconds = (
+        whoscored_df["minute"].to_numpy(dtype=float) * 60 + _event_seconds(whoscored_df)
+    )[in_chain]
+    start = np.full(n_chains, np.inf)
+    np.minimum.at(start, ids, seconds)
+    end = np.full(n_chains, -np.inf)
+    np.maximum.at(end, ids, seconds)
+
+    first_rows = np.full(n_chains, len(chain_ids), dtype=np.int64)
+    np.minimum.at(first_rows, ids, np.flatnonzero(in_chain))
+
+    progressive = (
+        WF.col_is_event_type(whoscored_df, EventType.Pass, EventType.Carry).to_numpy()
+        & WF.success(whoscored_df).to_numpy()
+        & own
+    )
+    return pd.DataFrame(
+        {
+            "matchId": whoscored_df["matchId"].to_numpy()[first_rows],
+            "teamId": teams,
+            "period": whoscored_df["period"].to_numpy()[first_rows],
+            "events": _count(np.ones(len(chain_ids))),
+            "passes": _count(WF.pass_attempt(whoscored_df).to_numpy() & own),
+            "shots": _count(WF.is_shot(whoscored_df).to_numpy() & own),
+            "start": start,
+            "end": end,
+            "duration": end - start,
+            "xg": _sum(whoscored_df["xG"].to_numpy(dtype=float) * own),
+            "progression": _sum(
+                np.where(progressive, WF.progressive_distance(whoscored_df), 0)
+            ),
+        },
+        index=pd.RangeIndex(n_chains, name="chain"),
+        columns=CHAIN_SUMMARY_COLUMNS,
+    )
+
+
+def chain_xg(
+    whoscored_df: pd.DataFrame, buildup: bool = False, per_chain: bool = False
+) -> pd.Series:
+    """
+    Returns the xG chain (or xG buildup) of the events of a dataframe: every player of the team in possession who
+    makes an on-ball action in a chain is credited with the xG of all the shots of the chain, once per chain.  The
+    credit is placed on the first on-ball action of the player in the chain, so that summing the result per player
+    adds up the xG of every chain they were involved in.
+
+    xG buildup leaves out the chains in which the player took a shot or played the pass leading to one.
+
+    Summed per team, the per player credits count the xG of a chain once for every player involved in it.  With
+    `per_chain`, every chain with at least one credited player is credited once instead, on one of the events of
+    the team in possession, so that summing the result per team adds up the xG of the team's chains.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+        buildup (bool): If True, returns the xG buildup rather than the xG chain
+        per_chain (bool): If True, credits every chain once rather than once per involved player
+
+    Returns:
+        pd.Series: The xG credited to each event, 0 for most events
+    """
+    chain_ids, teams = possession_chains(whoscored_df)
+    own = _owning_team_events(whoscored_df, chain_ids, teams)
+    in_chain = chain_ids >= 0
+    chain_xg_values = np.bincount(
+        chain_ids[in_chain],
+        weights=np.nan_to_num(whoscored_df["xG"].to_numpy(dtype=float) * own)[in_chain],
+        minlength=len(teams),
+    )
+    involved = (
+        own
+        & WF.col_is_event_type(whoscored_df, *POSSESSION_EVENTS).to_numpy()
+        & whoscored_df["player_name"].notna().to_numpy()
+    )
+    rows = np.flatnonzero(involved)
+    players = pd.factorize(whoscored_df["player_name"].to_numpy()[rows])[0]
+    _, first, pairs = np.unique(
+        chain_ids[rows] * (players.max(initial=0) + 1) + players,
+        return_index=True,
+        return_inverse=True,
+    )
+    credit = chain_xg_values[chain_ids[rows[first]]]
+
+    if buildup:
+        shot = WF.is_shot(whoscored_df).to_numpy()
+        links = WF.assist_links(whoscored_df)
+        shot_or_key_pass = shot.copy()
+        shot_or_key_pass[links[shot & (links >= 0)]] = True
+        credit[np.bincount(pairs, weights=shot_or_key_pass[rows]) > 0] = 0
+
+    credited_rows = rows[first]
+    if per_chain:
+        # the pairs are sorted by chain, so the first credited pair of every chain stands for the chain
+        credited_rows, credit = credited_rows[credit > 0], credit[credit > 0]
+        _, first_of_chain = np.unique(chain_ids[credited_rows], return_index=True)
+        credited_rows, credit = credited_rows[first_of_chain], credit[first_of_chain]
+
+    credited = np.zeros(len(whoscored_df))
+    credited[credited_rows] = credit
+    return pd.Series(credited, index=whoscored_df.index)
+
+
+def _owning_team_events(
+    whoscored_df: pd.DataFrame, chain_ids: np.ndarray, teams: np.ndarray
+) -> np.ndarray:
+    in_chain = chain_ids >= 0
+    own = np.zeros(len(chain_ids), dtype=bool)
+    own[in_chain] = (
+        whoscored_df["teamId"].to_numpy()[in_chain] == teams[chain_ids[in_chain]]
+    )
+    return own
+
+
+def _event_seconds(whoscored_df: pd.DataFrame) -> np.ndarray:
+    # whoscored marks events without a time (eg. period markers) with -9999 seconds
+    return np.clip(whoscored_df["second"].fillna(0).to_numpy(dtype=float), 0, None)
@@ -0,0 +1,210 @@
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from footmav.utils.frame_cache import frame_cached
+
+
+class QualifierIndex:
+    """
+    Columnar index over the `qualifiers` column of a whoscored event dataframe.
+
+    The raw qualifiers are a list of dicts per event, which is expensive to scan row by row.  The index
+    walks them exactly once and explodes them into a long table of (row, code, display name, value), kept
+    as flat arrays sorted by code.  On top of that it stores a sparse boolean matrix of event rows by qualifier
+    code, along with a map from qualifier display name to code.  Membership checks and value lookups then
+    become array slices rather than a python-level scan of every event.
+
+    Attributes:
+        n_rows (int): The number of events in the indexed dataframe
+        codes (np.ndarray): The sorted qualifier codes present in the data, one per matrix column
+        matrix (sparse.csc_matrix): Sparse boolean matrix of shape (n_rows, len(codes))
+        long_table (pd.DataFrame): The exploded qualifiers, one row per (event, qualifier)
+    """
+
+    def __init__(self, qualifiers: pd.Series):
+        self._n_rows = len(qualifiers)
+        rows: List[int] = []
+        codes: List[int] = []
+        names: List[str] = []
+        values: List[Any] = []
+        self._name_to_codes: Dict[str, set] = {}
+        for row, qs in enumerate(qualifiers):
+            if not isinstance(qs, (list, tuple, np.ndarray)):
+                continue
+            for q in qs:
+                q_type = q["type"]
+                rows.append(row)
+                codes.append(q_type["value"])
+                names.append(q_type["displayName"])
+                values.append(q.get("value", np.nan))
+                self._name_to_codes.setdefault(q_type["displayName"], set()).add(
+                    q_type["value"]
+                )
+
+        code_arr = np.asarray(codes, dtype=np.int64)
+        # a stable sort keeps the original row order (and order within a row) for every code,
+        # so the first entry of a (row, code) pair is always the first qualifier in the raw list
+        order = np.argsort(code_arr, kind="stable")
+        self._long_rows = np.asarray(rows, dtype=np.int64)[order]
+        self._long_codes = code_arr[order]
+        self._long_names = np.asarray(names, dtype=object)[order]
+        raw_values = np.empty(len(values), dtype=object)
+        raw_values[:] = values
+        self._long_values = raw_values[order]
+        self._long_numeric_values = pd.to_numeric(
+            pd.Series(self._long_values, dtype=object), errors="coerce"
+        ).to_numpy(dtype=float)
+
+        self._codes, col_arr = np.unique(self._long_codes, return_inverse=True)
+        self._code_to_col = {int(c): i for i, c in enumerate(self._codes)}
+        self._matrix = sparse.csc_matrix(
+            (
+                np.ones(len(self._long_rows), dtype=bool),
+                (self._long_rows, col_arr.ravel()),
+            ),
+            shape=(self._n_rows, len(self._codes)),
+        )
+
+    @property
+    def n_rows(self) -> int:
+        return self._n_rows
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes
+
+    @property
+    def matrix(self) -> sparse.csc_matrix:
+        return self._matrix
+
+    @property
+    def long_table(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "row": self._long_rows,
+                "code": self._long_codes,
+                "display_name": self._long_names,
+                "value": self._long_values,
+                "numeric_value": self._long_numeric_values,
+            }
+        )
+
+    def code_for(self, display_name: str) -> List[int]:
+        """
+        Returns the qualifier codes seen in the data under a given display name
+
+        Args:
+            display_name (str): The display name of the qualifier
+
+        Returns:
+            List[int]: The codes associated with the display name (empty if the name was never seen)
+        """
+        return sorted(self._name_to_codes.get(display_name, set()))
+
+    def _rows_for_code(self, qualifier_code: int) -> np.ndarray:
+        col = self._code_to_col.get(int(qualifier_code))
+        if col is None:
+            return np.empty(0, dtype=np.int64)
+        indptr = self._matrix.indptr
+        return self._matrix.indices[indptr[col] : indptr[col + 1]]
+
+    def has(self, display_name: str = "", qualifier_code: int = -1) -> np.ndarray:
+        """
+        Returns a boolean mask of the events carrying a qualifier
+
+        Args:
+            display_name (str): The display name of the qualifier. Takes precedence over the code if provided
+            qualifier_code (int): The code of the qualifier
+
+        Returns:
+            np.ndarray: True for every event that carries the qualifier, False otherwise
+        """
+        codes = self.code_for(display_name) if display_name else [qualifier_code]
+        mask = np.zeros(self._n_rows, dtype=bool)
+        for code in codes:
+            mask[self._rows_for_code(code)] = True
+        return mask
+
+    def has_any(self, qualifier_codes: List[int]) -> np.ndarray:
+        """
+        Returns a boolean mask of the events carrying at least one of the given qualifier codes
+
+        Args:
+            qualifier_codes (List[int]): The qualifier codes
+
+        Returns:
+            np.ndarray: True for every event that carries any of the qualifiers, False otherwise
+        """
+        mask = np.zeros(self._n_rows, dtype=bool)
+        for code in qualifier_codes:
+            mask[self._rows_for_code(code)] = True
+        return mask
+
+    def values(self, qualifier_codes: List[int], numeric: bool = True) -> pd.DataFrame:
+        """
+        Extracts the values of several qualifiers in a single pass over the exploded table
+
+        Args:
+            qualifier_codes (List[int]): The codes of the qualifiers to extract
+            numeric (bool): If True, values are parsed to floats, otherwise the raw values are returned
+
+        Returns:
+            pd.DataFrame: One column per qualifier code and one row per event, holding the value of the first
+                occurrence of the qualifier in the event, or nan where the event does not carry it
+        """
+        qualifier_codes = [int(c) for c in qualifier_codes]
+        code_arr = np.asarray(qualifier_codes, dtype=np.int64)
+        selected = np.flatnonzero(np.isin(self._long_codes, code_arr))
+        sorter = np.argsort(code_arr)
+        cols = sorter[
+            np.searchsorted(code_arr, self._long_codes[selected], sorter=sorter)
+        ]
+        keys = self._long_rows[selected] * len(qualifier_codes) + cols
+        _, first = np.unique(keys, return_index=True)
+        selected, cols = selected[first], cols[first]
+
+        source = self._long_numeric_values if numeric else self._long_values
+        out = np.full(
+            (self._n_rows, len(qualifier_codes)),
+            np.nan,
+            dtype=float if numeric else object,
+        )
+        out[self._long_rows[selected], cols] = source[selected]
+        return pd.DataFrame(out, columns=qualifier_codes)
+
+    def value(
+        self, display_name: str = "", qualifier_code: int = -1, numeric: bool = True
+    ) -> np.ndarray:
+        """
+        Extracts the value of a qualifier for every event
+
+        Args:
+            display_name (str): The display name of the qualifier. Takes precedence over the code if provided
+            qualifier_code (int): The code of the qualifier
+            numeric (bool): If True, values are parsed to floats, otherwise the raw values are returned
+
+        Returns:
+            np.ndarray: The value of the qualifier for each event, or nan where the event does not carry it
+        """
+        codes = self.code_for(display_name) if display_name else [qualifier_code]
+        if not codes:
+            return np.full(self._n_rows, np.nan, dtype=float if numeric else object)
+        return self.values(codes, numeric=numeric).bfill(axis=1).iloc[:, 0].to_numpy()
+
+
+def get_qualifier_index(df: pd.DataFrame) -> QualifierIndex:
+    """
+    Returns the qualifier index for a dataframe, building it on first use.
+
+    The index is cached against the dataframe object (see `footmav.utils.frame_cache`), so repeated qualifier
+    lookups on the same frame (eg. from every aggregator during `generate_aggregate_dataframe`) only pay for the
+    build once.
+
+    Args:
+        df (pd.DataFrame): A whoscored event dataframe with a `qualifiers` column
+
+    Returns:
+        QualifierIndex: The qualifier index for the dataframe
+    """
+    return frame_cached(df, "qualifier_index", lambda: QualifierIndex(df["qualifiers"]))
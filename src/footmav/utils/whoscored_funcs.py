@@ -1,4 +1,7 @@
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
+import json
+import os
+import tempfile
 import requests  # type: ignore
 import pandas as pd
 import numpy as np
@@ -15,18 +18,77 @@ import abc
 from functools import lru_cache
 from footmav.utils.mplsoccer.standardizer import Standardizer
 from footmav.utils.mplsoccer.dimensions import opta_dims
+from footmav.utils.qualifier_index import get_qualifier_index
+from footmav.utils.frame_cache import frame_cached
+
+
+XTHREAT_GRID_URL = "https://karun.in/blog/data/open_xt_12x8_v1.json"
+XTHREAT_GRID_ENV = "FOOTMAV_XT_GRID"
+CACHE_DIR_ENV = "FOOTMAV_CACHE_DIR"
+
+
+def get_cache_dir() -> str:
+    """
+    Returns the directory footmav caches downloaded data in.  Defaults to `~/.cache/footmav`, and can be
+    overridden with the `FOOTMAV_CACHE_DIR` environment variable.
+    """
+    return os.environ.get(
+        CACHE_DIR_ENV, os.path.join(os.path.expanduser("~"), ".cache", "footmav")
+    )
 
 
 @lru_cache(10)
-def get_xthreat_grid() -> List[List[float]]:
+def get_xthreat_grid(path: Optional[str] = None) -> List[List[float]]:
     """
-    Retrieve the xthread grid from the web
+    Retrieve the 12x8 xthreat grid.
+
+    The grid is read from the first of these that is available:
+        1. the `path` argument
+        2. the file named by the `FOOTMAV_XT_GRID` environment variable
+        3. the on-disk cache (see `get_cache_dir`)
+        4. the web, in which case the grid is written to the on-disk cache for the next time
+
+    Pre-seeding the cache or pointing `FOOTMAV_XT_GRID` at a copy of the grid lets this run on machines without network access.
+
+    Args:
+        path (Optional[str]): Path to a local json copy of the grid
+
+    Returns:
+        List[List[float]]: The xthreat grid, as 8 rows of 12 values
     """
+    path = path or os.environ.get(XTHREAT_GRID_ENV)
+    if path:
+        with open(path) as fp:
+            return json.load(fp)
+
+    cache_path = os.path.join(get_cache_dir(), os.path.basename(XTHREAT_GRID_URL))
+    if os.path.exists(cache_path):
+        with open(cache_path) as fp:
+            return json.load(fp)
 
-    r = requests.get("https://karun.in/blog/data/open_xt_12x8_v1.json")
+    r = requests.get(XTHREAT_GRID_URL)
     if r.status_code != 200:
         raise Exception("Could not retrieve xthreat grid")
-    return r.json()
+    grid = r.json()
+    _write_cache_file(cache_path, grid)
+    return grid
+
+
+def _write_cache_file(cache_path: str, data: Any):
+    # caching is best effort: write to a temporary file first so readers never see a partial file
+    try:
+        payload = json.dumps(data)
+    except (TypeError, ValueError):
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(cache_path), delete=False, suffix=".tmp"
+        ) as fp:
+            fp.write(payload)
+        os.replace(fp.name, cache_path)
+    except OSError:
+        pass
 
 
 def has_qualifier(
@@ -76,11 +138,125 @@ def col_has_qualifier(
         pd.Series: True if the qualifier is present, False otherwise
 
     """
-    return df["qualifiers"].apply(
-        lambda x: has_qualifier(x, display_name, qualifier_code)
+    return pd.Series(
+        get_qualifier_index(df).has(display_name, qualifier_code),
+        index=df.index,
+        name="qualifiers",
     )
 
 
+def col_has_any_qualifier(df: pd.DataFrame, qualifier_codes: List[int]) -> pd.Series:
+    """
+    Checks if any of the given qualifier codes is present in each element of a column of a dataframe
+
+    Args:
+        df (pd.DataFrame): The dataframe
+        qualifier_codes (List[int]): The codes of the qualifiers
+
+    Returns:
+        pd.Series: True if any of the qualifiers is present, False otherwise
+
+    """
+    return pd.Series(
+        get_qualifier_index(df).has_any(qualifier_codes),
+        index=df.index,
+        name="qualifiers",
+    )
+
+
+def encode_event_types(event_types: pd.Series) -> np.ndarray:
+    """
+    Converts an event type column to the integer ids of the event types.
+
+    The column may hold `EventType` members, their integer ids, or a categorical of either.  Only the distinct
+    values are converted, so the cost does not depend on the number of events.  Missing event types are coded -1.
+
+    Args:
+        event_types (pd.Series): The event type column
+
+    Returns:
+        np.ndarray: The integer id of the event type of every event
+    """
+    if event_types.dtype.kind in "iu":
+        return event_types.to_numpy(dtype=np.int16)
+    codes, uniques = pd.factorize(event_types)
+    # the trailing -1 is picked up by the -1 codes of missing values
+    lookup = np.array(
+        [u.value if isinstance(u, EventType) else int(u) for u in uniques] + [-1],
+        dtype=np.int16,
+    )
+    return lookup[codes]
+
+
+def col_event_type_codes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the integer event type ids of the events of a dataframe, computed once per frame
+
+    Args:
+        df (pd.DataFrame): The dataframe
+
+    Returns:
+        np.ndarray: The integer id of the event type of every event
+    """
+    return frame_cached(
+        df, "event_type_codes", lambda: encode_event_types(df[wc.EVENT_TYPE.N])
+    )
+
+
+def col_is_event_type(df: pd.DataFrame, *event_types: EventType) -> pd.Series:
+    """
+    Checks if each event in a dataframe is of one of the given event types.
+
+    The comparison is done on the integer ids of the event types, so it works the same whether the event type
+    column holds `EventType` members or their integer ids (see `encode_event_type_column`).
+
+    Args:
+        df (pd.DataFrame): The dataframe
+        event_types (EventType): The event types
+
+    Returns:
+        pd.Series: True if the event is of one of the event types, False otherwise
+    """
+    codes = col_event_type_codes(df)
+    if len(event_types) == 1:
+        mask = codes == event_types[0].value
+    else:
+        mask = np.isin(codes, [event_type.value for event_type in event_types])
+    return pd.Series(mask, index=df.index, name=wc.EVENT_TYPE.N)
+
+
+def encode_event_type_column(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the dataframe with the event type column stored as compact integer ids rather than `EventType` objects
+
+    Args:
+        df (pd.DataFrame): The dataframe
+
+    Returns:
+        pd.DataFrame: A shallow copy of the dataframe with the encoded event type column
+    """
+    encoded = df.copy(deep=False)
+    encoded[wc.EVENT_TYPE.N] = encode_event_types(df[wc.EVENT_TYPE.N])
+    return encoded
+
+
+def decode_event_type_column(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the dataframe with the event type column stored as `EventType` members, eg. for display
+
+    Args:
+        df (pd.DataFrame): The dataframe
+
+    Returns:
+        pd.DataFrame: A shallow copy of the dataframe with the decoded event type column
+    """
+    decoded = df.copy(deep=False)
+    decoded[wc.EVENT_TYPE.N] = pd.Series(
+        encode_event_types(df[wc.EVENT_TYPE.N]), index=df.index
+    ).map(lambda code: EventType(code) if code >= 0 else None)
+    return decoded
+
+
 TOUCH_IDS = [
     EventType(id)
     for id in [1, 2, 3, 7, 8, 9, 10, 11, 2, 13, 14, 15, 16, 41, 42, 50, 54, 61, 73, 74]
@@ -88,40 +264,28 @@ TOUCH_IDS = [
 
 
 def is_touch(df):
-    return (df["event_type"].isin(TOUCH_IDS)) | (
-        (df["event_type"] == EventType.Foul) & (df["outcomeType"] == 1)
+    return col_is_event_type(df, *TOUCH_IDS) | (
+        col_is_event_type(df, EventType.Foul) & (df["outcomeType"] == 1)
     )
 
 
 def header_qualifier(df):
-    return df["qualifiers"].apply(lambda x: has_qualifier(x, display_name="Head"))
+    return col_has_qualifier(df, display_name="Head")
 
 
 def regular_play_qualifier(df):
-    return df["qualifiers"].apply(
-        lambda x: has_qualifier(x, display_name="RegularPlay")
-    )
+    return col_has_qualifier(df, display_name="RegularPlay")
 
 
 def in_attacking_six_yard_box(df):
     dims = opta_dims()
-    return np.array(
-        [
-            in_rectangle(
-                x,
-                y,
-                dims.six_yard_right,
-                dims.six_yard_bottom,
-                100,
-                dims.six_yard_top,
-            )
-            for x, y in zip(df["x"], df["y"])
-        ]
+    return col_in_rect(
+        df, (dims.six_yard_right, dims.six_yard_bottom), (100, dims.six_yard_top)
     )
 
 
 def is_fbref_big_chance(df):
-    return df["qualifiers"].apply(lambda x: has_qualifier(x, display_name="BigChance"))
+    return col_has_qualifier(df, display_name="BigChance")
 
 
 def in_rectangle(
@@ -135,15 +299,15 @@ def in_rectangle(
 
 
 def is_goal(dataframe):
-    return (dataframe["event_type"] == EventType.Goal) & (
+    return col_is_event_type(dataframe, EventType.Goal) & (
         ~col_has_qualifier(dataframe, qualifier_code=28)
     )
 
 
 def is_shot_on_target(dataframe):
-    return ((is_goal(dataframe)) | (dataframe["event_type"] == EventType.SavedShot)) & (
-        ~col_has_qualifier(dataframe, qualifier_code=82)
-    )
+    return (
+        (is_goal(dataframe)) | col_is_event_type(dataframe, EventType.SavedShot)
+    ) & (~col_has_qualifier(dataframe, qualifier_code=82))
 
 
 def is_shot(dataframe):
@@ -156,25 +320,87 @@ def is_shot(dataframe):
     Returns:
         pd.Series: True if the event is a shot, False otherwise
     """
-    return (
-        is_goal(dataframe)
-        | (dataframe["event_type"] == EventType.SavedShot)
-        | (dataframe["event_type"] == EventType.MissedShots)
-        | (dataframe["event_type"] == EventType.ShotOnPost)
+    return is_goal(dataframe) | col_is_event_type(
+        dataframe, EventType.SavedShot, EventType.MissedShots, EventType.ShotOnPost
     )
 
 
 def is_aerial_duel(dataframe):
-    return (dataframe["event_type"] == EventType.Aerial) | (
-        (dataframe["event_type"] == EventType.Foul)
+    return col_is_event_type(dataframe, EventType.Aerial) | (
+        col_is_event_type(dataframe, EventType.Foul)
         & (col_has_qualifier(dataframe, qualifier_code=264))
     )
 
 
 def is_tackle_attempted(dataframe):
-    return (dataframe["event_type"] == EventType.Tackle) | (
-        dataframe["event_type"] == EventType.Challenge
-    )
+    return col_is_event_type(dataframe, EventType.Tackle, EventType.Challenge)
+
+
+def in_rectangles(
+    x: np.ndarray,
+    y: np.ndarray,
+    rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+) -> np.ndarray:
+    """
+    Tests every (x, y) point against every rectangle in one broadcast comparison.
+
+    Args:
+        x (np.ndarray): The x coordinates of the points
+        y (np.ndarray): The y coordinates of the points
+        rectangles (List[Tuple[Tuple[float, float], Tuple[float, float]]]): The rectangles, each defined by two opposite verticles
+
+    Returns:
+        np.ndarray: Boolean array of shape (len(x), len(rectangles)), True where the point is in the rectangle (edges included)
+    """
+    bounds = np.asarray(rectangles, dtype=float).reshape(-1, 2, 2)
+    x_min, x_max = bounds[:, :, 0].min(axis=1), bounds[:, :, 0].max(axis=1)
+    y_min, y_max = bounds[:, :, 1].min(axis=1), bounds[:, :, 1].max(axis=1)
+    x = np.asarray(x, dtype=float)[:, np.newaxis]
+    y = np.asarray(y, dtype=float)[:, np.newaxis]
+    return (x_min <= x) & (x <= x_max) & (y_min <= y) & (y <= y_max)
+
+
+def col_in_rects(
+    whoscored_df: pd.DataFrame,
+    rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+    end_coord: bool = False,
+) -> np.ndarray:
+    """
+    Returns a boolean mask per rectangle indicating whether each event in a dataframe is located in it.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+        rectangles (List[Tuple[Tuple[float, float], Tuple[float, float]]]): The rectangles, each defined by two opposite verticles
+        end_coord (bool): If True, the end coordinates of the events are tested, otherwise the start coordinates
+
+    Returns:
+        np.ndarray: Boolean array of shape (len(whoscored_df), len(rectangles))
+    """
+    if end_coord:
+        x, y = whoscored_df[wc.END_X.N], whoscored_df[wc.END_Y.N]
+    else:
+        x, y = whoscored_df[wc.X.N], whoscored_df[wc.Y.N]
+    return in_rectangles(x.to_numpy(), y.to_numpy(), rectangles)
+
+
+def col_zone_id(
+    whoscored_df: pd.DataFrame,
+    rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+    end_coord: bool = False,
+) -> np.ndarray:
+    """
+    Returns the index of the first rectangle that contains each event in a dataframe.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+        rectangles (List[Tuple[Tuple[float, float], Tuple[float, float]]]): The zones, each defined by two opposite verticles
+        end_coord (bool): If True, the end coordinates of the events are tested, otherwise the start coordinates
+
+    Returns:
+        np.ndarray: The zone id of each event, or -1 if the event is in none of the zones
+    """
+    membership = col_in_rects(whoscored_df, rectangles, end_coord)
+    return np.where(membership.any(axis=1), membership.argmax(axis=1), -1)
 
 
 def col_in_rect(
@@ -182,7 +408,7 @@ def col_in_rect(
     verticle1: Tuple[float, float],
     verticle2: Tuple[float, float],
     end_coord: bool = False,
-) -> pd.Series:
+) -> np.ndarray:
     """
     Returns a boolean series indicating whether each event in a dataframe is located in the rectangle defined by verticle1 and verticle2.
 
@@ -193,15 +419,9 @@ def col_in_rect(
         end_coord (bool): If True, the verticles are considered as the end coordinates of the rectangle, otherwise they are considered as the start coordinates
 
     Returns:
-        pd.Series: True if the event is in the rectangle, False otherwise
+        np.ndarray: True if the event is in the rectangle, False otherwise
     """
-    if end_coord:
-        coords = zip(whoscored_df[wc.END_X.N], whoscored_df[wc.END_Y.N])
-    else:
-        coords = zip(whoscored_df[wc.X.N], whoscored_df[wc.Y.N])
-    x1, y1 = verticle1
-    x2, y2 = verticle2
-    return np.array([in_rectangle(x, y, x1, y1, x2, y2) for x, y in coords])
+    return col_in_rects(whoscored_df, [(verticle1, verticle2)], end_coord)[:, 0]
 
 
 def is_cutback(whoscored_df: pd.DataFrame) -> pd.Series:
@@ -219,11 +439,8 @@ def is_cutback(whoscored_df: pd.DataFrame) -> pd.Series:
     right_area = [(100, 0), (94, 36)]
     target_area = [(94, 64), (83, 36)]
     return (
-        (whoscored_df[wc.EVENT_TYPE.N] == EventType.Pass)
-        & (
-            (col_in_rect(whoscored_df, left_area[0], left_area[1]))
-            | (col_in_rect(whoscored_df, right_area[0], right_area[1]))
-        )
+        col_is_event_type(whoscored_df, EventType.Pass)
+        & (col_in_rects(whoscored_df, [left_area, right_area]).any(axis=1))
         & (col_in_rect(whoscored_df, target_area[0], target_area[1], True))
         & (~col_has_qualifier(whoscored_df, display_name="CornerTaken"))
         & (~col_has_qualifier(whoscored_df, display_name="Chipped"))
@@ -283,89 +500,184 @@ def in_defensive_box(df, start=True):
     return (df[x] < 17) & (df[x] >= 0) & (df[y] > 21) & (df[y] < 78.9)
 
 
-def is_keypass(df):
-    assisted_shots = df[df["shots"] & col_has_qualifier(df, qualifier_code=55)]
-    assist_ids = np.array(
-        [
-            str(a) + str(b)
-            for a, b in zip(
-                assisted_shots["matchId"],
-                [
-                    next(
-                        e["value"]
-                        for e in shot["qualifiers"]
-                        if e["type"]["value"] == 55
-                    )
-                    for _, shot in assisted_shots.iterrows()
-                ],
-            )
-        ]
-    )
-    return np.in1d(
-        np.array([str(a) + str(b) for a, b in (zip(df["matchId"], df["eventId"]))]),
-        assist_ids,
+VERTICAL_THIRD_EDGES = [33.0, 66.0]
+
+
+def col_vertical_zones(
+    whoscored_df: pd.DataFrame, end_coord: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bins the events of a dataframe into the vertical thirds and the penalty areas of the pitch.
+
+    The thirds come from a single `np.digitize` over x, with the same (right-closed) edges as the third filters, and
+    the penalty areas from one pass over x and y with the same bounds as `in_defensive_box` and `in_attacking_box`.
+    The result is computed once per frame and coordinate.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+        end_coord (bool): If True, the end coordinates of the events are binned, otherwise the start coordinates
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The third of each event (0 defensive, 1 middle, 2 attacking, -1 if x is missing),
+            and the penalty area of each event (0 defensive, 1 attacking, -1 if in neither)
+    """
+
+    def _zones():
+        if end_coord:
+            x, y = whoscored_df[wc.END_X.N], whoscored_df[wc.END_Y.N]
+        else:
+            x, y = whoscored_df[wc.X.N], whoscored_df[wc.Y.N]
+        x, y = x.to_numpy(dtype=float), y.to_numpy(dtype=float)
+        third = np.where(
+            np.isnan(x), -1, np.digitize(x, VERTICAL_THIRD_EDGES, right=True)
+        )
+        in_box_width = (y > 21) & (y < 78.9)
+        box = np.select(
+            [
+                in_box_width & (x >= 0) & (x < 17),
+                in_box_width & (x > 83) & (x <= 100),
+            ],
+            [0, 1],
+            -1,
+        )
+        return third, box
+
+    return frame_cached(
+        whoscored_df, "vertical_zones_end" if end_coord else "vertical_zones", _zones
     )
 
 
-def progressive_distance(whoscored_df: pd.DataFrame) -> pd.Series:
+ASSIST_LINK_KEYS = ["matchId", "teamId"]
+
+
+def assist_links(whoscored_df: pd.DataFrame) -> np.ndarray:
     """
-    Returns a boolean series indicating whether each event in a dataframe is a progressive pass
+    Resolves, for every event in a dataframe, the row of the event that assisted it, by following the related
+    event qualifier (code 55) of the event back to the event with that id from the same match and team.
+    The link is an integer join on (matchId, teamId, eventId) and is computed once per dataframe.
 
     Args:
         whoscored_df (pd.DataFrame): The dataframe
 
     Returns:
-        pd.Series: True if the event is a progressive pass, False otherwise
+        np.ndarray: The positional row of the assisting event, or -1 if the event has no assisting event in the dataframe
+    """
+
+    def _links():
+        related_event = col_get_qualifier_value(
+            whoscored_df, qualifier_code=55, numeric=True
+        ).to_numpy()
+        linked = ~np.isnan(related_event)
+        keys = whoscored_df[ASSIST_LINK_KEYS + ["eventId"]].reset_index(drop=True)
+        events = keys.drop_duplicates()
+        event_index = pd.MultiIndex.from_frame(events)
+        source_rows = events.index.to_numpy()
+        related = keys.loc[linked, ASSIST_LINK_KEYS].copy()
+        related["eventId"] = related_event[linked].astype(np.int64)
+        matches = event_index.get_indexer(pd.MultiIndex.from_frame(related))
+
+        links = np.full(len(whoscored_df), -1, dtype=np.int64)
+        links[np.flatnonzero(linked)] = np.where(matches >= 0, source_rows[matches], -1)
+        return links
+
+    return frame_cached(whoscored_df, "assist_links", _links)
+
 
+def _assisting_events(df: pd.DataFrame, assisted: pd.Series) -> np.ndarray:
+    links = assist_links(df)
+    assisting_rows = links[np.asarray(assisted, dtype=bool) & (links >= 0)]
+    mask = np.zeros(len(df), dtype=bool)
+    mask[assisting_rows] = True
+    return mask
+
+
+def is_keypass(df):
+    return _assisting_events(df, df["shots"])
+
+
+def assisted_xg(whoscored_df: pd.DataFrame) -> pd.Series:
     """
+    Returns the xG of the shots assisted by each event in a dataframe
 
-    start_distance_to_goal_middle = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        MIDDLE_GOAL_COORDS[0],
-        MIDDLE_GOAL_COORDS[1],
-    )
-    start_distance_to_goal_top = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        TOP_GOAL_COORDS[0],
-        TOP_GOAL_COORDS[1],
-    )
-    start_distance_to_goal_bottom = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        BOTTOM_GOAL_COORDS[0],
-        BOTTOM_GOAL_COORDS[1],
-    )
-    start_distance = np.minimum(
-        start_distance_to_goal_middle,
-        np.minimum(start_distance_to_goal_top, start_distance_to_goal_bottom),
-    )
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
 
-    end_distance_to_goal_middle = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        MIDDLE_GOAL_COORDS[0],
-        MIDDLE_GOAL_COORDS[1],
+    Returns:
+        pd.Series: The total xG of the shots the event assisted, 0 if it assisted none
+    """
+    links = assist_links(whoscored_df)
+    linked = links >= 0
+    return pd.Series(
+        np.bincount(
+            links[linked],
+            weights=np.nan_to_num(whoscored_df["xG"].to_numpy(dtype=float)[linked]),
+            minlength=len(whoscored_df),
+        ),
+        index=whoscored_df.index,
     )
-    end_distance_to_goal_top = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        TOP_GOAL_COORDS[0],
-        TOP_GOAL_COORDS[1],
+
+
+GOAL_MOUTH_COORDS = [MIDDLE_GOAL_COORDS, TOP_GOAL_COORDS, BOTTOM_GOAL_COORDS]
+
+
+def distance_to_goal(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance from each point to the nearest of the goal mouth points (middle, top and bottom of the goal),
+    in uefa pitch units.  The points are standardized only once, and compared to all goal mouth points in one broadcast.
+
+    Args:
+        x (np.ndarray): The x coordinates of the points, in opta pitch units
+        y (np.ndarray): The y coordinates of the points, in opta pitch units
+
+    Returns:
+        np.ndarray: The distance from each point to the goal
+    """
+    standardizer = distance._standardizer
+    goal_x, goal_y = standardizer.transform(
+        [c[0] for c in GOAL_MOUTH_COORDS], [c[1] for c in GOAL_MOUTH_COORDS]
     )
-    end_distance_to_goal_bottom = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        BOTTOM_GOAL_COORDS[0],
-        BOTTOM_GOAL_COORDS[1],
+    x, y = standardizer.transform(
+        np.asarray(x, dtype=float), np.asarray(y, dtype=float)
     )
-    end_distance = np.minimum(
-        end_distance_to_goal_middle,
-        np.minimum(end_distance_to_goal_top, end_distance_to_goal_bottom),
+    return np.sqrt(
+        np.power(x[:, np.newaxis] - goal_x, 2) + np.power(y[:, np.newaxis] - goal_y, 2)
+    ).min(axis=1)
+
+
+def goal_distances(whoscored_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the distance to goal of the start and end coordinates of each event in a dataframe.  This is the shared
+    kernel behind pass and carry progression metrics, and is computed once per dataframe.
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The start and end distances to goal of each event
+    """
+    return frame_cached(
+        whoscored_df,
+        "goal_distances",
+        lambda: (
+            distance_to_goal(whoscored_df[wc.X.N], whoscored_df[wc.Y.N]),
+            distance_to_goal(whoscored_df[wc.END_X.N], whoscored_df[wc.END_Y.N]),
+        ),
     )
 
-    return start_distance[0] - end_distance[0]
+
+def progressive_distance(whoscored_df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the distance towards goal gained by each event in a dataframe
+
+    Args:
+        whoscored_df (pd.DataFrame): The dataframe
+
+    Returns:
+        np.ndarray: How much closer to goal each event ended than it started
+
+    """
+    start_distance, end_distance = goal_distances(whoscored_df)
+    return start_distance - end_distance
 
 
 def is_progressive(whoscored_df: pd.DataFrame) -> pd.Series:
@@ -379,83 +691,17 @@ def is_progressive(whoscored_df: pd.DataFrame) -> pd.Series:
         pd.Series: True if the event is a progressive pass, False otherwise
 
     """
-
-    start_distance_to_goal_middle = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        MIDDLE_GOAL_COORDS[0],
-        MIDDLE_GOAL_COORDS[1],
-    )
-    start_distance_to_goal_top = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        TOP_GOAL_COORDS[0],
-        TOP_GOAL_COORDS[1],
-    )
-    start_distance_to_goal_bottom = distance(
-        whoscored_df[wc.X.N],
-        whoscored_df[wc.Y.N],
-        BOTTOM_GOAL_COORDS[0],
-        BOTTOM_GOAL_COORDS[1],
-    )
-    start_distance = np.minimum(
-        start_distance_to_goal_middle,
-        np.minimum(start_distance_to_goal_top, start_distance_to_goal_bottom),
-    )
-
-    end_distance_to_goal_middle = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        MIDDLE_GOAL_COORDS[0],
-        MIDDLE_GOAL_COORDS[1],
-    )
-    end_distance_to_goal_top = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        TOP_GOAL_COORDS[0],
-        TOP_GOAL_COORDS[1],
-    )
-    end_distance_to_goal_bottom = distance(
-        whoscored_df[wc.END_X.N],
-        whoscored_df[wc.END_Y.N],
-        BOTTOM_GOAL_COORDS[0],
-        BOTTOM_GOAL_COORDS[1],
-    )
-    end_distance = np.minimum(
-        end_distance_to_goal_middle,
-        np.minimum(end_distance_to_goal_top, end_distance_to_goal_bottom),
-    )
-
+    start_distance, end_distance = goal_distances(whoscored_df)
     is_progressive = (
         (end_distance < start_distance * 0.75)
-        & (whoscored_df[wc.EVENT_TYPE.N] == EventType.Pass)
+        & col_is_event_type(whoscored_df, EventType.Pass)
         & (~col_has_qualifier(whoscored_df, display_name="CornerTaken"))
     )
     return is_progressive
 
 
 def is_assist(df):
-    assisted_shots = df[df["goals"] & col_has_qualifier(df, qualifier_code=55)]
-    assist_ids = np.array(
-        [
-            str(a) + str(b)
-            for a, b in zip(
-                assisted_shots["matchId"],
-                [
-                    next(
-                        e["value"]
-                        for e in shot["qualifiers"]
-                        if e["type"]["value"] == 55
-                    )
-                    for _, shot in assisted_shots.iterrows()
-                ],
-            )
-        ]
-    )
-    return np.in1d(
-        np.array([str(a) + str(b) for a, b in (zip(df["matchId"], df["eventId"]))]),
-        assist_ids,
-    )
+    return _assisting_events(df, df["goals"])
 
 
 def into_attacking_box(dataframe):
@@ -469,61 +715,77 @@ def success(dataframe):
 
 
 def open_play_pass_attempt(dataframe):
-    return (
-        (dataframe["event_type"] == EventType.Pass)
-        & (~col_has_qualifier(dataframe, qualifier_code=2))  # not cross
-        & (~col_has_qualifier(dataframe, qualifier_code=5))  # not free kick
-        & (~col_has_qualifier(dataframe, qualifier_code=6))  # not corner
-        & (~col_has_qualifier(dataframe, qualifier_code=107))  # not throw in
-        & (~col_has_qualifier(dataframe, qualifier_code=123))  # not keeper throw
+    # not cross, free kick, corner, throw in or keeper throw
+    return col_is_event_type(dataframe, EventType.Pass) & (
+        ~col_has_any_qualifier(dataframe, [2, 5, 6, 107, 123])
     )
 
 
 def pass_attempt(dataframe):
-    return (
-        (dataframe["event_type"] == EventType.Pass)
-        & (~col_has_qualifier(dataframe, qualifier_code=107))  # not throw in
-        & (~col_has_qualifier(dataframe, qualifier_code=123))  # not keeper throw
-        & (~col_has_qualifier(dataframe, qualifier_code=2))  # not cross
+    # not throw in, keeper throw or cross
+    return col_is_event_type(dataframe, EventType.Pass) & (
+        ~col_has_any_qualifier(dataframe, [107, 123, 2])
     )
 
 
 def cross_attempt(dataframe):
     return (
-        (dataframe["event_type"] == EventType.Pass)
+        col_is_event_type(dataframe, EventType.Pass)
         & (col_has_qualifier(dataframe, qualifier_code=2))
-        & (~col_has_qualifier(dataframe, qualifier_code=5))  # not free kick
-        & (~col_has_qualifier(dataframe, qualifier_code=6))  # not corner
+        & (~col_has_any_qualifier(dataframe, [5, 6]))  # not free kick or corner
     )
 
 
-def col_get_qualifier_value(dataframe, display_name="", qualifier_code=-1):
-    def _one(qs, display_name, qualifier_code):
-        if display_name:
-            try:
-                q = next(d for d in qs if d["type"]["displayName"] == display_name)  # type: ignore
-
-            except StopIteration:
-                return np.nan
+def col_get_qualifier_value(
+    dataframe: pd.DataFrame,
+    display_name: str = "",
+    qualifier_code: int = -1,
+    numeric: bool = False,
+) -> pd.Series:
+    """
+    Gets the value of a given qualifier for each event of a dataframe
 
-        else:
-            try:
-                q = next(d for d in qs if d["type"]["value"] == qualifier_code)  # type: ignore
+    Args:
+        dataframe (pd.DataFrame): The dataframe
+        display_name (str): The display name of the qualifier
+        qualifier_code (int): The code of the qualifier
+        numeric (bool): If True, the values are parsed to floats
 
-                return q["value"] if "value" in q else np.nan
-            except StopIteration:
-                return np.nan
+    Returns:
+        pd.Series: The value of the qualifier, or nan if the event does not have the qualifier
 
-    return dataframe["qualifiers"].apply(
-        lambda x: _one(x, display_name, qualifier_code)
+    """
+    return pd.Series(
+        get_qualifier_index(dataframe).value(display_name, qualifier_code, numeric),
+        index=dataframe.index,
     )
 
 
+def col_get_qualifier_values(
+    dataframe: pd.DataFrame, qualifier_codes: List[int], numeric: bool = True
+) -> pd.DataFrame:
+    """
+    Gets the values of several qualifiers for each event of a dataframe in a single pass
+
+    Args:
+        dataframe (pd.DataFrame): The dataframe
+        qualifier_codes (List[int]): The codes of the qualifiers
+        numeric (bool): If True, the values are parsed to floats
+
+    Returns:
+        pd.DataFrame: One column per qualifier code, holding the value of the qualifier or nan if the event does not have it
+
+    """
+    values = get_qualifier_index(dataframe).values(qualifier_codes, numeric)
+    values.index = dataframe.index
+    return values
+
+
 def minutes(df):
-    sub_ons = df.loc[df["event_type"] == EventType.SubstitutionOn].rename(
+    sub_ons = df.loc[col_is_event_type(df, EventType.SubstitutionOn)].rename(
         columns={"minute": "sub_on_minute"}
     )
-    sub_offs = df.loc[df["event_type"] == EventType.SubstitutionOff].rename(
+    sub_offs = df.loc[col_is_event_type(df, EventType.SubstitutionOff)].rename(
         columns={"minute": "sub_off_minute"}
     )
     last_min = df.groupby(["matchId", "period"]).agg({"minute": "max"})
@@ -560,10 +822,10 @@ def minutes(df):
 def minutes_per_position(df):
     df = df.loc[df["second"] != -9999].copy()
     df["ts"] = df["minute"] * 60 + df["second"]
-    sub_ons = df.loc[df["event_type"] == EventType.SubstitutionOn].rename(
+    sub_ons = df.loc[col_is_event_type(df, EventType.SubstitutionOn)].rename(
         columns={"ts": "sub_on_ts"}
     )
-    sub_offs = df.loc[df["event_type"] == EventType.SubstitutionOff].rename(
+    sub_offs = df.loc[col_is_event_type(df, EventType.SubstitutionOff)].rename(
         columns={"ts": "sub_off_ts"}
     )
     last_min = (
@@ -589,73 +851,92 @@ def minutes_per_position(df):
     ).fillna(1000000)
 
     player_df = player_df[player_df["position"] != 0]
-    player_df["start"] = player_df["period"].apply(lambda x: 0 if x == 1 else 45 * 60)
+    player_df["start"] = np.where(player_df["period"] == 1, 0, 45 * 60)
     player_df["sub_off_ts"] = player_df[["sub_off_ts", "max_ts"]].min(axis=1)
     player_df["sub_on_ts"] = player_df[["sub_on_ts", "start"]].max(axis=1)
     formations_and_subs = df.loc[
-        df["event_type"].isin([EventType.SubstitutionOn, EventType.FormationChange])
+        col_is_event_type(df, EventType.SubstitutionOn, EventType.FormationChange)
     ][["matchId", "period", "ts"]].drop_duplicates()
-    player_df = player_df.groupby(["matchId", "player_name", "period", "position"]).agg(
-        {"ts": ["min", "max"], "sub_on_ts": "min", "sub_off_ts": "max"}
-    )
-
-    player_df["start_ts"] = player_df["sub_on_ts"]
-    player_df["end_ts"] = player_df["sub_off_ts"]
-    for i, g in player_df.reset_index().groupby(["matchId", "player_name", "period"]):
-
-        if len(g) > 1:
-            _g = g.sort_values(("ts", "min"))
-            _boundaries = formations_and_subs.loc[
-                (formations_and_subs["matchId"] == i[0])
-                & (formations_and_subs["period"] == i[2])
-            ]["ts"].tolist()
-            try:
-                next_boundary = next(
-                    b
-                    for b in _boundaries
-                    if b >= _g.iloc[0][("ts", "max")] and b <= _g.iloc[1][("ts", "min")]
-                )
-
-            except:
-                next_boundary = (
-                    _g.iloc[0][("ts", "max")] + _g.iloc[1][("ts", "min")]
-                ) / 2
-
-            player_df.loc[
-                (i[0], i[1], i[2], _g.iloc[0]["position"]), "end_ts"
-            ] = next_boundary
-
-            for j in range(1, len(g)):
-                player_df.loc[
-                    (i[0], i[1], i[2], _g.iloc[j]["position"]), "start_ts"
-                ] = player_df.loc[
-                    (i[0], i[1], i[2], _g.iloc[j - 1]["position"]), "end_ts"
-                ].values[
-                    0
+    player_df = (
+        player_df.groupby(["matchId", "player_name", "period", "position"])
+        .agg(
+            ts_min=("ts", "min"),
+            ts_max=("ts", "max"),
+            start_ts=("sub_on_ts", "min"),
+            end_ts=("sub_off_ts", "max"),
+        )
+        .reset_index()
+        .sort_values(["matchId", "player_name", "period", "ts_min"], kind="mergesort")
+    )
+    start_ts, end_ts = _split_position_intervals(player_df, formations_and_subs)
+
+    player_df["minutes"] = (end_ts - start_ts) / 60
+    return player_df.groupby(["matchId", "player_name", "position"]).agg(
+        {"minutes": "sum"}
+    )
+
+
+def _split_position_intervals(
+    position_spans: pd.DataFrame, boundaries: pd.DataFrame
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits a player's time on the pitch in a period between the positions they played in.
+
+    `position_spans` holds one row per (matchId, player_name, period, position), sorted by the first event of the
+    player in that position.  Every position runs from the player's sub on time to their sub off time, except
+    where the player changed position: the change is put at the earliest formation change or substitution between
+    the last event in the old position and the first event in the new one, or halfway between those two events if
+    there was no such boundary.  The boundaries of all periods are resolved in one `searchsorted` over a single
+    sorted key array rather than a scan per player.
+
+    Args:
+        position_spans (pd.DataFrame): Per-position spans with ts_min, ts_max, start_ts and end_ts columns
+        boundaries (pd.DataFrame): The matchId, period and ts of every formation change and substitution
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The start and end timestamp of every position span
+    """
+    start_ts = position_spans["start_ts"].to_numpy(dtype=float).copy()
+    end_ts = position_spans["end_ts"].to_numpy(dtype=float).copy()
+    keys = ["matchId", "player_name", "period"]
+    changes = np.flatnonzero(
+        (
+            position_spans[keys].iloc[1:].to_numpy()
+            == position_spans[keys].iloc[:-1].to_numpy()
+        ).all(axis=1)
+    )
+    if len(changes) == 0:
+        return start_ts, end_ts
+
+    # encode (matchId, period, ts) as one sortable float so every period's boundaries live in the same array
+    period_codes, _ = pd.factorize(
+        pd.MultiIndex.from_frame(
+            pd.concat(
+                [
+                    boundaries[["matchId", "period"]],
+                    position_spans[["matchId", "period"]].iloc[changes],
                 ]
-                if j != len(g) - 1:
-                    try:
-                        next_boundary = next(
-                            b
-                            for b in _boundaries
-                            if b >= _g.iloc[j][("ts", "max")]
-                            and b <= _g.iloc[j + 1][("ts", "min")]
-                        )
-
-                    except:
-                        next_boundary = (
-                            _g.iloc[j][("ts", "max")] + _g.iloc[j + 1][("ts", "min")]
-                        ) / 2
-                    player_df.loc[
-                        (i[0], i[1], i[2], _g.iloc[j]["position"]), "end_ts"
-                    ] = next_boundary
-
-    player_df["minutes"] = (player_df["end_ts"] - player_df["start_ts"]) / 60
-    player_df_agg = player_df.groupby(["matchId", "player_name", "position"]).agg(
-        {("minutes", ""): "sum"}
-    )
-    player_df_agg.columns = ["minutes"]
-    return player_df_agg
+            )
+        )
+    )
+    boundary_ts = boundaries["ts"].to_numpy(dtype=float)
+    stride = max(np.nanmax(boundary_ts, initial=0), position_spans["ts_max"].max()) + 1
+    boundary_keys = np.sort(period_codes[: len(boundaries)] * stride + boundary_ts)
+    change_codes = period_codes[len(boundaries) :] * stride
+
+    last_ts_before = position_spans["ts_max"].to_numpy(dtype=float)[changes]
+    first_ts_after = position_spans["ts_min"].to_numpy(dtype=float)[changes + 1]
+    candidates = np.searchsorted(boundary_keys, change_codes + last_ts_before)
+    found = candidates < len(boundary_keys)
+    candidate_keys = boundary_keys[np.minimum(candidates, len(boundary_keys) - 1)]
+    found &= candidate_keys <= change_codes + first_ts_after
+    change_ts = np.where(
+        found, candidate_keys - change_codes, (last_ts_before + first_ts_after) / 2
+    )
+
+    end_ts[changes] = change_ts
+    start_ts[changes + 1] = change_ts
+    return start_ts, end_ts
 
 
 class PassClassifier(abc.ABC):
@@ -1,34 +1,50 @@
 import pandas as pd
 
-from footmav.utils.whoscored_funcs import get_xthreat_grid
+from footmav.utils import whoscored_funcs as WF
 from footmav.data_definitions.whoscored import whoscored_columns as wc
 import numpy as np
 from footmav.data_definitions.whoscored.constants import EventType
 
+X_BINS = np.linspace(0, 100, 13)
+Y_BINS = np.linspace(0, 100, 9)
+
+
+def xt_bin_index(values: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the (right-closed) bin each value falls into, or -1 if it is outside of the bins
+
+    Args:
+        values (np.ndarray): The values to bin
+        bins (np.ndarray): The bin edges
+
+    Returns:
+        np.ndarray: The bin index of each value
+    """
+    idx = np.searchsorted(bins, np.asarray(values, dtype=float), side="left") - 1
+    return np.where((idx >= 0) & (idx < len(bins) - 1), idx, -1)
+
+
+def xt_lookup(xt_grid: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Looks up the xthreat value of every (x, y) point with a single gather into the grid
+
+    Args:
+        xt_grid (np.ndarray): The xthreat grid, as 8 rows of 12 values
+        x (np.ndarray): The x coordinates of the points
+        y (np.ndarray): The y coordinates of the points
+
+    Returns:
+        np.ndarray: The xthreat of each point, 0 for points off the grid
+    """
+    idx_x = xt_bin_index(x, X_BINS)
+    idx_y = xt_bin_index(y, Y_BINS)
+    on_grid = (idx_x >= 0) & (idx_y >= 0)
+    return np.where(on_grid, xt_grid[idx_y, idx_x], 0)
+
 
 def net_pass_xt(events: pd.DataFrame):
-    xt_grid = get_xthreat_grid()
-    xt_idx_x = pd.cut(events[wc.X.N], bins=np.linspace(0, 100, 13), labels=range(12))
-    xt_idx_y = pd.cut(events[wc.Y.N], bins=np.linspace(0, 100, 9), labels=range(8))
-    xt_idx_x_end = pd.cut(
-        events[wc.END_X.N], bins=np.linspace(0, 100, 13), labels=range(12)
-    )
-    xt_idx_y_end = pd.cut(
-        events[wc.END_Y.N], bins=np.linspace(0, 100, 9), labels=range(8)
-    )
-    event_types = events[wc.EVENT_TYPE.N]
-    xt_start = np.array(
-        [
-            xt_grid[j][i] if i < 12 and j < 8 and event_type == EventType.Pass else 0
-            for i, j, event_type in zip(xt_idx_x, xt_idx_y, event_types)
-        ]
-    )
-
-    xt_end = np.array(
-        [
-            xt_grid[j][i] if i < 12 and j < 8 and event_type == EventType.Pass else 0
-            for i, j, event_type in zip(xt_idx_x_end, xt_idx_y_end, event_types)
-        ]
-    )
-    xt_pass_net = xt_end - xt_start
-    return xt_pass_net
+    xt_grid = np.asarray(WF.get_xthreat_grid(), dtype=float)
+    is_pass = WF.col_event_type_codes(events) == EventType.Pass.value
+    xt_start = xt_lookup(xt_grid, events[wc.X.N], events[wc.Y.N])
+    xt_end = xt_lookup(xt_grid, events[wc.END_X.N], events[wc.END_Y.N])
+    return np.where(is_pass, xt_end - xt_start, 0)
@@ -0,0 +1,42 @@
+import pandas as pd
+
+
+def test_synthetic_whoscored_events_are_seeded():
+    from benchmarks.synthetic import whoscored_events
+    from footmav.data_definitions.whoscored.constants import EventType
+
+    events = whoscored_events(2, seed=3, events_per_match=200)
+    pd.testing.assert_frame_equal(
+        events, whoscored_events(2, seed=3, events_per_match=200)
+    )
+    assert events["matchId"].nunique() == 2
+    assert (events["event_type"] == EventType.SubstitutionOn).sum() == 12
+    assert (events["event_type"] == EventType.FormationChange).sum() == 12
+    assert not events.duplicated(["matchId", "eventId"]).any()
+
+
+def test_run_benchmarks(monkeypatch, tmp_path):
+    import os
+    import tempfile
+    from benchmarks import run
+    from footmav.utils.whoscored_funcs import XTHREAT_GRID_ENV
+
+    # the runner points the env var at a synthetic grid for the duration of the run
+    monkeypatch.setenv(XTHREAT_GRID_ENV, "")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    results = run.run_benchmarks([2], repeat=1)
+    assert os.environ[XTHREAT_GRID_ENV] == ""
+    assert os.listdir(tmp_path) == []
+
+    benchmarks = [r["benchmark"] for r in results["results"]]
+    assert benchmarks == [
+        "generate_aggregate_dataframe",
+        "minutes_per_position",
+        "is_progressive",
+        "net_pass_xt",
+        "aggregate_by",
+        "per_90",
+        "possession_adjust",
+    ]
+    comparison = run.compare(results, results)
+    assert (comparison["ratio"] == 1).all()
@@ -0,0 +1,148 @@
+import pandas as pd
+import pytest
+from footmav.data_definitions.whoscored.constants import EventType
+
+
+def _q(code, name, value=None):
+    q = {"type": {"value": code, "displayName": name}}
+    if value is not None:
+        q["value"] = value
+    return q
+
+
+@pytest.fixture
+def registered():
+    """
+    The registered aggregators, restored after the test so aggregators registered by it do not leak
+    """
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.event_aggregator_processor import (
+        EventAggregationProcessor,
+    )
+
+    before = dict(EventAggregationProcessor.aggregators)
+    yield EventAggregationProcessor.aggregators
+    EventAggregationProcessor.aggregators.clear()
+    EventAggregationProcessor.aggregators.update(before)
+
+
+@pytest.fixture
+def whoscored_events():
+    """
+    Two small matches worth of whoscored-style events, with a substitution, a position change and an assisted goal
+    """
+    rows = []
+    for match_id, home, away in [(1, "home_a", "away_a"), (2, "home_b", "away_b")]:
+        for team_id, team, opponent, is_home in [
+            (10, home, away, True),
+            (20, away, home, False),
+        ]:
+            event_id = 1
+
+            def add(
+                minute,
+                player,
+                position,
+                event_type,
+                x,
+                y,
+                end_x,
+                end_y,
+                outcome=1,
+                qualifiers=None,
+                xg=0.0,
+                period=1,
+            ):
+                nonlocal event_id
+                rows.append(
+                    {
+                        "matchId": match_id,
+                        "match_date": pd.Timestamp("2022-08-01")
+                        + pd.Timedelta(days=match_id),
+                        "competition": "EPL",
+                        "season": 2023,
+                        "teamId": team_id,
+                        "team": team,
+                        "opponent": opponent,
+                        "is_home_team": is_home,
+                        "eventId": event_id,
+                        "period": period,
+                        "minute": minute,
+                        "second": 0,
+                        "player_name": player,
+                        "position": position,
+                        "event_type": event_type,
+                        "outcomeType": outcome,
+                        "x": x,
+                        "y": y,
+                        "endX": end_x,
+                        "endY": end_y,
+                        "qualifiers": qualifiers or [],
+                        "xG": xg,
+                    }
+                )
+                event_id += 1
+
+            add(1, f"{team}_gk", "GK", EventType.Pass, 5, 50, 40, 50)
+            add(10, f"{team}_cb", "DC", EventType.Pass, 30, 40, 70, 20)
+            add(15, f"{team}_cb", "DC", EventType.Tackle, 20, 45, 20, 45)
+            add(
+                20,
+                f"{team}_am",
+                "AMC",
+                EventType.Pass,
+                70,
+                50,
+                90,
+                50,
+                qualifiers=[_q(4, "ThroughBall")],
+            )
+            add(
+                20,
+                f"{team}_fw",
+                "FW",
+                EventType.Goal,
+                90,
+                50,
+                100,
+                50,
+                qualifiers=[_q(55, "RelatedEventId", "4"), _q(22, "RegularPlay")],
+                xg=0.4,
+            )
+            add(30, None, 0, EventType.FormationChange, 0, 0, 0, 0)
+            add(35, f"{team}_am", "MC", EventType.Pass, 50, 50, 20, 50, outcome=0)
+            add(
+                40,
+                f"{team}_fw",
+                "FW",
+                EventType.MissedShots,
+                88,
+                40,
+                100,
+                45,
+                qualifiers=[_q(15, "Head")],
+                xg=0.1,
+            )
+            add(
+                60, f"{team}_fw", "Sub", EventType.SubstitutionOff, 0, 0, 0, 0, period=2
+            )
+            add(
+                60, f"{team}_sub", "Sub", EventType.SubstitutionOn, 0, 0, 0, 0, period=2
+            )
+            add(
+                70,
+                f"{team}_sub",
+                "FW",
+                EventType.SavedShot,
+                95,
+                55,
+                100,
+                52,
+                xg=0.2,
+                period=2,
+            )
+            add(
+                80, f"{team}_cb", "DC", EventType.Interception, 15, 60, 15, 60, period=2
+            )
+            add(90, f"{team}_gk", "GK", EventType.Pass, 6, 40, 60, 90, period=2)
+    return pd.DataFrame(rows)
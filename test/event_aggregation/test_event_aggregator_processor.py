@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def registered():
+    from footmav.event_aggregation.event_aggregator_processor import (
+        EventAggregationProcessor,
+    )
+
+    before = dict(EventAggregationProcessor.aggregators)
+    yield EventAggregationProcessor.aggregators
+    EventAggregationProcessor.aggregators.clear()
+    EventAggregationProcessor.aggregators.update(before)
+
+
+def test_aggregator_is_computed_once_per_frame(registered):
+    from footmav.event_aggregation.event_aggregator_processor import (
+        event_aggregator,
+        get_aggregation_cache,
+    )
+
+    inner = MagicMock(side_effect=lambda df: df["x"] > 50)
+
+    @event_aggregator(success="completed", vertical_areas=3, group="test")
+    def _test_base(dataframe):
+        return inner(dataframe)
+
+    @event_aggregator(group="test")
+    def _test_derived(dataframe):
+        return _test_base(dataframe) & (dataframe["y"] > 50)
+
+    df = pd.DataFrame({"x": [10, 60, 80], "y": [60, 40, 70], "outcomeType": [1, 1, 0]})
+    assert _test_derived(df).tolist() == [False, False, True]
+    assert _test_base(df).tolist() == [False, True, True]
+    assert _test_base.success(df).tolist() == [False, True, False]
+    assert _test_base.att_3rd(df).tolist() == [False, False, True]
+    assert _test_base.att_3rd(df).tolist() == [False, False, True]
+    inner.assert_called_once()
+
+    stats = get_aggregation_cache(df).stats()
+    # the area split of the base mask is cached alongside the area columns
+    assert stats == {"hits": 4, "misses": 5, "entries": 5}
+
+    _test_base(df.copy())
+    assert inner.call_count == 2
+
+
+def test_vertical_areas_split_the_base_and_success_masks(registered):
+    from footmav.event_aggregation.event_aggregator_processor import event_aggregator
+
+    inner = MagicMock(side_effect=lambda df: df["x"] >= 0)
+
+    @event_aggregator(success="completed", vertical_areas=5, group="test")
+    def _test_areas(dataframe):
+        return inner(dataframe)
+
+    df = pd.DataFrame(
+        {
+            "x": [10.0, 33.0, 50.0, 66.0, 90.0, float("nan")],
+            "y": [50.0, 50.0, 50.0, 50.0, 10.0, 50.0],
+            "outcomeType": [1, 0, 1, 1, 1, 1],
+        },
+        index=[3, 4, 5, 6, 7, 8],
+    )
+    assert _test_areas.def_pen_area(df).tolist() == [1, 0, 0, 0, 0, 0]
+    assert _test_areas.def_3rd(df).tolist() == [1, 1, 0, 0, 0, 0]
+    assert _test_areas.mid_3rd(df).tolist() == [0, 0, 1, 1, 0, 0]
+    assert _test_areas.att_3rd(df).tolist() == [0, 0, 0, 0, 1, 0]
+    assert _test_areas.att_pen_area(df).tolist() == [0] * 6
+    assert _test_areas.def_3rd_completed(df).tolist() == [1, 0, 0, 0, 0, 0]
+    assert _test_areas.mid_3rd_completed(df).index.tolist() == df.index.tolist()
+    assert _test_areas.mid_3rd_completed(df).tolist() == [0, 0, 1, 1, 0, 0]
+    inner.assert_called_once()
@@ -0,0 +1,258 @@
+def test_generate_aggregate_dataframe(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    result = generate_aggregate_dataframe(whoscored_events)
+
+    # 2 matches x 2 teams x 8 (player, position) pairs, substitution events carry the Sub position
+    assert len(result) == 2 * 2 * 8
+    fw = result.loc[
+        (result[("match_id", "")] == 1) & (result[("player_name", "")] == "home_a_fw")
+    ].iloc[0]
+    assert fw[("shooting", "shots")] == 2
+    assert fw[("shooting", "goals")] == 1
+    assert fw[("shooting", "headed_shots")] == 1
+    assert fw[("minutes", "minutes")] == 40
+
+    am = result.loc[
+        (result[("match_id", "")] == 1) & (result[("player_name", "")] == "home_a_am")
+    ]
+    assert am[("", "xa")].sum() == 0.4
+    assert am[("position", "")].tolist() == ["AMC", "MC"]
+    # the position change is placed at the formation change in the 30th minute
+    assert am[("minutes", "minutes")].tolist() == [30, 10]
+
+    stats = result.attrs["aggregation_cache"]
+    assert stats["misses"] == stats["entries"]
+    assert stats["hits"] > 0
+
+
+def test_generate_aggregate_dataframe_groups(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    result = generate_aggregate_dataframe(whoscored_events, groups=["shooting"])
+    groups = {c[0] for c in result.columns if c[1]}
+    assert groups == {"shooting", "minutes"}
+
+
+def test_generate_aggregate_dataframe_columns(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    result = generate_aggregate_dataframe(whoscored_events, columns=["goals"])
+    assert [c for c in result.columns if c[1]] == [
+        ("shooting", "goals"),
+        ("minutes", "minutes"),
+    ]
+    plan = result.attrs["execution_plan"]
+    assert [(s["name"], s["output"]) for s in plan] == [
+        ("shots", False),
+        ("goals", True),
+    ]
+
+
+def test_generate_aggregate_dataframe_sharded(whoscored_events):
+    import pandas as pd
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    expected = generate_aggregate_dataframe(whoscored_events)
+    result = generate_aggregate_dataframe(
+        whoscored_events, n_workers=2, matches_per_shard=1
+    )
+    pd.testing.assert_frame_equal(result, expected)
+    assert result.attrs["shards"] == 2
+    assert result.attrs["execution_plan"] == expected.attrs["execution_plan"]
+
+
+def test_update_aggregate_dataframe(whoscored_events):
+    import pandas as pd
+    import pytest
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import (
+        generate_aggregate_dataframe,
+        update_aggregate_dataframe,
+    )
+
+    expected = generate_aggregate_dataframe(whoscored_events)
+    first_match = whoscored_events.loc[whoscored_events["matchId"] == 1]
+    second_match = whoscored_events.loc[whoscored_events["matchId"] == 2]
+
+    existing = generate_aggregate_dataframe(second_match)
+    updated = update_aggregate_dataframe(existing, first_match)
+    pd.testing.assert_frame_equal(updated, expected)
+
+    # re-delivering a match replaces its rows rather than duplicating them
+    updated = update_aggregate_dataframe(updated, second_match)
+    pd.testing.assert_frame_equal(updated, expected)
+
+    with pytest.raises(ValueError, match="do not match"):
+        update_aggregate_dataframe(existing, first_match, groups=["shooting"])
+
+    # frames generated before the possession metrics were added can still be upserted into
+    assert "possession" not in expected.columns.get_level_values(0)
+    full = generate_aggregate_dataframe(whoscored_events, persistent_only=False)
+    assert ("possession", "xg_chain") in full.columns
+
+    # starting from nothing, or from a frame without rows, is a full run of the new events
+    pd.testing.assert_frame_equal(
+        update_aggregate_dataframe(pd.DataFrame(), whoscored_events), expected
+    )
+    pd.testing.assert_frame_equal(
+        update_aggregate_dataframe(existing.iloc[:0], whoscored_events), expected
+    )
+
+
+def test_generate_aggregate_dataframe_with_encoded_event_types(whoscored_events):
+    import pandas as pd
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+    from footmav.utils.whoscored_funcs import encode_event_type_column
+
+    expected = generate_aggregate_dataframe(whoscored_events)
+    encoded = generate_aggregate_dataframe(encode_event_type_column(whoscored_events))
+    pd.testing.assert_frame_equal(encoded, expected)
+
+
+def test_generate_aggregate_dataframe_sharded_profile(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    result = generate_aggregate_dataframe(
+        whoscored_events, n_workers=2, matches_per_shard=1, profile=True
+    )
+    report = {(r["kind"], r["name"]): r["calls"] for r in result.attrs["profile"]}
+    assert report[("stage", "rollup")] == 2
+
+
+def test_team_level_chain_xg():
+    import numpy as np
+    from benchmarks.synthetic import whoscored_events
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_levels
+    from footmav.utils.possession_chains import chain_summary
+
+    events = whoscored_events(4)
+    levels = generate_aggregate_levels(
+        events, persistent_only=False, groups=["shooting", "possession"]
+    )
+    player, team = levels["player"], levels["team"]
+
+    # every chain is counted once for its team, rather than once per player involved in it
+    summary = chain_summary(events)
+    teams = events.drop_duplicates("teamId").set_index("teamId")["team"]
+    chain_xg = summary.groupby(["matchId", summary["teamId"].map(teams)])["xg"].sum()
+    keys = list(zip(team[("match_id", "")], team[("team", "")]))
+    np.testing.assert_allclose(
+        team[("possession", "xg_chain")], chain_xg.reindex(keys).fillna(0)
+    )
+    np.testing.assert_allclose(
+        team[("possession", "xg_chain")], team[("shooting", "xg")]
+    )
+    assert (
+        team[("possession", "xg_buildup")] <= team[("possession", "xg_chain")] + 1e-9
+    ).all()
+    assert (
+        player[("possession", "xg_chain")].sum()
+        > team[("possession", "xg_chain")].sum()
+    )
+
+
+def test_working_set(whoscored_events):
+    import numpy as np
+    from footmav.event_aggregation.generator import GROUP_KEYS, working_set
+    from footmav.utils.qualifier_index import get_qualifier_index
+
+    columns = list(whoscored_events.columns)
+    working = working_set(whoscored_events)
+    assert "qualifiers" not in working.columns
+    assert set(GROUP_KEYS) <= set(working.columns)
+    assert working["event_type"].tolist() == whoscored_events["event_type"].tolist()
+    assert working["outcomeType"].dtype == np.int8
+    assert working.index.equals(whoscored_events.index)
+    assert get_qualifier_index(working) is get_qualifier_index(whoscored_events)
+    assert list(whoscored_events.columns) == columns
+    assert (
+        working_set(whoscored_events, ["qualifiers", "missing"]).columns[-1]
+        == "qualifiers"
+    )
+
+
+def test_custom_aggregators_on_raw_columns(whoscored_events, registered):
+    from footmav.data_definitions.whoscored.constants import EventType
+    from footmav.event_aggregation.event_aggregator_processor import event_aggregator
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+
+    # written against the raw event frame, as aggregators were before the working set
+    @event_aggregator(suffix="", persistent=False, group="custom")
+    def legacy_passes(dataframe):
+        return (dataframe["event_type"] == EventType.Pass) & (
+            dataframe["outcomeType"] == 1
+        )
+
+    @event_aggregator(
+        suffix="", persistent=False, group="custom", columns=["qualifiers"]
+    )
+    def qualified_events(dataframe):
+        return dataframe["qualifiers"].map(len) > 0
+
+    result = generate_aggregate_dataframe(
+        whoscored_events,
+        persistent_only=False,
+        columns=["legacy_passes", "qualified_events"],
+    ).set_index([("match_id", ""), ("player_name", ""), ("position", "")])
+    expected = (
+        whoscored_events.assign(
+            passes=(whoscored_events["event_type"] == EventType.Pass)
+            & (whoscored_events["outcomeType"] == 1),
+            qualified=whoscored_events["qualifiers"].map(len) > 0,
+        )
+        .groupby(["matchId", "player_name", "position"])[["passes", "qualified"]]
+        .sum()
+        .reindex(result.index)
+    )
+
+    assert expected["passes"].sum() > 0
+    assert result[("custom", "legacy_passes")].tolist() == expected["passes"].tolist()
+    assert (
+        result[("custom", "qualified_events")].tolist()
+        == expected["qualified"].tolist()
+    )
+
+
+def test_generate_aggregate_levels(whoscored_events):
+    import pandas as pd
+    import pytest
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import (
+        generate_aggregate_dataframe,
+        generate_aggregate_levels,
+    )
+
+    levels = generate_aggregate_levels(whoscored_events, groups=["shooting"])
+    player = generate_aggregate_dataframe(whoscored_events, groups=["shooting"])
+    pd.testing.assert_frame_equal(levels["player"], player)
+
+    team = levels["team"]
+    assert len(team) == 2 * 2
+    for _, row in team.iterrows():
+        players = player.loc[
+            (player[("match_id", "")] == row[("match_id", "")])
+            & (player[("team", "")] == row[("team", "")])
+        ]
+        opponent = team.loc[
+            (team[("match_id", "")] == row[("match_id", "")])
+            & (team[("team", "")] == row[("opponent", "")])
+        ].iloc[0]
+        assert row[("shooting", "shots")] == players[("shooting", "shots")].sum()
+        assert row[("shooting", "shots_against")] == opponent[("shooting", "shots")]
+        assert row[("shooting", "goals_against")] == opponent[("shooting", "goals")]
+
+    sharded = generate_aggregate_levels(
+        whoscored_events, groups=["shooting"], n_workers=2, matches_per_shard=1
+    )
+    pd.testing.assert_frame_equal(sharded["team"], team)
+
+    with pytest.raises(ValueError):
+        generate_aggregate_levels(whoscored_events, levels=["league"])
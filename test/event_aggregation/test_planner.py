@@ -0,0 +1,54 @@
+import pytest
+
+
+def test_plan_orders_dependencies_first(registered):
+    from footmav.event_aggregation.planner import build_execution_plan
+
+    plan = build_execution_plan(columns=["diagonals_attempted"])
+    names = [step.name for step in plan]
+    assert names[-1] == "diagonals_attempted"
+    assert set(names) == {
+        "passes_attempted",
+        "progressive_passes_attempted",
+        "switches_attempted",
+        "diagonals_attempted",
+    }
+    assert names.index("passes_attempted") < names.index("switches_attempted")
+    assert [step.name for step in plan if step.output] == ["diagonals_attempted"]
+    assert plan.output_columns == [("", "diagonals_attempted")]
+
+
+def test_plan_groups_and_extra_functions(registered):
+    from footmav.event_aggregation.planner import build_execution_plan
+
+    plan = build_execution_plan(groups=["passing"])
+    frame = plan.to_frame()
+    assert set(frame["group"]) == {"passing"}
+    assert frame["output"].all()
+    completed = frame.loc[frame["name"] == "passes_completed"].iloc[0]
+    assert completed["depends_on"] == ["passes_attempted"]
+
+
+def test_plan_declared_dependencies_and_cycles(registered):
+    from footmav.event_aggregation.event_aggregator_processor import event_aggregator
+    from footmav.event_aggregation.planner import build_execution_plan
+
+    @event_aggregator(group="test", depends_on=["_test_b"])
+    def _test_a(dataframe):
+        return dataframe["x"] > 0
+
+    @event_aggregator(group="test")
+    def _test_b(dataframe):
+        return _test_a(dataframe)
+
+    assert _test_a.depends_on == ["_test_b"]
+    assert _test_b.depends_on == ["_test_a"]
+    with pytest.raises(ValueError, match="Circular aggregator dependency"):
+        build_execution_plan(groups=["test"])
+
+
+def test_plan_unknown_column(registered):
+    from footmav.event_aggregation.planner import build_execution_plan
+
+    with pytest.raises(ValueError, match="Unknown aggregated columns"):
+        build_execution_plan(columns=["not_an_aggregator"])
@@ -0,0 +1,67 @@
+import pandas as pd
+
+
+def test_profiler_records_nested_calls():
+    from footmav.event_aggregation.profiling import AggregationProfiler, profiled
+
+    with AggregationProfiler(track_memory=False, helpers=False) as profiler:
+        for _ in range(2):
+            with profiled("outer", "stage"):
+                with profiled("inner", "stage"):
+                    pass
+    with profiled("ignored", "stage"):
+        pass
+
+    report = profiler.report().set_index("name")
+    assert report.loc[["outer", "inner"], "calls"].tolist() == [2, 2]
+    assert report.loc["outer", "total_time"] >= report.loc["inner", "total_time"]
+    assert report.loc["outer", "self_time"] <= report.loc["outer", "total_time"]
+    assert report.loc["inner", "self_time"] == report.loc["inner", "total_time"]
+    assert "ignored" not in report.index
+
+
+def test_profiler_restores_helpers_on_error(whoscored_events, monkeypatch):
+    import pytest
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+    from footmav.event_aggregation.profiling import AggregationProfiler, active_profiler
+    from footmav.utils import whoscored_funcs as WF
+
+    is_shot = WF.is_shot
+    with pytest.raises(RuntimeError):
+        with AggregationProfiler(track_memory=False):
+            assert WF.is_shot is not is_shot
+            raise RuntimeError("aggregation")
+    assert WF.is_shot is is_shot
+    assert active_profiler() is None
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("aggregator")
+
+    monkeypatch.setattr(WF, "pass_attempt", _fail)
+    with pytest.raises(RuntimeError):
+        generate_aggregate_dataframe(whoscored_events, profile=True)
+    assert WF.is_shot is is_shot
+    assert WF.pass_attempt is _fail
+    assert active_profiler() is None
+
+
+def test_generate_aggregate_dataframe_profile(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+    from footmav.utils import whoscored_funcs as WF
+
+    is_shot = WF.is_shot
+    expected = generate_aggregate_dataframe(whoscored_events)
+    result = generate_aggregate_dataframe(whoscored_events, profile=True)
+    pd.testing.assert_frame_equal(result, expected)
+    assert WF.is_shot is is_shot
+
+    report = pd.DataFrame(result.attrs["profile"]).set_index(["kind", "name"])
+    assert report.loc[("stage", "rollup"), "calls"] == 1
+    assert report.loc[("stage", "minutes_per_position"), "calls"] == 1
+    assert report.loc[("aggregator", "passes_attempted"), "calls"] >= 1
+    assert report.loc[("extra", "passes_completed"), "calls"] >= 1
+    assert report.loc[("helper", "is_shot"), "calls"] >= 1
+    assert (report["self_time"] >= 0).all()
+    assert (report["memory_delta"] != 0).any()
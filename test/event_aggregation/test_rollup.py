@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+
+def test_factorize_keys():
+    from footmav.event_aggregation.rollup import factorize_keys
+
+    keys = pd.DataFrame({"a": ["y", "x", "y", None, "x"], "b": [2, 1, 1, 1, 1]})
+    ids, n_groups = factorize_keys(keys)
+    assert n_groups == 3
+    assert ids.tolist() == [2, 0, 1, -1, 0]
+
+
+def test_sum_by_keys_matches_groupby():
+    from footmav.event_aggregation.rollup import sum_by_keys
+
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "match": rng.integers(0, 5, n),
+            "player": rng.choice(["a", "b", "c", None], n),
+            "home": rng.choice([True, False], n),
+            "flag": rng.random(n) > 0.5,
+            "value": np.where(rng.random(n) > 0.9, np.nan, rng.random(n)),
+        }
+    )
+    keys = ["match", "player", "home"]
+    expected = df.groupby(keys)[["flag", "value"]].sum()
+    result = sum_by_keys(df[keys], {"flag": df["flag"], "value": df["value"]})
+    pd.testing.assert_frame_equal(result, expected)
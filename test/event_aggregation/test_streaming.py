@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+
+def test_stream_aggregate_dataframe_matches_full_run(whoscored_events, tmp_path):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.generator import generate_aggregate_dataframe
+    from footmav.event_aggregation.streaming import stream_aggregate_dataframe
+
+    expected = generate_aggregate_dataframe(whoscored_events)
+
+    first_match = whoscored_events.loc[whoscored_events["matchId"] == 1]
+    first_columns = list(first_match.columns)
+    path = tmp_path / "2.json"
+    events = whoscored_events.loc[whoscored_events["matchId"] == 2].copy()
+    events["event_type"] = events["event_type"].map(lambda e: e.value)
+    events.to_json(path, orient="records", date_format="iso")
+
+    chunks = list(stream_aggregate_dataframe([first_match, path]))
+    assert len(chunks) == 2
+    assert list(first_match.columns) == first_columns
+
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+
+
+def test_stream_aggregate_dataframe_rejects_split_matches(whoscored_events):
+    from footmav.event_aggregation import aggregators  # noqa: F401
+    from footmav.event_aggregation.streaming import stream_aggregate_dataframe
+
+    first_half = whoscored_events.loc[whoscored_events["minute"] < 45]
+    second_half = whoscored_events.loc[whoscored_events["minute"] >= 45]
+    with pytest.raises(ValueError, match="split across"):
+        list(stream_aggregate_dataframe([first_half, second_half]))
@@ -110,3 +110,124 @@ class TestData:
                 }
             ),
         )
+
+    def test_with_attributes_copy_on_write(self):
+        import numpy as np
+
+        data = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        d = Data(data)
+        attr1 = MagicMock(
+            N="attr1", apply=MagicMock(return_value=pd.Series([11, 22, 33]))
+        )
+        derived = d.with_attributes([attr1])
+
+        # neither the Data object nor its original data are modified
+        assert derived is not d
+        assert list(d.df.columns) == ["a", "b"]
+        assert d.original_data is data
+        assert derived.original_data is data
+        # the existing columns are shared rather than copied
+        assert np.shares_memory(derived.df["b"].to_numpy(), data["b"].to_numpy())
+
+        overwrite = MagicMock(N="a", apply=MagicMock(return_value=pd.Series([7, 8, 9])))
+        assert derived.with_attributes([overwrite]).df["a"].tolist() == [7, 8, 9]
+        assert_frame_equal(
+            derived.df,
+            pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6], "attr1": [11, 22, 33]}),
+        )
+
+    def test_deferred_attributes(self):
+        from footmav.data_definitions.fbref import fbref_columns as fc
+
+        data = pd.DataFrame(
+            {
+                fc.GOALS.N: [1.0, 2.0],
+                fc.PENS_MADE.N: [0.0, 1.0],
+                fc.NPXG.N: [0.5, 0.5],
+                fc.XG.N: [0.5, 1.5],
+                fc.SHOTS_TOTAL.N: [2.0, 4.0],
+            }
+        )
+        deferred = [
+            fc.XG_PER_SHOT,
+            fc.NON_PENALTY_GOALS,
+            fc.NPXG_OUTPERFORM,
+            fc.NPXG_OUTPERFORM_PER_SHOT,
+        ]
+        d = Data(data, deferred_attributes=deferred)
+
+        # nothing is calculated on construction
+        assert d.deferred_attributes == deferred
+        assert list(data.columns) == list(d.columns)[:5]
+        assert fc.XG_PER_SHOT.N in d.columns
+        assert d.n == 2
+
+        # accessing a column calculates it, along with the attributes it is calculated from
+        assert d[fc.NPXG_OUTPERFORM_PER_SHOT].tolist() == [0.25, 0.125]
+        assert d.deferred_attributes == [fc.XG_PER_SHOT]
+        assert fc.NON_PENALTY_GOALS.N not in data.columns
+
+        # the results are cached on the Data object
+        materialized = d.materialize([fc.NON_PENALTY_GOALS])
+        assert materialized is d.materialize([fc.NPXG_OUTPERFORM.N])
+        assert d.df[fc.XG_PER_SHOT.N].tolist() == [0.25, 0.375]
+        assert d.deferred_attributes == []
+        assert d.original_data is d.df
+
+    def test_deferred_attributes_pipe(self):
+        from footmav.data_definitions.fbref import fbref_columns as fc
+        from footmav.operations.aggregations import aggregate_by, rank
+        from footmav.operations.filter import filter
+        from footmav.operations.filter_objects import GTE, Filter
+        from footmav.operations.normalize import per_90
+
+        data = pd.DataFrame(
+            {
+                fc.PLAYER_ID.N: ["p1", "p1", "p2", "p2"],
+                fc.MINUTES.N: [90.0, 45.0, 90.0, 30.0],
+                fc.GOALS.N: [1.0, 1.0, 2.0, 0.0],
+                fc.XG.N: [0.5, 1.0, 1.5, 0.1],
+                fc.SHOTS_TOTAL.N: [2.0, 2.0, 4.0, 1.0],
+            }
+        )
+        deferred = [fc.XG_PER_SHOT, fc.XG_OUTPERFORM]
+        eager = Data(data).with_attributes(deferred)
+        lazy = Data(data, deferred_attributes=deferred)
+
+        def _pipeline(d):
+            return (
+                d.pipe(filter, [Filter(fc.MINUTES, 40, GTE)])
+                .pipe(aggregate_by, [fc.PLAYER_ID])
+                .pipe(per_90)
+            )
+
+        result = _pipeline(lazy)
+        # the pipeline did not need the deferred attributes, which are passed on
+        assert result.deferred_attributes == deferred
+        assert lazy.deferred_attributes == deferred
+        assert_frame_equal(result.df, _pipeline(eager).df, check_like=True)
+        assert lazy.deferred_attributes == deferred
+
+        # filtering on a deferred attribute calculates it first
+        filtered = lazy.pipe(filter, [Filter(fc.XG_PER_SHOT, 0.3, GTE)])
+        assert filtered.deferred_attributes == [fc.XG_OUTPERFORM]
+        assert filtered.n == 2
+        assert lazy.deferred_attributes == [fc.XG_OUTPERFORM]
+
+        # operations without a hint need every attribute
+        assert lazy.pipe(rank).deferred_attributes == []
+        assert_frame_equal(lazy.original_data, eager.df, check_like=True)
+
+    def test_deferred_attributes_error(self, capsys):
+        from footmav.data_definitions.fbref import fbref_columns as fc
+
+        broken = MagicMock(N="broken", inputs=None)
+        broken.apply.side_effect = ValueError("apply")
+        d = Data(
+            pd.DataFrame({fc.XG.N: [1.0], fc.SHOTS_TOTAL.N: [2.0]}),
+            deferred_attributes=[broken, fc.XG_PER_SHOT],
+        )
+
+        # a failing attribute is reported and dropped, like the eager fbref data used to
+        assert list(d.df.columns) == [fc.XG.N, fc.SHOTS_TOTAL.N, fc.XG_PER_SHOT.N]
+        assert "Error applying broken: apply" in capsys.readouterr().out
@@ -51,11 +51,12 @@ class TestFbRefData:
             FbRefData(data)
             remove_non_top_5_teams.assert_called_once_with(data)
             drop_duplicates_mock.assert_called_once_with(["player_id", "date"])
-            super_init.assert_called_once()
-            data_with_duplicates_dropped.__setitem__.assert_called_once_with(
-                "attr1", sentinel.attr1_apply
+            # the derived attributes are deferred rather than calculated
+            super_init.assert_called_once_with(
+                data_with_duplicates_dropped, deferred_attributes=[attr1, attr5]
             )
-            attr1.apply.assert_called_once_with(data_with_duplicates_dropped)
+            data_with_duplicates_dropped.__setitem__.assert_not_called()
+            attr1.apply.assert_not_called()
             attr2.apply.assert_not_called()
             attr3.apply.assert_not_called()
             attr4.apply.assert_not_called()
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+from footmav.data_definitions.fbref import fbref_columns as fc
+from footmav.odm.data import Data
+from footmav.operations.aggregations import aggregate_by, rank
+from footmav.operations.filter import filter
+from footmav.operations.filter_objects import EQ, GTE, Filter, IsIn
+from footmav.operations.normalize import per_90
+
+KEYS = [fc.PLAYER_ID, fc.PLAYER, fc.YEAR]
+
+
+@pytest.fixture
+def player_matches():
+    return Data(
+        pd.DataFrame(
+            {
+                fc.PLAYER_ID.N: ["p1", "p1", "p1", "p2", "p2", "p3", "p3"],
+                fc.PLAYER.N: ["one", "one", "one", "two", "two", "three", "three"],
+                fc.YEAR.N: [2022, 2023, 2023, 2023, 2023, 2022, 2023],
+                fc.TEAM.N: ["a", "a", "a", "b", "b", "b", "b"],
+                fc.MINUTES.N: [90.0, 45.0, 5.0, 90.0, 80.0, 90.0, 30.0],
+                fc.GOALS.N: [1.0, 1.0, 1.0, 0.0, 2.0, 1.0, 0.0],
+                fc.ASSISTS.N: [0.0, 1.0, 0.0, 1.0, 0.0, 0.0, 1.0],
+                fc.ROUND.N: ["r1", "r2", "r3", "r2", "r3", "r1", "r2"],
+                fc.VENUE.N: ["h", "a", "h", "a", "h", "a", "h"],
+            }
+        )
+    )
+
+
+def _pipeline(data):
+    return (
+        data.pipe(filter, [Filter(fc.MINUTES, 10, GTE)])
+        .pipe(aggregate_by, KEYS)
+        .pipe(per_90)
+        .pipe(filter, [Filter(fc.YEAR, 2023, EQ)])
+        .pipe(filter, [Filter(fc.PLAYER_ID, ["p1", "p2"], IsIn)])
+    )
+
+
+def _sorted(df):
+    return df.sort_values(fc.PLAYER_ID.N).reset_index(drop=True)
+
+
+def test_lazy_collect_matches_eager(player_matches):
+    eager = _pipeline(player_matches)
+    lazy = _pipeline(player_matches.lazy())
+    # nothing runs before collect
+    assert len(lazy.steps) == 5
+
+    collected = lazy.collect()
+    pd.testing.assert_frame_equal(
+        _sorted(collected.df), _sorted(eager.df), check_like=True
+    )
+    assert collected.unique_keys == KEYS
+    assert collected.original_data is player_matches.original_data
+
+
+def test_lazy_optimize(player_matches):
+    columns, steps = _pipeline(player_matches.lazy()).optimize()
+
+    # the key filters run before the aggregation, merged with the minutes filter
+    assert [step.name for step in steps] == ["filter", "aggregate_by", "per_90"]
+    assert [f.attribute for f in steps[0].kwargs["filters"]] == [
+        fc.MINUTES,
+        fc.YEAR,
+        fc.PLAYER_ID,
+    ]
+    # the columns dropped by the aggregation are never read
+    assert fc.ROUND.N not in columns
+    assert fc.VENUE.N not in columns
+    assert fc.GOALS.N in columns
+
+
+def test_lazy_keeps_barriers(player_matches):
+    lazy = (
+        player_matches.lazy()
+        .pipe(aggregate_by, KEYS)
+        .pipe(filter, [Filter(fc.GOALS, 2, GTE)])
+        .pipe(rank)
+        .pipe(filter, [Filter(fc.PLAYER_ID, ["p1"], IsIn)])
+    )
+    columns, steps = lazy.optimize()
+
+    # filters on aggregated values and filters after a rank stay where they are
+    assert [step.name for step in steps] == [
+        "aggregate_by",
+        "filter",
+        "rank",
+        "filter",
+    ]
+    assert fc.ROUND.N not in columns
+    assert lazy.explain().splitlines()[0] == f"scan {len(columns)} of 9 columns"
+
+    unprunable = player_matches.lazy().pipe(rank).pipe(aggregate_by, KEYS)
+    assert unprunable.optimize()[0] is None
@@ -0,0 +1,169 @@
+import sys
+import pandas as pd
+import pytest
+from footmav.data_definitions.fbref import fbref_columns as fc
+from footmav.operations.filter_objects import EQ, GTE, NEQ, Filter, IsIn, Contains
+
+
+def test_split_filters():
+    from footmav.odm.parquet import split_filters
+
+    minutes = Filter(fc.MINUTES, 10, GTE)
+    team = Filter(fc.TEAM, ["a"], IsIn)
+    name = Filter(fc.PLAYER, "one", Contains)
+
+    pushed, residual = split_filters([minutes, name, team])
+    assert pushed == [minutes, team]
+    assert residual == [name]
+
+    # filters on columns the data does not store are applied to the loaded data
+    xg_per_shot = Filter(fc.XG_PER_SHOT, 0.1, GTE)
+    pushed, residual = split_filters(
+        [minutes, xg_per_shot, team], [fc.MINUTES.N, fc.TEAM.N]
+    )
+    assert pushed == [minutes, team]
+    assert residual == [xg_per_shot]
+
+
+def test_projected_columns():
+    from footmav.odm.parquet import projected_columns
+
+    assert projected_columns([fc.GOALS], [fc.PLAYER_ID]) == {
+        fc.GOALS.N,
+        fc.PLAYER_ID.N,
+    }
+    # derived attributes read their inputs, recursively
+    assert projected_columns(
+        [fc.NPXG_OUTPERFORM_PER_SHOT], filters=[Filter(fc.PLAYER, "one", Contains)]
+    ) == {
+        fc.NPXG_OUTPERFORM_PER_SHOT.N,
+        fc.NPXG_OUTPERFORM.N,
+        fc.NON_PENALTY_GOALS.N,
+        fc.GOALS.N,
+        fc.PENS_MADE.N,
+        fc.NPXG.N,
+        fc.SHOTS_TOTAL.N,
+        fc.PLAYER.N,
+    }
+
+
+def test_read_parquet_requires_pyarrow(monkeypatch):
+    from footmav.odm.parquet import read_parquet
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.dataset", None)
+    with pytest.raises(ImportError, match="footmav\\[parquet\\]"):
+        read_parquet("data.parquet")
+
+
+@pytest.fixture
+def fbref_matches():
+    return pd.DataFrame(
+        {
+            fc.PLAYER_ID.N: ["p1", "p1", "p2", "p3"],
+            fc.PLAYER.N: ["one", "one", "two", "three"],
+            fc.DATE.N: pd.to_datetime(
+                ["2023-01-01", "2023-01-08", "2023-01-01", "2023-01-01"]
+            ),
+            fc.TEAM.N: ["Arsenal", "Arsenal", "Chelsea", "Chelsea"],
+            fc.YEAR.N: [2023, 2023, 2023, 2022],
+            fc.MINUTES.N: [90.0, 45.0, 90.0, 10.0],
+            fc.GOALS.N: [1.0, 0.0, 2.0, 0.0],
+            fc.XG.N: [0.5, 0.2, 1.0, 0.1],
+            fc.SHOTS_TOTAL.N: [2.0, 1.0, 4.0, 1.0],
+            fc.ASSISTS.N: [0.0, 1.0, 0.0, 1.0],
+        }
+    )
+
+
+def test_from_parquet(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.fbref_data import FbRefData
+
+    path = tmp_path / "fbref.parquet"
+    fbref_matches.to_parquet(path, index=False)
+
+    data = FbRefData.from_parquet(
+        str(path),
+        attributes=[fc.GOALS, fc.XG_PER_SHOT],
+        filters=[Filter(fc.MINUTES, 45, GTE), Filter(fc.PLAYER, "^t", Contains)],
+    )
+    assert data.df[fc.PLAYER_ID.N].tolist() == ["p2"]
+    assert fc.ASSISTS.N not in data.df.columns
+    assert data.df[fc.XG_PER_SHOT.N].tolist() == [0.25]
+    # only the requested derived attributes are calculated
+    assert fc.XG_OUTPERFORM.N not in data.df.columns
+
+
+def test_from_partitioned_parquet(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.fbref_data import FbRefData
+
+    for year, matches in fbref_matches.groupby(fc.YEAR.N):
+        directory = tmp_path / f"{fc.YEAR.N}={year}"
+        directory.mkdir()
+        matches.drop(columns=fc.YEAR.N).to_parquet(
+            directory / "part.parquet", index=False
+        )
+
+    data = FbRefData.from_partitioned_parquet(
+        str(tmp_path), filters=[Filter(fc.YEAR, 2023, EQ)]
+    )
+    assert sorted(data.df[fc.PLAYER_ID.N]) == ["p1", "p1", "p2"]
+    assert fc.XG_OUTPERFORM.N in data.df.columns
+
+
+def test_read_parquet_matches_eager_filters(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.data import Data
+    from footmav.odm.parquet import read_parquet
+    from footmav.operations.filter import filter
+
+    # nulls compare as not equal, like in pandas
+    fbref_matches.loc[1, fc.PLAYER.N] = None
+    fbref_matches.loc[2, fc.GOALS.N] = None
+    path = tmp_path / "fbref.parquet"
+    fbref_matches.to_parquet(path, index=False)
+
+    for filters in [
+        [Filter(fc.PLAYER, "one", NEQ)],
+        [Filter(fc.GOALS, 1.0, NEQ)],
+        [Filter(fc.GOALS, 0.0, GTE), Filter(fc.XG_PER_SHOT, 0.2, GTE)],
+    ]:
+        eager = (
+            Data(fbref_matches).with_attributes(fc.XG_PER_SHOT).pipe(filter, filters).df
+        )
+        loaded = read_parquet(str(path), filters=filters)
+        assert loaded[fc.PLAYER_ID.N].tolist() == eager[fc.PLAYER_ID.N].tolist()
+
+
+def test_from_parquet_matches_eager(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.fbref_data import FbRefData
+    from footmav.operations.filter import filter
+
+    # a duplicate row that only the first row of a player and date is kept of, and a team outside the top 5
+    matches = pd.concat(
+        [
+            fbref_matches,
+            fbref_matches.iloc[[0]].assign(**{fc.MINUTES.N: 10.0}),
+            fbref_matches.iloc[[2]].assign(
+                **{fc.PLAYER_ID.N: "p4", fc.TEAM.N: "zenit"}
+            ),
+        ],
+        ignore_index=True,
+    )
+    path = tmp_path / "fbref.parquet"
+    matches.to_parquet(path, index=False)
+
+    filters = [
+        Filter(fc.YEAR, 2023, EQ),
+        Filter(fc.MINUTES, 45, GTE),
+        Filter(fc.XG_PER_SHOT, 0.2, GTE),
+    ]
+    loaded = FbRefData.from_parquet(
+        str(path), attributes=[fc.GOALS, fc.XG_PER_SHOT], filters=filters
+    )
+    eager = FbRefData(matches).pipe(filter, filters)
+    assert loaded[fc.PLAYER_ID].tolist() == eager[fc.PLAYER_ID].tolist()
+    assert loaded[fc.XG_PER_SHOT].tolist() == eager[fc.XG_PER_SHOT].tolist()
@@ -0,0 +1,209 @@
+import json
+import os
+import pandas as pd
+import pytest
+from footmav.data_definitions.fbref import fbref_columns as fc
+from footmav.operations.filter_objects import GTE, Filter
+
+
+@pytest.fixture
+def fbref_matches():
+    return pd.DataFrame(
+        {
+            fc.PLAYER_ID.N: ["p1", "p2", "p3"],
+            fc.COMPETITION.N: ["Premier League", "Premier League", "La Liga"],
+            fc.YEAR.N: [2023.0, 2022.0, 2023.0],
+            fc.DATE.N: pd.to_datetime(["2023-01-01", "2022-02-01", "2023-03-01"]),
+            fc.MINUTES.N: [90.0, 10.0, 45.0],
+            fc.GOALS.N: [1.0, 2.0, 3.0],
+            "extra": [1, 2, 3],
+        }
+    )
+
+
+def test_store_schema(fbref_matches):
+    from footmav.odm.store import schema_hash, store_schema
+
+    schema = store_schema(fbref_matches, "fbref")
+    assert schema == {
+        fc.PLAYER_ID.N: "object",
+        fc.COMPETITION.N: "object",
+        # typed from the registered attribute rather than the dataframe
+        fc.YEAR.N: "int64",
+        fc.DATE.N: "datetime64[ns]",
+        fc.MINUTES.N: "float64",
+        fc.GOALS.N: "float64",
+        "extra": "int64",
+    }
+    # attributes of other sources do not apply
+    assert store_schema(fbref_matches, "whoscored")[fc.YEAR.N] == "float64"
+
+    assert schema_hash(schema) == schema_hash(dict(schema))
+    assert schema_hash(schema) != schema_hash({**schema, "extra": "float64"})
+
+
+def test_store_partitions(tmp_path):
+    from footmav.odm.store import METADATA_FILE, MatchStore
+
+    for competition, season in [("Premier%20League", 2023), ("La%20Liga", 2023)]:
+        path = tmp_path / "source=fbref" / f"comp={competition}" / f"season={season}"
+        path.mkdir(parents=True)
+        (path / METADATA_FILE).write_text(
+            json.dumps(
+                {
+                    "source": "fbref",
+                    "competition": competition.replace("%20", " "),
+                    "season": str(season),
+                    "rows": 10,
+                    "min_date": "2023-01-01T00:00:00",
+                    "max_date": None,
+                    "schema": {},
+                    "schema_hash": "",
+                    "columns": ["a", ["b", "c"]],
+                    "file": "part-0.parquet",
+                }
+            )
+        )
+    # a partition whose first write never completed
+    (tmp_path / "source=fbref" / "comp=Serie%20A" / "season=2023").mkdir(parents=True)
+
+    store = MatchStore(tmp_path)
+    partitions = store.partitions("fbref")
+    assert [p.competition for p in partitions] == ["La Liga", "Premier League"]
+    assert store.partitions("fbref", competitions=["Premier League"], seasons=[2023])
+    assert store.partitions("fbref", seasons=[2022]) == []
+    assert store.partitions("understat") == []
+    assert partitions[0].min_date == pd.Timestamp("2023-01-01")
+    assert partitions[0].max_date is None
+    assert partitions[0].columns == ["a", ("b", "c")]
+    assert store.scan("fbref").rows == 20
+
+
+def test_write_atomic(tmp_path):
+    from footmav.odm.store import _write_atomic
+
+    (tmp_path / "file").write_bytes(b"old")
+
+    def _fail(f):
+        f.write(b"partial")
+        raise RuntimeError("write")
+
+    with pytest.raises(RuntimeError):
+        _write_atomic(str(tmp_path), "file", _fail)
+    assert os.listdir(tmp_path) == ["file"]
+    assert (tmp_path / "file").read_bytes() == b"old"
+
+    _write_atomic(str(tmp_path), "file", lambda f: f.write(b"new"))
+    assert os.listdir(tmp_path) == ["file"]
+    assert (tmp_path / "file").read_bytes() == b"new"
+
+
+def test_store_vacuum(tmp_path):
+    from footmav.odm.store import METADATA_FILE, MatchStore
+
+    path = tmp_path / "source=fbref" / "comp=EPL" / "season=2023"
+    path.mkdir(parents=True)
+    (path / METADATA_FILE).write_text(
+        json.dumps(
+            {
+                "source": "fbref",
+                "competition": "EPL",
+                "season": "2023",
+                "rows": 1,
+                "min_date": None,
+                "max_date": None,
+                "schema": {},
+                "schema_hash": "",
+                "columns": ["a"],
+                "file": "part-new.parquet",
+            }
+        )
+    )
+    for name in ["part-old.parquet", "part-new.parquet"]:
+        (path / name).write_bytes(b"")
+
+    store = MatchStore(tmp_path)
+    assert store.vacuum("understat") == []
+    assert store.vacuum() == [str(path / "part-old.parquet")]
+    assert sorted(os.listdir(path)) == [METADATA_FILE, "part-new.parquet"]
+
+
+def test_store_round_trip(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.data import Data
+    from footmav.odm.store import MatchStore
+    from footmav.operations.aggregations import aggregate_by
+    from footmav.operations.filter import filter
+
+    store = MatchStore(tmp_path)
+    written = store.write(fbref_matches, "fbref")
+    assert [(p.competition, p.season, p.rows) for p in written] == [
+        ("La Liga", "2023", 1),
+        ("Premier League", "2022", 1),
+        ("Premier League", "2023", 1),
+    ]
+    assert written[0].max_date == pd.Timestamp("2023-03-01")
+
+    # rewriting a partition replaces it
+    store.write(fbref_matches.iloc[:1].assign(extra=10), "fbref")
+    loaded = store.read("fbref", seasons=[2023]).sort_values(fc.PLAYER_ID.N)
+    assert loaded["extra"].tolist() == [10, 3]
+    assert loaded[fc.YEAR.N].dtype == "int64"
+    # the superseded version is kept for scans opened before the write, until the store is vacuumed
+    assert len(os.listdir(written[2].path)) == 3
+    stale = store.scan("fbref", seasons=[2023])
+    store.write(fbref_matches.iloc[:1].assign(extra=20), "fbref")
+    assert sorted(stale.load()["extra"]) == [3, 10]
+    assert len(store.vacuum()) == 2
+    assert len(os.listdir(written[2].path)) == 2
+    assert store.read("fbref", seasons=[2023])["extra"].tolist() == [3, 20]
+
+    lazy = (
+        Data.from_store(store, "fbref")
+        .pipe(filter, [Filter(fc.MINUTES, 40, GTE)])
+        .pipe(aggregate_by, [fc.PLAYER_ID])
+    )
+    assert "extra" not in lazy.optimize()[0]
+    assert sorted(lazy.collect().df[fc.PLAYER_ID.N]) == ["p1", "p3"]
+
+
+def test_store_round_trip_multi_level_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.store import MatchStore
+
+    aggregated = pd.DataFrame(
+        {
+            ("match_id", ""): [1, 2],
+            ("comp", ""): ["EPL", "EPL"],
+            ("season", ""): [2023, 2023],
+            ("match_date", ""): pd.to_datetime(["2023-01-01", "2023-01-02"]),
+            ("passes", "passes"): [3.0, 4.0],
+        }
+    )
+    store = MatchStore(tmp_path)
+    store.write(aggregated, "whoscored")
+    pd.testing.assert_frame_equal(store.read("whoscored"), aggregated)
+    assert store.read("whoscored", columns=[("passes", "passes")]).columns.tolist() == [
+        ("passes", "passes")
+    ]
+
+
+def test_store_filters_on_columns_missing_from_partitions(tmp_path, fbref_matches):
+    pytest.importorskip("pyarrow")
+    from footmav.odm.store import MatchStore
+    from footmav.operations.filter_objects import NEQ
+
+    store = MatchStore(tmp_path)
+    store.write(fbref_matches.loc[fbref_matches[fc.YEAR.N] == 2023], "fbref")
+    store.write(
+        fbref_matches.loc[fbref_matches[fc.YEAR.N] == 2022].drop(columns=[fc.GOALS.N]),
+        "fbref",
+    )
+    everything = store.read("fbref")
+
+    for filters in [[Filter(fc.GOALS, 2, GTE)], [Filter(fc.GOALS, 1, NEQ)]]:
+        expected = everything
+        for filter_ in filters:
+            expected = filter_.apply(expected)
+        loaded = store.read("fbref", columns=[fc.PLAYER_ID.N], filters=filters)
+        assert sorted(loaded[fc.PLAYER_ID.N]) == sorted(expected[fc.PLAYER_ID.N])
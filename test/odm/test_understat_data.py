@@ -35,7 +35,9 @@ class TestUnderstatData:
 
             UnderstatData(data)
             data.rename.assert_called_once_with(columns={"orig_name": "new_name"})
-            renamed_data.__setitem__.assert_called_once_with(
-                "attr1", sentinel.attr1_apply
+            # the derived attributes are deferred rather than calculated
+            renamed_data.__setitem__.assert_not_called()
+            attr1.apply.assert_not_called()
+            super_init.assert_called_once_with(
+                renamed_data, deferred_attributes=[attr1]
             )
-            super_init.assert_called_once_with(renamed_data)
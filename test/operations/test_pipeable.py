@@ -24,7 +24,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == data.unique_keys
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, 2, a=3)
         assert func.f == f
 
@@ -44,7 +44,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == data.unique_keys
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, b=2, a=3)
         assert func.f == f
 
@@ -68,7 +68,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == data.unique_keys
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, data2.df, a=3)
         assert func.f == f
 
@@ -92,7 +92,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == data.unique_keys
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, data2=data2.df, a=3)
         assert func.f == f
 
@@ -113,7 +113,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == data.unique_keys
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, 2, a=3)
 
     def test_pipeable_non_matching_keys(self):
@@ -146,7 +146,7 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == [sentinel.k1, sentinel.k2]
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, [sentinel.k1, sentinel.k2])
         assert func.f == f
 
@@ -166,6 +166,17 @@ class TestPipeable:
             result.df, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
         )
         assert result.unique_keys == [sentinel.k1, sentinel.k2]
-        assert result._original_data == data.original_data
+        assert result._original_data == data.original_source
         f.assert_called_once_with(data.df, aggregate_cols=[sentinel.k1, sentinel.k2])
         assert func.f == f
+
+    def test_pipeable_isolates_unchanged_data(self):
+        df = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        data = Data(df)
+        func = pipeable(lambda data: data)
+        result = func(data)
+        # a function returning its input still gives the new Data object its own dataframe
+        assert result.df is not df
+        pd.testing.assert_frame_equal(result.df, df)
+        result.df["c"] = 1
+        assert list(df.columns) == ["a", "b"]
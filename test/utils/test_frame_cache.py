@@ -0,0 +1,19 @@
+from unittest.mock import MagicMock
+import pandas as pd
+
+
+def test_frame_cached():
+    from footmav.utils.frame_cache import frame_cached, clear_frame_cache
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    compute = MagicMock(return_value=1)
+    assert frame_cached(df, "key", compute) == 1
+    df["b"] = df["a"] * 2
+    assert frame_cached(df, "key", compute) == 1
+    compute.assert_called_once()
+
+    assert frame_cached(df.copy(), "key", MagicMock(return_value=2)) == 2
+    assert frame_cached(df.iloc[1:], "key", MagicMock(return_value=3)) == 3
+
+    clear_frame_cache(df)
+    assert frame_cached(df, "key", MagicMock(return_value=4)) == 4
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from footmav.data_definitions.whoscored.constants import EventType
+
+
+def _reference_minutes_per_position(df):
+    # row-by-row implementation that minutes_per_position replaced, kept as the reference for equivalence
+    df = df.loc[df["second"] != -9999].copy()
+    df["ts"] = df["minute"] * 60 + df["second"]
+    sub_ons = df.loc[df["event_type"] == EventType.SubstitutionOn].rename(
+        columns={"ts": "sub_on_ts"}
+    )
+    sub_offs = df.loc[df["event_type"] == EventType.SubstitutionOff].rename(
+        columns={"ts": "sub_off_ts"}
+    )
+    last_min = (
+        df.groupby(["matchId", "period"])
+        .agg({"ts": "max"})
+        .rename(columns={"ts": "max_ts"})
+    )
+    player_df = df.loc[~df["player_name"].isna()][
+        ["matchId", "player_name", "period", "position", "ts"]
+    ].drop_duplicates()
+    player_df = pd.merge(player_df, last_min, on=["matchId", "period"], how="left")
+    player_df = pd.merge(
+        player_df,
+        sub_ons[["player_name", "matchId", "period", "sub_on_ts"]],
+        on=["player_name", "matchId", "period"],
+        how="left",
+    ).fillna(0)
+    player_df = pd.merge(
+        player_df,
+        sub_offs[["player_name", "matchId", "period", "sub_off_ts"]],
+        on=["player_name", "matchId", "period"],
+        how="left",
+    ).fillna(1000000)
+
+    player_df = player_df[player_df["position"] != 0]
+    player_df["start"] = player_df["period"].apply(lambda x: 0 if x == 1 else 45 * 60)
+    player_df["sub_off_ts"] = player_df[["sub_off_ts", "max_ts"]].min(axis=1)
+    player_df["sub_on_ts"] = player_df[["sub_on_ts", "start"]].max(axis=1)
+    formations_and_subs = df.loc[
+        df["event_type"].isin([EventType.SubstitutionOn, EventType.FormationChange])
+    ][["matchId", "period", "ts"]].drop_duplicates()
+    player_df = player_df.groupby(["matchId", "player_name", "period", "position"]).agg(
+        {"ts": ["min", "max"], "sub_on_ts": "min", "sub_off_ts": "max"}
+    )
+
+    player_df["start_ts"] = player_df["sub_on_ts"]
+    player_df["end_ts"] = player_df["sub_off_ts"]
+    for i, g in player_df.reset_index().groupby(["matchId", "player_name", "period"]):
+
+        if len(g) > 1:
+            _g = g.sort_values(("ts", "min"))
+            _boundaries = formations_and_subs.loc[
+                (formations_and_subs["matchId"] == i[0])
+                & (formations_and_subs["period"] == i[2])
+            ]["ts"].tolist()
+            try:
+                next_boundary = next(
+                    b
+                    for b in _boundaries
+                    if b >= _g.iloc[0][("ts", "max")] and b <= _g.iloc[1][("ts", "min")]
+                )
+
+            except StopIteration:
+                next_boundary = (
+                    _g.iloc[0][("ts", "max")] + _g.iloc[1][("ts", "min")]
+                ) / 2
+
+            player_df.loc[
+                (i[0], i[1], i[2], _g.iloc[0]["position"]), "end_ts"
+            ] = next_boundary
+
+            for j in range(1, len(g)):
+                player_df.loc[
+                    (i[0], i[1], i[2], _g.iloc[j]["position"]), "start_ts"
+                ] = player_df.loc[
+                    (i[0], i[1], i[2], _g.iloc[j - 1]["position"]), "end_ts"
+                ].values[
+                    0
+                ]
+                if j != len(g) - 1:
+                    try:
+                        next_boundary = next(
+                            b
+                            for b in _boundaries
+                            if b >= _g.iloc[j][("ts", "max")]
+                            and b <= _g.iloc[j + 1][("ts", "min")]
+                        )
+
+                    except StopIteration:
+                        next_boundary = (
+                            _g.iloc[j][("ts", "max")] + _g.iloc[j + 1][("ts", "min")]
+                        ) / 2
+                    player_df.loc[
+                        (i[0], i[1], i[2], _g.iloc[j]["position"]), "end_ts"
+                    ] = next_boundary
+
+    player_df["minutes"] = (player_df["end_ts"] - player_df["start_ts"]) / 60
+    player_df_agg = player_df.groupby(["matchId", "player_name", "position"]).agg(
+        {("minutes", ""): "sum"}
+    )
+    player_df_agg.columns = ["minutes"]
+    return player_df_agg
+
+
+def _event(match_id, period, minute, second, player, position, event_type):
+    return {
+        "matchId": match_id,
+        "period": period,
+        "minute": minute,
+        "second": second,
+        "player_name": player,
+        "position": position,
+        "event_type": event_type,
+    }
+
+
+def _random_match(rng, match_id):
+    events = []
+    for period, (first_minute, last_minute) in [(1, (0, 47)), (2, (45, 94))]:
+        events.append(
+            _event(match_id, period, 60, 0, None, 0, EventType.FormationChange)
+        )
+        events.append(
+            _event(match_id, period, 70, 5, "sub_off", "Sub", EventType.SubstitutionOff)
+        )
+        events.append(
+            _event(match_id, period, 70, 5, "sub_on", "Sub", EventType.SubstitutionOn)
+        )
+        for _ in range(200):
+            minute = int(rng.integers(first_minute, last_minute))
+            player = f"p{rng.integers(6)}"
+            position = (
+                ["DC", "MC", "FW"][int(rng.integers(3))] if player == "p0" else "DC"
+            )
+            if player == "p1":
+                position = "DC" if minute < 60 else "AMC"
+            events.append(
+                _event(
+                    match_id,
+                    period,
+                    minute,
+                    int(rng.integers(60)),
+                    player,
+                    position,
+                    EventType.Pass,
+                )
+            )
+        for minute in [10, 80]:
+            events.append(
+                _event(match_id, period, minute, 0, "sub_on", "FW", EventType.Pass)
+            )
+            events.append(
+                _event(match_id, period, minute, 0, "sub_off", "MC", EventType.Pass)
+            )
+    events.append(_event(match_id, 1, 30, -9999, "p2", "DC", EventType.Pass))
+    return events
+
+
+def test_minutes_per_position_matches_reference():
+    from footmav.utils.whoscored_funcs import minutes_per_position
+
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(
+        [e for match_id in [101, 102, 103] for e in _random_match(rng, match_id)]
+    )
+    df = df.sort_values(["matchId", "period", "minute", "second"], kind="mergesort")
+
+    result = minutes_per_position(df)
+    expected = _reference_minutes_per_position(df)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_minutes_per_position_splits_at_boundary():
+    from footmav.utils.whoscored_funcs import minutes_per_position
+
+    df = pd.DataFrame(
+        [
+            _event(1, 1, 0, 0, "a", "DC", EventType.Pass),
+            _event(1, 1, 10, 0, "a", "DC", EventType.Pass),
+            _event(1, 1, 15, 0, None, 0, EventType.FormationChange),
+            _event(1, 1, 20, 0, "a", "MC", EventType.Pass),
+            _event(1, 1, 30, 0, "a", "FW", EventType.Pass),
+            _event(1, 1, 45, 0, "b", "DC", EventType.Pass),
+        ]
+    )
+    result = minutes_per_position(df)["minutes"]
+    assert result[(1, "a", "DC")] == 15
+    assert result[(1, "a", "MC")] == 10
+    assert result[(1, "a", "FW")] == 20
+    assert result[(1, "b", "DC")] == 45
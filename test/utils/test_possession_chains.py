@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from footmav.data_definitions.whoscored.constants import EventType
+
+
+@pytest.fixture
+def chain_events():
+    related = [{"type": {"value": 55, "displayName": "RelatedEventId"}, "value": "2"}]
+    free_kick = [{"type": {"value": 5, "displayName": "FreekickTaken"}}]
+    rows = [
+        # team, event, period, minute, second, player, event type, x, end x, xg, qualifiers
+        (10, 1, 1, 1, 0, "a", EventType.Pass, 30, 50, 0.0, []),
+        (10, 2, 1, 1, 5, "b", EventType.Pass, 50, 90, 0.0, []),
+        (20, 1, 1, 1, 8, "x", EventType.Aerial, 10, 10, 0.0, []),
+        (10, 3, 1, 1, 10, "c", EventType.MissedShots, 90, 100, 0.3, related),
+        (20, 2, 1, 1, 20, "y", EventType.BallRecovery, 20, 20, 0.0, []),
+        (20, 3, 1, 1, 25, "y", EventType.Pass, 20, 40, 0.0, []),
+        (10, 4, 1, 1, 30, "a", EventType.Foul, 60, 60, 0.0, []),
+        (20, 4, 1, 1, 31, "y", EventType.Foul, 40, 40, 0.0, []),
+        (20, 5, 1, 1, 40, "z", EventType.Pass, 40, 60, 0.0, free_kick),
+        (20, 6, 1, 1, 45, "z", EventType.Pass, 60, 85, 0.0, []),
+        (20, 7, 1, 1, 50, "w", EventType.Goal, 85, 100, 0.5, []),
+        (10, 5, 2, 46, 0, "a", EventType.Pass, 50, 40, 0.0, []),
+    ]
+    return pd.DataFrame(
+        [
+            {
+                "matchId": 1,
+                "teamId": team,
+                "eventId": event_id,
+                "period": period,
+                "minute": minute,
+                "second": second,
+                "player_name": player,
+                "event_type": event_type,
+                "outcomeType": 1,
+                "x": x,
+                "y": 50,
+                "endX": end_x,
+                "endY": 50,
+                "xG": xg,
+                "qualifiers": qualifiers,
+            }
+            for team, event_id, period, minute, second, player, event_type, x, end_x, xg, qualifiers in rows
+        ]
+    )
+
+
+def test_possession_chains(chain_events):
+    from footmav.utils.possession_chains import col_possession_chain, possession_chains
+
+    chains = col_possession_chain(chain_events)
+    assert chains.tolist() == [0, 0, 0, 0, 1, 1, 1, -1, 2, 2, 2, 3]
+    assert possession_chains(chain_events)[1].tolist() == [10, 20, 20, 10]
+
+    # chains follow the match clock rather than the order of the dataframe
+    shuffled = chain_events.sample(frac=1, random_state=0)
+    assert col_possession_chain(shuffled).sort_index().tolist() == chains.tolist()
+
+
+def test_chain_summary(chain_events):
+    from footmav.utils.possession_chains import chain_summary
+
+    summary = chain_summary(chain_events)
+    assert summary["teamId"].tolist() == [10, 20, 20, 10]
+    assert summary["period"].tolist() == [1, 1, 1, 2]
+    assert summary["events"].tolist() == [4, 3, 3, 1]
+    assert summary["passes"].tolist() == [2, 1, 2, 1]
+    assert summary["shots"].tolist() == [1, 0, 1, 0]
+    assert summary["duration"].tolist() == [10, 10, 10, 0]
+    np.testing.assert_allclose(summary["xg"], [0.3, 0, 0.5, 0])
+    # the backwards pass of the last chain loses ground
+    assert (summary["progression"].iloc[:3] > 0).all()
+    assert summary["progression"].iloc[3] < 0
+
+
+def test_chain_xg(chain_events):
+    from footmav.utils.possession_chains import chain_xg
+
+    def per_player(values):
+        return values.groupby(chain_events["player_name"]).sum().round(6).to_dict()
+
+    assert per_player(chain_xg(chain_events)) == {
+        "a": 0.3,
+        "b": 0.3,
+        "c": 0.3,
+        "w": 0.5,
+        "x": 0.0,
+        "y": 0.0,
+        "z": 0.5,
+    }
+    # b played the pass to c's shot
+    assert per_player(chain_xg(chain_events, buildup=True)) == {
+        "a": 0.3,
+        "b": 0.0,
+        "c": 0.0,
+        "w": 0.0,
+        "x": 0.0,
+        "y": 0.0,
+        "z": 0.5,
+    }
@@ -0,0 +1,100 @@
+import pandas as pd
+import numpy as np
+
+
+def _q(code, name, value=None):
+    q = {"type": {"value": code, "displayName": name}}
+    if value is not None:
+        q["value"] = value
+    return q
+
+
+def _events():
+    return pd.DataFrame(
+        {
+            "qualifiers": [
+                [_q(2, "Cross"), _q(15, "Head")],
+                [],
+                [_q(15, "Head"), _q(214, "BigChance")],
+                [_q(55, "RelatedEventId", "4")],
+            ]
+        },
+        index=[10, 11, 12, 13],
+    )
+
+
+def test_qualifier_index_has():
+    from footmav.utils.qualifier_index import QualifierIndex
+
+    index = QualifierIndex(_events()["qualifiers"])
+    assert index.n_rows == 4
+    assert index.codes.tolist() == [2, 15, 55, 214]
+    assert index.has(qualifier_code=15).tolist() == [True, False, True, False]
+    assert index.has(display_name="BigChance").tolist() == [False, False, True, False]
+    assert index.has(qualifier_code=999).tolist() == [False] * 4
+    assert index.has(display_name="Unknown").tolist() == [False] * 4
+    assert index.has_any([2, 55]).tolist() == [True, False, False, True]
+    assert index.code_for("Head") == [15]
+
+
+def test_col_has_qualifier_matches_scalar():
+    from footmav.utils.whoscored_funcs import col_has_qualifier, has_qualifier
+
+    events = _events()
+    for kwargs in [
+        {"qualifier_code": 2},
+        {"qualifier_code": 55},
+        {"display_name": "Head"},
+        {"display_name": "Penalty"},
+    ]:
+        result = col_has_qualifier(events, **kwargs)
+        expected = events["qualifiers"].apply(lambda x: has_qualifier(x, **kwargs))
+        assert result.index.tolist() == events.index.tolist()
+        assert result.tolist() == expected.tolist()
+
+
+def test_get_qualifier_index_is_cached_per_frame():
+    from footmav.utils.qualifier_index import get_qualifier_index
+
+    events = _events()
+    index = get_qualifier_index(events)
+    events["x"] = np.arange(4)
+    assert get_qualifier_index(events) is index
+
+    filtered = events.iloc[1:]
+    assert get_qualifier_index(filtered) is not index
+    assert get_qualifier_index(filtered).n_rows == 3
+
+
+def test_qualifier_index_values():
+    from footmav.utils.qualifier_index import QualifierIndex
+
+    events = pd.DataFrame(
+        {
+            "qualifiers": [
+                [_q(55, "RelatedEventId", "4"), _q(140, "PassEndX", "88.5")],
+                [_q(15, "Head")],
+                [_q(55, "RelatedEventId", "7"), _q(55, "RelatedEventId", "9")],
+            ]
+        }
+    )
+    index = QualifierIndex(events["qualifiers"])
+    values = index.values([55, 140])
+    assert values.columns.tolist() == [55, 140]
+    np.testing.assert_array_equal(values[55].to_numpy(), [4.0, np.nan, 7.0])
+    np.testing.assert_array_equal(values[140].to_numpy(), [88.5, np.nan, np.nan])
+    assert index.value(display_name="RelatedEventId", numeric=False).tolist()[::2] == [
+        "4",
+        "7",
+    ]
+    np.testing.assert_array_equal(index.value(qualifier_code=15), [np.nan] * 3)
+    assert len(index.long_table) == 5
+
+
+def test_col_get_qualifier_value():
+    from footmav.utils.whoscored_funcs import col_get_qualifier_value
+
+    events = _events()
+    values = col_get_qualifier_value(events, qualifier_code=55, numeric=True)
+    assert values.index.tolist() == events.index.tolist()
+    np.testing.assert_array_equal(values.to_numpy(), [np.nan, np.nan, np.nan, 4.0])
@@ -1,8 +1,20 @@
 from unittest.mock import patch, MagicMock, sentinel
+import json
 import pytest
 
 
-def test_get_xthreat_grid():
+@pytest.fixture
+def xthreat_cache(tmp_path, monkeypatch):
+    from footmav.utils.whoscored_funcs import get_xthreat_grid
+
+    monkeypatch.setenv("FOOTMAV_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("FOOTMAV_XT_GRID", raising=False)
+    get_xthreat_grid.cache_clear()
+    yield tmp_path
+    get_xthreat_grid.cache_clear()
+
+
+def test_get_xthreat_grid(xthreat_cache):
 
     with patch("requests.get", return_value=MagicMock()) as requests_mock:
         requests_mock.return_value.status_code = 200
@@ -17,7 +29,7 @@ def test_get_xthreat_grid():
         )
 
 
-def test_get_xthreat_grid_error():
+def test_get_xthreat_grid_error(xthreat_cache):
 
     with patch("requests.get", return_value=MagicMock()) as requests_mock:
         requests_mock.return_value.status_code = 400
@@ -25,3 +37,167 @@ def test_get_xthreat_grid_error():
 
         with pytest.raises(Exception, match="Could not retrieve xthreat grid"):
             get_xthreat_grid()
+
+
+def test_get_xthreat_grid_disk_cache(xthreat_cache):
+    from footmav.utils.whoscored_funcs import get_xthreat_grid
+
+    grid = [[float(i + j) for i in range(12)] for j in range(8)]
+    with patch("requests.get", return_value=MagicMock()) as requests_mock:
+        requests_mock.return_value.status_code = 200
+        requests_mock.return_value.json = MagicMock(return_value=grid)
+        assert get_xthreat_grid() == grid
+
+    get_xthreat_grid.cache_clear()
+    with patch("requests.get") as requests_mock:
+        assert get_xthreat_grid() == grid
+        requests_mock.assert_not_called()
+    assert [p.name for p in xthreat_cache.iterdir()] == ["open_xt_12x8_v1.json"]
+
+
+def test_get_xthreat_grid_local_file(xthreat_cache, monkeypatch):
+    from footmav.utils.whoscored_funcs import get_xthreat_grid
+
+    grid = [[1.0] * 12] * 8
+    local = xthreat_cache / "local_grid.json"
+    local.write_text(json.dumps(grid))
+    with patch("requests.get") as requests_mock:
+        assert get_xthreat_grid(str(local)) == grid
+        monkeypatch.setenv("FOOTMAV_XT_GRID", str(local))
+        assert get_xthreat_grid() == grid
+        requests_mock.assert_not_called()
+
+
+def test_col_in_rects_and_zone_id():
+    import numpy as np
+    import pandas as pd
+    from footmav.utils.whoscored_funcs import col_in_rect, col_in_rects, col_zone_id
+
+    events = pd.DataFrame(
+        {
+            "x": [10.0, 50.0, 94.0, np.nan],
+            "y": [10.0, 50.0, 70.0, 50.0],
+            "endX": [90.0, 20.0, 50.0, 50.0],
+            "endY": [50.0, 20.0, 50.0, 50.0],
+        }
+    )
+    rects = [((0, 0), (33, 100)), ((66, 100), (33, 0)), ((100, 64), (94, 100))]
+    membership = col_in_rects(events, rects)
+    assert membership.tolist() == [
+        [True, False, False],
+        [False, True, False],
+        [False, False, True],
+        [False, False, False],
+    ]
+    assert col_zone_id(events, rects).tolist() == [0, 1, 2, -1]
+    assert col_zone_id(events, rects, end_coord=True).tolist() == [-1, 0, 1, 1]
+    assert col_in_rect(events, (0, 0), (50, 50)).tolist() == [True, True, False, False]
+
+
+def test_goal_distances_match_pointwise_distance():
+    import numpy as np
+    import pandas as pd
+    from footmav.utils.whoscored_funcs import (
+        distance,
+        goal_distances,
+        progressive_distance,
+        GOAL_MOUTH_COORDS,
+    )
+
+    events = pd.DataFrame(
+        {
+            "x": [10.0, 50.0, 99.0],
+            "y": [10.0, 50.0, 60.0],
+            "endX": [90.0, 20.0, 100.0],
+            "endY": [50.0, 20.0, 50.0],
+        }
+    )
+    start, end = goal_distances(events)
+    x, y = events["x"].to_numpy(), events["y"].to_numpy()
+    expected_start = np.min(
+        [distance(x, y, np.full(3, c[0]), np.full(3, c[1])) for c in GOAL_MOUTH_COORDS],
+        axis=0,
+    )
+    np.testing.assert_allclose(start, expected_start)
+    assert end[2] == 0
+    np.testing.assert_allclose(progressive_distance(events), start - end)
+    assert goal_distances(events) is goal_distances(events)
+
+
+def test_assist_links_use_integer_keys():
+    import numpy as np
+    import pandas as pd
+    from footmav.utils.whoscored_funcs import (
+        assist_links,
+        assisted_xg,
+        is_assist,
+        is_keypass,
+    )
+
+    def related(event_id):
+        return [
+            {
+                "type": {"value": 55, "displayName": "RelatedEventId"},
+                "value": str(event_id),
+            }
+        ]
+
+    # match 12 / event 34 and match 123 / event 4 collide under string concatenation
+    events = pd.DataFrame(
+        {
+            "matchId": [12, 123, 123, 12, 123],
+            "teamId": [1, 2, 2, 1, 3],
+            "eventId": [34, 4, 5, 35, 34],
+            "qualifiers": [[], [], related(4), related(34), []],
+            "xG": [0.0, 0.0, 0.3, 0.5, 0.0],
+            "shots": [False, False, True, True, False],
+            "goals": [False, False, False, True, False],
+        },
+        index=[5, 6, 7, 8, 9],
+    )
+    assert assist_links(events).tolist() == [-1, -1, 1, 0, -1]
+    assert is_keypass(events).tolist() == [True, True, False, False, False]
+    assert is_assist(events).tolist() == [True, False, False, False, False]
+    np.testing.assert_allclose(assisted_xg(events).to_numpy(), [0.5, 0.3, 0, 0, 0])
+
+
+def test_event_type_encoding():
+    import numpy as np
+    import pandas as pd
+    from footmav.data_definitions.whoscored.constants import EventType
+    from footmav.utils.whoscored_funcs import (
+        col_is_event_type,
+        decode_event_type_column,
+        encode_event_type_column,
+        is_shot,
+        is_touch,
+    )
+
+    events = pd.DataFrame(
+        {
+            "event_type": [
+                EventType.Pass,
+                EventType.Foul,
+                EventType.SavedShot,
+                None,
+                EventType.SubstitutionOn,
+            ],
+            "outcomeType": [1, 1, 0, 1, 1],
+            "qualifiers": [[]] * 5,
+        },
+        index=[5, 6, 7, 8, 9],
+    )
+    encoded = encode_event_type_column(events)
+    assert encoded["event_type"].tolist() == [1, 4, 15, -1, 19]
+    assert encoded["event_type"].dtype == np.int16
+    assert events["event_type"].iloc[0] is EventType.Pass
+
+    for frame in [events, encoded]:
+        mask = col_is_event_type(frame, EventType.Pass, EventType.SavedShot)
+        assert mask.index.tolist() == [5, 6, 7, 8, 9]
+        assert mask.tolist() == [True, False, True, False, False]
+        assert is_touch(frame).tolist() == [True, True, True, False, False]
+        assert is_shot(frame).tolist() == [False, False, True, False, False]
+
+    decoded = decode_event_type_column(encoded)
+    assert decoded["event_type"].tolist() == events["event_type"].tolist()
@@ -37,3 +37,14 @@ def test_net_pass_xt():
         xthread = net_pass_xt(events)
         assert xthread.tolist() == [24, 1, 5, 0]
         xthread_grid_mock.assert_called_once()
+
+
+def test_xt_bin_index_matches_pd_cut():
+    import numpy as np
+    from footmav.utils.xthreat import xt_bin_index, X_BINS
+
+    values = np.array([0, 0.01, 8.3, 100 / 12, 8.34, 50, 99.99, 100, 100.5, -1, np.nan])
+    expected = pd.cut(values, bins=X_BINS, labels=range(12))
+    assert xt_bin_index(values, X_BINS).tolist() == [
+        -1 if pd.isna(v) else v for v in expected
+    ]